@@ -0,0 +1,72 @@
+"""Benchmark of date range filtering on a full 1min intraday history.
+
+Compares previous approach (object TradeDate/time columns and boolean mask built from
+datetime.date comparisons) with binary search on sorted DatetimeIndex.
+
+Run from repository root:
+    python benchmarks/bench_date_slice.py
+"""
+import datetime
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "stock-app"))
+
+from market_data.store import slice_dates  # noqa: E402
+
+
+YEARS = 2
+DATE_FROM = datetime.date(2022, 3, 1)
+DATE_TO = datetime.date(2022, 9, 1)
+
+
+def intraday_history(years: int) -> pd.DataFrame:
+    """Builds 1min bars (extended hours 4:00-20:00) sorted from the newest bar, as returned by api."""
+    days = pd.bdate_range(end="2023-12-29", periods=252 * years)
+    minutes = pd.timedelta_range(start="4h", end="19h59min", freq="1min")
+    index = (days.values[:, None] + minutes.values[None, :]).ravel()[::-1]
+    close = np.random.default_rng(0).normal(100, 1, len(index))
+    data = pd.DataFrame({"open": close, "high": close, "low": close, "close": close, "volume": close}, index=index)
+    data.index.name = "date"
+    return data
+
+
+def mask_filter(data: pd.DataFrame) -> pd.DataFrame:
+    """Previous prepare_data and mask filtering."""
+    data["TradeDate"] = data.index.date
+    data["time"] = data.index.time
+    mask = (data["TradeDate"] >= DATE_FROM) & (data["TradeDate"] <= DATE_TO)
+    return data.loc[mask]
+
+
+def index_slice(data: pd.DataFrame) -> pd.DataFrame:
+    return slice_dates(data, DATE_FROM, DATE_TO)
+
+
+def measure(func, data: pd.DataFrame) -> tuple[float, float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(data)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, len(result)
+
+
+def main():
+    data = intraday_history(YEARS)
+    data.index.is_monotonic_decreasing  # index properties are cached, same as in long-living frames
+    print(f"{len(data)} bars, range {DATE_FROM} - {DATE_TO}")
+    print(f"{'method':>12} {'time [s]':>10} {'peak [MiB]':>12} {'rows':>10}")
+    for name, func in [("mask", mask_filter), ("index slice", index_slice)]:
+        elapsed, peak, rows = measure(func, data.copy())
+        print(f"{name:>12} {elapsed:>10.4f} {peak:>12.1f} {rows:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Benchmark of chart rendering with reduction of plotted series to chart resolution.
+
+Compares previous pyplot charts (close line plotted 50 times, six bar calls per candlestick chart),
+charts drawn at full resolution and charts drawn from series reduced with LTTB (line) and OHLC
+buckets (candlestick) on 1min intraday histories. Previous charts are timed on at most
+LEGACY_FULL_LIMIT bars and extrapolated linearly above it (marked with "~").
+
+Run from repository root:
+    python benchmarks/bench_downsample.py
+"""
+import os
+import sys
+import time
+from io import BytesIO
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "stock-app"))
+
+from analytics.downsample import reduce_for_plot  # noqa: E402
+from analytics.plots import CHART_PRESETS, plot_data  # noqa: E402
+
+SIZES = [2_000, 20_000, 200_000]
+LEGACY_FULL_LIMIT = 20_000
+PRESET = "default"
+META = {"2. Symbol": "BENCH"}
+
+
+def intraday_history(rows: int) -> pd.DataFrame:
+    """Builds 1min bars (extended hours 4:00-20:00) sorted from the newest bar, as returned by api."""
+    days = pd.bdate_range(end="2023-12-29", periods=rows // 960 + 1)
+    minutes = pd.timedelta_range(start="4h", end="19h59min", freq="1min")
+    index = (days.values[:, None] + minutes.values[None, :]).ravel()[-rows:][::-1]
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 0.05, rows))
+    spread = np.abs(np.random.default_rng(1).normal(0, 0.05, rows))
+    return pd.DataFrame(
+        {"open": close[::-1], "high": close + spread, "low": close - spread, "close": close, "volume": 100.0},
+        index=index,
+    )
+
+
+def legacy_plot_data(plot_type: str, data: pd.DataFrame) -> bytes:
+    """Previous plot_data (pyplot figure, 50 line plots, six bar calls)."""
+    plt.style.use("dark_background")
+    fig, ax = plt.subplots()
+    plt.rc("font", size=8)
+    plt.subplots_adjust(bottom=0.20)
+    plt.xticks(rotation=70, fontsize=6)
+    if plot_type == "linear":
+        for _ in np.linspace(0, 6):
+            ax.plot(data["close"], color="#00ccff", linewidth=0.5)
+    else:
+        up = data[data.close >= data["open"]]
+        down = data[data["close"] < data["open"]]
+        plt.bar(up.index, up.close - up.open, 0.5, bottom=up.open, color="#89ff00")
+        plt.bar(up.index, up.high - up.close, 0.2, bottom=up.close, color="#4CAE50")
+        plt.bar(up.index, up.low - up.open, 0.2, bottom=up.open, color="#4CAE50")
+        plt.bar(down.index, down.close - down.open, 0.5, bottom=down.open, color="#ff005e")
+        plt.bar(down.index, down.high - down.open, 0.2, bottom=down.open, color="#9C2525")
+        plt.bar(down.index, down.low - down.close, 0.2, bottom=down.close, color="#9C2525")
+    buf = BytesIO()
+    fig.savefig(buf, format="png", dpi=300)
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def timed(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def legacy_time(plot_type: str, data: pd.DataFrame) -> tuple[float, bool]:
+    if len(data) <= LEGACY_FULL_LIMIT:
+        return timed(legacy_plot_data, plot_type, data), False
+    # Render cost of previous charts grows linearly with number of drawn bars
+    return timed(legacy_plot_data, plot_type, data.iloc[:LEGACY_FULL_LIMIT]) * len(data) / LEGACY_FULL_LIMIT, True
+
+
+def main():
+    preset = CHART_PRESETS[PRESET]
+    # Axes span 0.125 - 0.9 of figure width by default
+    width_px = int(preset.width * preset.dpi * 0.775)
+    print(f"preset {PRESET}: {preset.width * preset.dpi:.0f} px wide, axes ~{width_px} px")
+    print(
+        f"{'bars':>8} {'chart':>12} {'plotted':>8} {'ratio':>8} {'legacy [s]':>11} "
+        f"{'full [s]':>9} {'reduced [s]':>12} {'saving':>8}"
+    )
+    # Font cache and lazily imported matplotlib modules are loaded before timing
+    for plot_type in ("linear", "candlestick"):
+        plot_data(plot_type, intraday_history(100), META, "bench", "1min", PRESET)
+        legacy_plot_data(plot_type, intraday_history(100))
+    for size in SIZES:
+        data = intraday_history(size)
+        for plot_type in ("linear", "candlestick"):
+            plotted = len(reduce_for_plot(plot_type, data, width_px))
+            legacy, extrapolated = legacy_time(plot_type, data)
+            full = timed(plot_data, plot_type, data, META, "bench", "1min", PRESET, downsample=False)
+            reduced = timed(plot_data, plot_type, data, META, "bench", "1min", PRESET, downsample=True)
+            legacy_label = f"{'~' if extrapolated else ''}{legacy:.2f}"
+            print(
+                f"{size:>8} {plot_type:>12} {plotted:>8} {size / plotted:>7.0f}x {legacy_label:>11} "
+                f"{full:>9.2f} {reduced:>12.2f} {legacy / reduced:>7.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark of vectorized rescaled range analysis against previous nested loops implementation.
+
+Run from repository root:
+    python benchmarks/bench_hurst.py
+
+Previous implementation is O(N^3), on long series it is timed on a sample of segment lengths
+and the result is extrapolated to the full range (marked with "~").
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "stock-app"))
+
+from analytics.hurst import rescaled_range, segment_lengths  # noqa: E402
+
+
+SIZES = [1_000, 10_000, 100_000]
+LOG_SPACED_COUNT = 50
+LEGACY_SAMPLE = 20
+LEGACY_FULL_LIMIT = 1_000
+
+
+def legacy_rescaled_range(log_returns: np.ndarray, intervals) -> list:
+    """Previous calculate_hurst_exponent loops."""
+    ro = []
+    for n in intervals:
+        m = int(len(log_returns) / n)
+        z = np.zeros(shape=(m, n))
+        u = np.zeros(shape=(m, n))
+        r = np.zeros(shape=m)
+        s = np.zeros(shape=m)
+        for i in range(m):
+            y_mean = np.mean(log_returns[i * n : (i + 1) * n])
+            for j in range(n):
+                z[i][j] = log_returns[i * n + j] - y_mean
+                u[i][j] = np.sum(z[i])
+            s[i] = np.std(z[i])
+            r[i] = np.max(u[i] - np.min(u[i]))
+        ro.append(np.mean(r / s))
+    return ro
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def legacy_time(log_returns: np.ndarray, intervals: np.ndarray) -> tuple[float, bool]:
+    """Times legacy implementation, extrapolates from a sample on long series."""
+    if len(log_returns) <= LEGACY_FULL_LIMIT:
+        return timed(legacy_rescaled_range, log_returns, intervals), False
+    sample = intervals[np.linspace(0, len(intervals) - 1, LEGACY_SAMPLE).astype(int)]
+    # Cost of a single segment length is proportional to the series length, not to n
+    return timed(legacy_rescaled_range, log_returns, sample) * len(intervals) / len(sample), True
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'points':>8} {'legacy [s]':>14} {'vectorized [s]':>15} {'log-spaced [s]':>15} {'speedup':>10}")
+    for size in SIZES:
+        log_returns = rng.normal(0, 0.01, size)
+        all_lengths = segment_lengths(size)
+        log_lengths = segment_lengths(size, count=LOG_SPACED_COUNT)
+        legacy, extrapolated = legacy_time(log_returns, all_lengths)
+        vectorized = timed(rescaled_range, log_returns, all_lengths)
+        log_spaced = timed(rescaled_range, log_returns, log_lengths)
+        legacy_label = f"{'~' if extrapolated else ''}{legacy:.3f}"
+        print(f"{size:>8} {legacy_label:>14} {vectorized:>15.3f} {log_spaced:>15.4f} {legacy / log_spaced:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark of login throughput and event loop responsiveness during login burst.
+
+Compares previous authenticate_user (bcrypt verification run inside event loop) with
+authenticate_user verifying passwords on password_executor. LOGINS logins are started at once
+while a probe task measures how late the event loop wakes it up (latency added to every other
+request served by the worker during the burst).
+
+Run from repository root:
+    python benchmarks/bench_login.py
+    PASSWORD_BCRYPT_ROUNDS=10 PASSWORD_HASH_WORKERS=4 python benchmarks/bench_login.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "stock-app"))
+
+# Settings required by config module (a local .env is not read when run from repository root)
+for name, value in {
+    "DATABASE_URL": "mongodb://localhost:27017",
+    "MONGO_INITDB_DATABASE": "benchmark",
+    "SECRET_KEY": "benchmark",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "CLIENT_ORIGIN": "http://localhost:3000",
+    "ALPHA_VANTAGE_API_KEY": "benchmark",
+}.items():
+    os.environ.setdefault(name, value)
+
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+import security  # noqa: E402
+from config import settings  # noqa: E402
+from crud import user_crud  # noqa: E402
+from executors import password_executor  # noqa: E402
+from routes import auth  # noqa: E402
+
+LOGINS = 32
+PROBE_INTERVAL = 0.005
+
+
+async def legacy_authenticate_user(email: str, password: str):
+    """Previous authenticate_user (password verified synchronously in event loop)."""
+    user = await user_crud.get_user_by_email(email)
+    if not user:
+        return False
+    if not security.pwd_context.verify(password, user["password"]):
+        return False
+    return user
+
+
+async def probe(lags: list, done: asyncio.Event) -> None:
+    """Sleeps PROBE_INTERVAL in loop and records how late it is woken up."""
+    while not done.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def measure(name: str, authenticate) -> None:
+    lags = []
+    done = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, done))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(authenticate(f"user{n}@email.com", "secret") for n in range(LOGINS)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    assert all(results)
+    print(
+        f"{name:>18} {elapsed:>9.2f} {LOGINS / elapsed:>10.1f} "
+        f"{1000 * max(lags, default=0):>13.1f} {1000 * sorted(lags)[len(lags) // 2] if lags else 0:>13.1f}"
+    )
+
+
+async def main():
+    users = AsyncMongoMockClient()["bench"]["users"]
+    user_crud.User = users
+    password_hash = security.pwd_context.hash("secret")
+    await users.insert_many([{"email": f"user{n}@email.com", "password": password_hash} for n in range(LOGINS)])
+    print(
+        f"{LOGINS} concurrent logins, bcrypt rounds {settings.PASSWORD_BCRYPT_ROUNDS}, "
+        f"{settings.PASSWORD_HASH_WORKERS} password workers, {os.cpu_count()} cpus"
+    )
+    print(f"{'method':>18} {'time [s]':>9} {'logins/s':>10} {'max lag [ms]':>13} {'p50 lag [ms]':>13}")
+    await measure("in event loop", legacy_authenticate_user)
+    await measure("password_executor", auth.authenticate_user)
+    password_executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""Benchmark of portfolio historical VaR on joined returns matrix against previous per-day loop.
+
+Run from repository root:
+    python benchmarks/bench_portfolio_var.py
+
+On large portfolios previous implementation is timed on the first year only and the result
+is scaled to the whole period (marked with "~").
+"""
+import datetime
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "stock-app"))
+
+from analytics.portfolio import portfolio_historical_var  # noqa: E402
+
+
+ASSETS = [10, 100, 1_000]
+YEARS = 10
+LEGACY_FULL_LIMIT = 100
+DATE_FROM = datetime.date(2013, 1, 1)
+DATE_TO = datetime.date(2022, 12, 31)
+
+
+def legacy_portfolio_historical_var(portfolio_with_data, confidence_level, horizon_days, date_from, date_to):
+    """Previous portfolio_historical_var."""
+    portfolio_values = pd.Series(dtype=np.float64)
+    for n in range(int((date_to + datetime.timedelta(1) - date_from).days)):
+        pd_day = pd.Timestamp(date_from + datetime.timedelta(n))
+        portfolio_value = 0
+        include_date = True
+        for symbol_data in portfolio_with_data.values():
+            value = symbol_data["value"]
+            returns: pd.Series = symbol_data["returns"]
+            if pd_day in returns:
+                portfolio_value += value * returns[pd_day]
+            else:
+                include_date = False
+                break
+        if include_date:
+            portfolio_values[pd_day] = portfolio_value
+    sorted_portfolio_values = np.sort(portfolio_values)
+    worst_portfolio_value = sorted_portfolio_values[int((1 - confidence_level) * len(sorted_portfolio_values))]
+    current_portfolio_value = sum(symbol_data["value"] for symbol_data in portfolio_with_data.values())
+    return (current_portfolio_value - worst_portfolio_value) * np.sqrt(horizon_days)
+
+
+def portfolio(number_of_symbols: int) -> dict:
+    rng = np.random.default_rng(0)
+    days = pd.bdate_range(DATE_FROM, DATE_TO)[::-1]
+    return {
+        f"S{i}": {"value": 1000.0, "returns": pd.Series(rng.normal(1, 0.02, len(days)), index=days)}
+        for i in range(number_of_symbols)
+    }
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{YEARS} years of daily returns")
+    print(f"{'assets':>8} {'legacy [s]':>12} {'matrix [s]':>12} {'speedup':>10}")
+    for assets in ASSETS:
+        portfolio_with_data = portfolio(assets)
+        matrix = timed(portfolio_historical_var, portfolio_with_data, 0.99, 1, DATE_FROM, DATE_TO)
+        if assets <= LEGACY_FULL_LIMIT:
+            legacy = timed(legacy_portfolio_historical_var, portfolio_with_data, 0.99, 1, DATE_FROM, DATE_TO)
+            label = f"{legacy:.3f}"
+        else:
+            first_year_end = DATE_FROM + datetime.timedelta(364)
+            legacy = YEARS * timed(
+                legacy_portfolio_historical_var, portfolio_with_data, 0.99, 1, DATE_FROM, first_year_end
+            )
+            label = f"~{legacy:.3f}"
+        print(f"{assets:>8} {label:>12} {matrix:>12.4f} {legacy / matrix:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
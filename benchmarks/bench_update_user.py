@@ -0,0 +1,135 @@
+"""Benchmark of user updates.
+
+Compares previous update_user (update_one followed by up to three find_one calls), update_user built
+on find_one_and_update and bulk update of many users with update_users (one bulk_write).
+
+Runs against mongomock (in-process) by default, where each database call is delayed by RTT_MS
+to model network round trip; set MONGO_URL to run against a local mongod instead (no delay added).
+
+Run from repository root:
+    python benchmarks/bench_update_user.py
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/bench_update_user.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "stock-app"))
+
+# Settings required by config module (a local .env is not read when run from repository root)
+for name, value in {
+    "DATABASE_URL": "mongodb://localhost:27017",
+    "MONGO_INITDB_DATABASE": "benchmark",
+    "SECRET_KEY": "benchmark",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "CLIENT_ORIGIN": "http://localhost:3000",
+    "ALPHA_VANTAGE_API_KEY": "benchmark",
+}.items():
+    os.environ.setdefault(name, value)
+
+from crud import user_crud  # noqa: E402
+
+USERS = 200
+RTT_MS = float(os.environ.get("RTT_MS", 0.5))
+MONGO_URL = os.environ.get("MONGO_URL")
+
+
+class CountingCollection:
+    """Collection proxy counting database calls (round trips) and delaying them by rtt seconds."""
+
+    def __init__(self, collection, rtt: float):
+        self.collection = collection
+        self.rtt = rtt
+        self.round_trips = 0
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+
+        async def call(*args, **kwargs):
+            self.round_trips += 1
+            if self.rtt:
+                await asyncio.sleep(self.rtt)
+            return await method(*args, **kwargs)
+
+        return call
+
+
+async def legacy_update_user(user_id, user: dict) -> dict:
+    """Previous update_user (with ObjectId query, previous version queried by str id)."""
+    User = user_crud.User
+    user = {k: v for k, v in user.items() if v is not None}
+    update_result = await User.update_one({"_id": user_id}, {"$set": user})
+    if update_result.modified_count == 1:
+        user = await User.find_one({"_id": user_id})
+        if (updated_student := await User.find_one({"_id": user_id})) is not None:
+            updated_student["_id"] = str(updated_student["_id"])
+            return updated_student
+    if (existing_student := await User.find_one({"_id": user_id})) is not None:
+        existing_student["_id"] = str(existing_student["_id"])
+        return existing_student
+
+
+def collection():
+    if MONGO_URL:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        return AsyncIOMotorClient(MONGO_URL)["bench_update_user"]["users"], 0.0
+    from mongomock_motor import AsyncMongoMockClient
+
+    return AsyncMongoMockClient()["bench"]["users"], RTT_MS / 1000
+
+
+async def measure(name: str, users: CountingCollection, run) -> None:
+    users.round_trips = 0
+    start = time.perf_counter()
+    await run()
+    elapsed = time.perf_counter() - start
+    print(f"{name:>24} {elapsed:>9.3f} {1000 * elapsed / USERS:>11.2f} {users.round_trips:>12}")
+
+
+async def sequential(update, ids, fields: dict) -> None:
+    """Updates users one after another, as separate requests do."""
+    for user_id in ids:
+        await update(user_id, fields)
+
+
+async def main():
+    raw, rtt = collection()
+    await raw.delete_many({})
+    history = [{"symbol": "INTC", "var": 1.0}] * 20
+    ids = (
+        await raw.insert_many(
+            [
+                {"email": f"user{n}@email.com", "name": f"User {n}", "password": "x" * 60, "analysis_history": history}
+                for n in range(USERS)
+            ]
+        )
+    ).inserted_ids
+    users = CountingCollection(raw, rtt)
+    user_crud.User = users
+    print(f"{'mongod' if MONGO_URL else f'mongomock, {RTT_MS} ms per round trip'}, {USERS} users")
+    print(f"{'method':>24} {'time [s]':>9} {'ms / user':>11} {'round trips':>12}")
+    await measure(
+        "update_one + find_one",
+        users,
+        lambda: sequential(legacy_update_user, ids, {"name": "Legacy"}),
+    )
+    await measure(
+        "find_one_and_update",
+        users,
+        lambda: sequential(user_crud.update_user, [str(user_id) for user_id in ids], {"name": "Single"}),
+    )
+    await measure(
+        "bulk_write",
+        users,
+        lambda: user_crud.update_users([(str(user_id), {"name": "Bulk"}) for user_id in ids]),
+    )
+    assert await raw.count_documents({"name": "Bulk"}) == USERS
+    if MONGO_URL:
+        await raw.drop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
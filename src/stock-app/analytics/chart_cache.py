@@ -0,0 +1,179 @@
+"""Module contains content-addressed cache of rendered charts.
+
+Charts are keyed by a hash of plotted series and plot parameters, so the same chart requested
+again (same symbol, interval, date range and plot type) is served without rendering it.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from market_data.store import atomic_file
+
+
+@dataclass
+class CachedChart:
+    png: bytes
+    meta: dict
+
+
+def chart_key(kind: str, data: pd.DataFrame | pd.Series, **params) -> str:
+    """Returns hex digest of chart kind, plot parameters and plotted series (index and values)."""
+    digest = hashlib.sha256()
+    columns = list(data.columns) if isinstance(data, pd.DataFrame) else [data.name]
+    digest.update(json.dumps([kind, columns, params], sort_keys=True, default=str).encode())
+    digest.update(np.ascontiguousarray(data.index.values).tobytes())
+    digest.update(np.ascontiguousarray(data.to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+
+class ChartCache:
+    """LRU cache of rendered PNG charts (with small meta dict) keyed by chart_key digest.
+
+    Least recently used charts are evicted from memory when total size exceeds max_bytes.
+    When directory is given, charts are also written to disk, memory misses are served
+    from there and least recently used files are removed above disk_max_bytes. Sizes and
+    recency of disk charts are indexed in memory (directory is scanned once at start), charts
+    written by other processes are indexed when they are read.
+    """
+
+    def __init__(self, max_bytes: int, directory: str | None = None, disk_max_bytes: int | None = None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self.size = 0
+        self.disk_size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self._entries: OrderedDict[str, CachedChart] = OrderedDict()
+        # Key -> bytes of chart files on disk, least recently used first
+        self._disk: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._scan_disk()
+
+    def get(self, key: str) -> CachedChart | None:
+        with self._lock:
+            chart = self._entries.get(key)
+            if chart is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return chart
+            chart = self._load(key)
+            if chart is None:
+                self.misses += 1
+                return None
+            self._insert(key, chart)
+            self.disk_hits += 1
+            return chart
+
+    def put(self, key: str, png: bytes, meta: dict | None = None) -> None:
+        chart = CachedChart(png, dict(meta or {}))
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key).png)
+            self._insert(key, chart)
+            self._dump(key, chart)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "disk_bytes": self.disk_size,
+            "disk_max_bytes": self.disk_max_bytes,
+        }
+
+    def _insert(self, key: str, chart: CachedChart) -> None:
+        if len(chart.png) > self.max_bytes:
+            return
+        self._entries[key] = chart
+        self.size += len(chart.png)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted.png)
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _scan_disk(self) -> None:
+        """Indexes charts in directory, ordered by modification time of their PNG files."""
+        charts: dict[str, list] = {}
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                key, suffix = os.path.splitext(name)
+                if suffix not in (".png", ".json") or name.startswith("."):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                chart = charts.setdefault(key, [0, 0])
+                chart[0] += stat.st_size
+                if suffix == ".png":
+                    chart[1] = stat.st_mtime_ns
+        for key, (size, _) in sorted(charts.items(), key=lambda item: item[1][1]):
+            self._disk[key] = size
+        self.disk_size = sum(self._disk.values())
+
+    def _load(self, key: str) -> CachedChart | None:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(f"{path}.png", "rb") as file:
+                png = file.read()
+            with open(f"{path}.json", encoding="utf-8") as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return None
+        # Mark chart as recently used for disk eviction (file time orders charts after restart)
+        os.utime(f"{path}.png")
+        if key not in self._disk:
+            self._disk[key] = len(png) + os.path.getsize(f"{path}.json")
+            self.disk_size += self._disk[key]
+        self._disk.move_to_end(key)
+        return CachedChart(png, meta)
+
+    def _dump(self, key: str, chart: CachedChart) -> None:
+        if not self.directory:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = json.dumps(chart.meta).encode()
+        for suffix, content in ((".json", meta), (".png", chart.png)):
+            with atomic_file(f"{path}{suffix}") as file:
+                file.write(content)
+        self.disk_size += len(meta) + len(chart.png) - self._disk.pop(key, 0)
+        self._disk[key] = len(meta) + len(chart.png)
+        if self.disk_max_bytes is not None and self.disk_size > self.disk_max_bytes:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Removes least recently used charts (except the last written) from disk until it fits in disk_max_bytes."""
+        while self.disk_size > self.disk_max_bytes and len(self._disk) > 1:
+            key, size = self._disk.popitem(last=False)
+            self.disk_size -= size
+            for suffix in (".png", ".json"):
+                try:
+                    os.remove(f"{self._path(key)}{suffix}")
+                except OSError:
+                    pass
+            self.disk_evictions += 1
@@ -0,0 +1,82 @@
+"""Module contains reduction of plotted series to resolution of rendered chart.
+
+Series longer than number of pixels available on chart axes are reduced before plotting, so
+number of drawn artists and vertices depends on chart size instead of series length.
+"""
+import numpy as np
+import pandas as pd
+
+# Minimal width of one candle (body and gap) in pixels
+CANDLE_PIXELS = 4
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets downsampling of line (x sorted ascending).
+
+    First and last point are kept, remaining points are split into threshold - 2 buckets and from
+    each bucket the point forming the largest triangle with previously selected point and mean of
+    the next bucket is selected.
+
+    Args:
+        x (np.ndarray): x coordinates sorted ascending.
+        y (np.ndarray): y coordinates.
+        threshold (int): number of points to select.
+
+    Returns:
+        (np.ndarray): indices of selected points.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def ohlc_buckets(data: pd.DataFrame, buckets: int) -> pd.DataFrame:
+    """Aggregates consecutive bars (sorted ascending) into at most buckets bars.
+
+    Bucket bar starts at its first bar, has open of the first bar, close of the last one,
+    highest high, lowest low and summed volume.
+    """
+    n = len(data)
+    if buckets >= n or buckets < 1:
+        return data
+    starts = np.unique(np.arange(buckets) * n // buckets)
+    ends = np.append(starts[1:], n) - 1
+    aggregated = {
+        "open": data["open"].to_numpy()[starts],
+        "high": np.maximum.reduceat(data["high"].to_numpy(), starts),
+        "low": np.minimum.reduceat(data["low"].to_numpy(), starts),
+        "close": data["close"].to_numpy()[ends],
+    }
+    if "volume" in data:
+        aggregated["volume"] = np.add.reduceat(data["volume"].to_numpy(), starts)
+    return pd.DataFrame(aggregated, index=data.index[starts])
+
+
+def reduce_for_plot(plot_type: str, data: pd.DataFrame, width_px: int) -> pd.DataFrame:
+    """Reduces series (any order) to resolution of chart axes width_px pixels wide, sorted ascending.
+
+    Line charts keep one LTTB point per pixel of close prices, candlestick charts keep
+    one candle per CANDLE_PIXELS pixels.
+    """
+    data = data.sort_index()
+    if plot_type == "linear":
+        x = data.index.asi8 if isinstance(data.index, pd.DatetimeIndex) else np.arange(len(data))
+        return data.iloc[lttb(x, data["close"].to_numpy(), max(width_px, 3))]
+    if plot_type == "candlestick":
+        return ohlc_buckets(data, max(width_px // CANDLE_PIXELS, 1))
+    return data
@@ -0,0 +1,86 @@
+"""Module contains vectorized rescaled range (R/S) analysis used to estimate Hurst exponent."""
+import numpy as np
+import pandas as pd
+
+from analytics.plots import plot_hurst_eponent
+from analytics.value_at_risk import calculate_log_returns
+
+
+def segment_lengths(number_of_returns: int, min_length: int = 5, count: int | None = None) -> np.ndarray:
+    """Builds segment lengths used in rescaled range analysis.
+
+    Args:
+        number_of_returns (int): length of analysed returns series.
+        min_length (int, optional): shortest segment length. Defaults to 5.
+        count (int | None, optional): number of log-spaced segment lengths. When None every integer
+            from min_length up to half of the series is used. Defaults to None.
+
+    Returns:
+        (np.ndarray): sorted, unique segment lengths.
+    """
+    max_length = int(number_of_returns / 2)
+    if max_length <= min_length:
+        return np.array([], dtype=np.int64)
+    if count is None:
+        return np.arange(min_length, max_length, dtype=np.int64)
+    lengths = np.geomspace(min_length, max_length - 1, num=count)
+    return np.unique(np.round(lengths).astype(np.int64))
+
+
+def rescaled_range(returns: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Calculates mean rescaled range for each segment length.
+
+    All segments of a given length are processed at once as one (m, n) block.
+
+    Args:
+        returns (np.ndarray): log returns.
+        lengths (np.ndarray): segment lengths.
+
+    Returns:
+        (np.ndarray): mean rescaled range for each segment length.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    ro = np.empty(len(lengths), dtype=np.float64)
+    for k, n in enumerate(lengths):
+        # 2. Divide returns into m segments of n elements
+        m = len(returns) // n
+        segments = returns[: m * n].reshape(m, n)
+        # 3. Deviations from segment mean
+        z = segments - segments.mean(axis=1, keepdims=True)
+        # 4. Partial sums, 6. range of each segment
+        r = np.ptp(np.cumsum(z, axis=1), axis=1)
+        # 5. Standard deviation of each segment
+        s = z.std(axis=1)
+        # 7, 8. Mean of normalized ranges
+        ro[k] = np.mean(r / s)
+    return ro
+
+
+def hurst_exponent(returns: np.ndarray, lengths: np.ndarray) -> float:
+    """Estimates Hurst exponent as a slope of log(R/S) against log(segment length).
+
+    Args:
+        returns (np.ndarray): log returns.
+        lengths (np.ndarray): segment lengths.
+
+    Returns:
+        (float): Hurst exponent.
+    """
+    ro = rescaled_range(returns, lengths)
+    slope, _ = np.polyfit(np.log(lengths), np.log(ro), 1)
+    return slope
+
+
+def calculate_hurst_exponent(
+    data: pd.DataFrame, segment_count: int | None = None, preset: str = "default", trace_memory: bool = False
+):
+    data = data["close"]
+    # 1. logarytmiczna stopy zwrotu
+    log_returns = calculate_log_returns(data)
+    # 9. długości przedziałów od 5 do połowy szeregu, rozłożone logarytmicznie
+    intervals = segment_lengths(len(log_returns), count=segment_count)
+    # 2-8. średnia znormalizowana rozpiętość dla każdej długości przedziału
+    ro = rescaled_range(log_returns.to_numpy(), intervals)
+    # 10,11. nachylenie prostej średniego odchylenia standardowego zależnego od długości segmentów na skali logarytmicznej to wykladnik Hursta
+    hurst_exponent, hurst_plot, render_stats = plot_hurst_eponent(intervals, ro, preset, trace_memory)
+    return hurst_exponent, hurst_plot, render_stats
@@ -0,0 +1,231 @@
+"""Module contains functions used to plot stock market data charts.
+
+Charts are drawn on a new matplotlib Figure with Agg canvas per render (pyplot and its global
+figure manager and rc state are not used), so renders do not leak figures or styles into each other.
+"""
+import threading
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from io import BytesIO
+
+import matplotlib
+import matplotlib.dates as mdates
+import matplotlib.style
+import numpy as np
+import pandas as pd
+from PIL import Image
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+
+from analytics.downsample import reduce_for_plot
+
+
+@dataclass(frozen=True)
+class ChartPreset:
+    """Size (inches) and resolution of rendered chart."""
+
+    width: float
+    height: float
+    dpi: int
+
+
+CHART_PRESETS = {
+    "preview": ChartPreset(6.4, 4.8, 100),
+    "standard": ChartPreset(6.4, 4.8, 150),
+    "default": ChartPreset(6.4, 4.8, 300),
+}
+
+# rc parameters applied to every chart, resolved once instead of calling plt.style.use per render
+CHART_STYLE = {**matplotlib.style.library["dark_background"], "font.size": 8}
+
+
+@dataclass
+class RenderStats:
+    """Render time (seconds) and peak memory (bytes) of one chart.
+
+    Peak memory is the peak of Python/numpy allocations traced during render plus size of Agg
+    pixel buffer, which is allocated outside of Python allocator. It is None when render was not
+    traced (tracemalloc slows rendering down a few times).
+    """
+
+    seconds: float
+    peak_memory: int | None
+    png_bytes: int
+    width_px: int
+    height_px: int
+
+
+class ChartMetrics:
+    """Aggregates render statistics of charts by chart kind."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._charts: dict[str, dict] = {}
+
+    def record(self, kind: str, stats: RenderStats) -> None:
+        with self._lock:
+            chart = self._charts.setdefault(
+                kind, {"renders": 0, "total_seconds": 0.0, "max_seconds": 0.0, "max_peak_memory": None}
+            )
+            chart["renders"] += 1
+            chart["total_seconds"] += stats.seconds
+            chart["max_seconds"] = max(chart["max_seconds"], stats.seconds)
+            if stats.peak_memory is not None:
+                chart["max_peak_memory"] = max(chart["max_peak_memory"] or 0, stats.peak_memory)
+            chart["last"] = asdict(stats)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                kind: chart | {"mean_seconds": chart["total_seconds"] / chart["renders"]}
+                for kind, chart in self._charts.items()
+            }
+
+
+chart_metrics = ChartMetrics()
+
+
+def render_chart(draw, preset: str = "default", trace_memory: bool = False) -> tuple[bytes, RenderStats]:
+    """Renders chart to PNG.
+
+    Args:
+        draw: function called with (fig, ax), draws chart on new Figure.
+        preset (str, optional): CHART_PRESETS key. Defaults to "default".
+        trace_memory (bool, optional): trace peak memory of render. Defaults to False.
+
+    Returns:
+        (tuple[bytes, RenderStats]): PNG and render statistics.
+    """
+    size = CHART_PRESETS[preset]
+    tracing = trace_memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    elif trace_memory:
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    with matplotlib.rc_context(CHART_STYLE):
+        fig = Figure(figsize=(size.width, size.height), dpi=size.dpi)
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        draw(fig, ax)
+        buf = BytesIO()
+        fig.savefig(buf, format="png", dpi=size.dpi)
+    width_px, height_px = canvas.get_width_height()
+    # Figure is not registered in pyplot, release artists and renderer right away
+    fig.clear()
+    del fig, canvas
+    seconds = time.perf_counter() - start
+    peak_memory = None
+    if trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1] + 4 * width_px * height_px
+    if tracing:
+        tracemalloc.stop()
+    png = buf.getvalue()
+    return png, RenderStats(seconds, peak_memory, len(png), width_px, height_px)
+
+
+def png_to_webp(png: bytes) -> bytes:
+    """Converts PNG chart to lossless WebP (flat colored charts compress better than in PNG)."""
+    buf = BytesIO()
+    with Image.open(BytesIO(png)) as image:
+        image.save(buf, format="WEBP", lossless=True)
+    return buf.getvalue()
+
+
+def axes_width(ax: Axes) -> int:
+    """Returns width of axes in pixels."""
+    return int(ax.get_window_extent().width)
+
+
+def linear_plot(data: pd.DataFrame, ax: Axes):
+    ax.plot(data["close"], color="#00ccff", linewidth=0.5)
+
+
+def rectangles(x: np.ndarray, width: float, bottom: np.ndarray, top: np.ndarray) -> np.ndarray:
+    """Returns (n, 4, 2) vertices of rectangles centered at x."""
+    left, right = x - width / 2, x + width / 2
+    return np.stack(
+        [np.column_stack(corner) for corner in ((left, bottom), (left, top), (right, top), (right, bottom))], axis=1
+    )
+
+
+def candle_stick_plot(data: pd.DataFrame, ax: Axes):
+    ax.figure.subplots_adjust(bottom=0.20)
+    ax.tick_params(axis="x", labelrotation=70, labelsize=6)
+    ax.tick_params(axis="y", labelsize=8)
+    up = (data["close"] >= data["open"]).to_numpy()
+    up_color = "#89ff00"
+    up_shadow_color = "#4CAE50"
+    down_color = "#ff005e"
+    down_shadow_color = "#9C2525"
+    # Candle widths are relative to spacing of bars (1 day for daily series)
+    x = mdates.date2num(data.index.values)
+    spacing = np.median(np.diff(x)) if len(x) > 1 else 1.0
+    bar_width = 0.5 * spacing
+    shadow_width = 0.2 * spacing
+    # Shadows (low - high) below bodies (open - close), one collection each instead of artist per bar
+    shadows = rectangles(x, shadow_width, data["low"].to_numpy(), data["high"].to_numpy())
+    bodies = rectangles(x, bar_width, data["open"].to_numpy(), data["close"].to_numpy())
+    ax.add_collection(
+        PolyCollection(shadows, facecolors=np.where(up, up_shadow_color, down_shadow_color), edgecolors="none")
+    )
+    ax.add_collection(PolyCollection(bodies, facecolors=np.where(up, up_color, down_color), edgecolors="none"))
+    ax.xaxis_date()
+    ax.autoscale_view()
+
+
+def plot_data(
+    plot_type: str,
+    data: pd.DataFrame,
+    meta: dict,
+    name: str,
+    frequency: str,
+    preset: str = "default",
+    trace_memory: bool = False,
+    downsample: bool = True,
+) -> tuple[bytes, RenderStats]:
+    """Plot charts based on stock market data.
+
+    When downsample is set, series is reduced to resolution of chart axes before plotting.
+    """
+
+    def draw(fig: Figure, ax: Axes):
+        if frequency not in ["daily", "weekly", "monthly"]:
+            fig.subplots_adjust(bottom=0.20)
+            ax.tick_params(axis="x", labelrotation=70, labelsize=6)
+        plotted = reduce_for_plot(plot_type, data, axes_width(ax)) if downsample else data
+        if plot_type == "linear":
+            linear_plot(plotted, ax)
+        elif plot_type == "candlestick":
+            candle_stick_plot(plotted, ax)
+        ax.set_xlabel("time", fontsize=12, labelpad=6, fontweight="bold")
+        ax.set_ylabel("value", fontsize=12, labelpad=6, fontweight="bold")
+        ax.set_title(f'{meta["2. Symbol"]} ({name})', fontsize=14, pad=12, fontweight="bold")
+
+    return render_chart(draw, preset, trace_memory)
+
+
+def plot_hurst_eponent(
+    intervals: list, data: list, preset: str = "default", trace_memory: bool = False
+) -> tuple[float, bytes, RenderStats]:
+    a, b = np.polyfit(np.log(intervals), np.log(data), 1)
+
+    def draw(fig: Figure, ax: Axes):
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.plot(intervals, data)
+        ax.plot(intervals, [np.exp(y) for y in [a * np.log(x) + b for x in intervals]])
+        ax.set_xlabel("Segment length (log)", fontsize=8, labelpad=6, fontweight="bold")
+        ax.set_ylabel("Mean standard deviation (log)", fontsize=8, labelpad=6, fontweight="bold")
+        ax.set_title(
+            "Mean standard deviation depending on segment length",
+            fontsize=9,
+            pad=12,
+            fontweight="bold",
+        )
+
+    plot, stats = render_chart(draw, preset, trace_memory)
+    return a, plot, stats
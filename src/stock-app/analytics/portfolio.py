@@ -0,0 +1,60 @@
+"""Module contains vectorized Value at Risk calculations for portfolio of many companies."""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+
+def returns_matrix(
+    portfolio_returns: dict[str, pd.Series],
+    date_from: datetime.date,
+    date_to: datetime.date,
+) -> pd.DataFrame:
+    """Aligns returns of portfolio items on days present for every symbol.
+
+    Args:
+        portfolio_returns (dict[str, pd.Series]): returns indexed by date for each symbol.
+        date_from (datetime.date): first day.
+        date_to (datetime.date): last day.
+
+    Returns:
+        (pd.DataFrame): returns matrix (days x symbols) sorted from the oldest day.
+    """
+    matrix = pd.concat(portfolio_returns, axis=1, join="inner").sort_index()
+    return matrix.loc[pd.Timestamp(date_from) : pd.Timestamp(date_to)]
+
+
+def portfolio_historical_var(
+    portfolio_with_data: dict,
+    confidence_level: float,
+    horizon_days: int,
+    date_from: datetime.date,
+    date_to: datetime.date,
+) -> float:
+    """Calculate Value at Risk of portfolio using historical simulation method.
+
+    Portfolio value for each day is one product of returns matrix and vector of positions.
+
+    Args:
+        portfolio_with_data (dict): symbol -> {"value": position value, "returns": pd.Series}.
+        confidence_level (float): VaR confidence level.
+        horizon_days (int): VaR horizon.
+        date_from (datetime.date): first day.
+        date_to (datetime.date): last day.
+
+    Returns:
+        (float): Value at Risk.
+    """
+    matrix = returns_matrix(
+        {symbol: symbol_data["returns"] for symbol, symbol_data in portfolio_with_data.items()}, date_from, date_to
+    )
+    positions = np.array([portfolio_with_data[symbol]["value"] for symbol in matrix.columns], dtype=np.float64)
+    portfolio_values = matrix.to_numpy(dtype=np.float64) @ positions
+
+    sorted_portfolio_values = np.sort(portfolio_values)
+    percentile = 1 - confidence_level
+    percentile_sample_index = int(percentile * len(sorted_portfolio_values))
+    worst_portfolio_value = sorted_portfolio_values[percentile_sample_index]
+    current_portfolio_value = positions.sum()
+    var = (current_portfolio_value - worst_portfolio_value) * np.sqrt(horizon_days)
+    return var
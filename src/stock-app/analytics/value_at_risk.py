@@ -0,0 +1,102 @@
+"""Module contains returns and Value at Risk calculations for single company."""
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+
+def calculate_returns(data: pd.Series) -> pd.Series:
+    """Calculate normalized returns."""
+    returns = data / data.shift(-1)
+    returns = returns.dropna()
+    return returns
+
+
+def calculate_log_returns(data: pd.Series) -> pd.Series:
+    """Calculate normalized log returns."""
+    returns = np.log(data / data.shift(-1))
+    returns = returns.dropna()
+    return returns
+
+
+def historical_simulation_var(
+    returns: pd.Series,
+    confidence_level: float,
+    portfolio_value: int | float,
+    historical_days: int,
+    horizon_days: int,
+) -> float:
+    """Calculate Value at Risk using historical simulation method."""
+    first_return = max(len(returns) - historical_days, 0)
+    returns_subset: pd.Series = returns[first_return:]
+    sorted_returns = np.sort(returns_subset)
+    percentile = 1 - confidence_level
+    percentile_sample_index = int(percentile * len(sorted_returns))
+    worst_portfolio_value = sorted_returns[percentile_sample_index] * portfolio_value
+    var = (portfolio_value - worst_portfolio_value) * np.sqrt(horizon_days)
+    return var
+
+
+def linear_model_var(
+    returns: pd.Series,
+    confidence_level: float,
+    portfolio_value: int | float,
+    historical_days: int,
+    horizon_days: int,
+) -> float:
+    """Calculate Value at Risk using linear model simulation."""
+    first_return = max(len(returns) - historical_days, 0)
+    returns_subset: pd.Series = returns[first_return:]
+    # Standard deviation is the statistical measure of market volatility
+    std_dev = np.std(returns_subset)
+    standard_score = norm.ppf(confidence_level)
+    var = standard_score * std_dev * portfolio_value * np.sqrt(horizon_days)
+    return var
+
+
+def monte_carlo_var(
+    returns: pd.Series,
+    confidence_level: float,
+    portfolio_value: int | float,
+    historical_days: int,
+    horizon_days: int,
+    number_of_samples: int = 5000,
+) -> float:
+    """Calculate Value at Risk using monte carlo simulation."""
+    first_return = max(len(returns) - historical_days, 0)
+    returns_subset: pd.Series = returns[first_return:]
+    std_dev = np.std(returns_subset)
+    # loc=Mean(center), scale=Std(Spread/Width)
+    norm_distribution_samples = np.random.normal(loc=0, scale=std_dev, size=number_of_samples)
+    sorted_norm_distribution_samples = np.sort(norm_distribution_samples)
+    percentile = 1 - confidence_level
+    percentile_sample_index = int(percentile * len(sorted_norm_distribution_samples))
+    one_day_var = portfolio_value * sorted_norm_distribution_samples[percentile_sample_index]
+    var = abs(one_day_var * np.sqrt(horizon_days))
+    return var
+
+
+def calculate_value_at_risk(
+    var_type: str,
+    data: pd.DataFrame,
+    confidence_level: float,
+    portfolio_value: int | float,
+    historical_days: int,
+    horizon_days: int,
+):
+    """Calcualte Value at Risk."""
+    data = data["close"]
+    returns = calculate_returns(data)
+
+    if var_type == "historical":
+        var = historical_simulation_var(returns, confidence_level, portfolio_value, historical_days, horizon_days)
+    if var_type == "linear_model":
+        var = linear_model_var(returns, confidence_level, portfolio_value, historical_days, horizon_days)
+    if var_type == "monte_carlo":
+        var = monte_carlo_var(returns, confidence_level, portfolio_value, historical_days, horizon_days)
+
+    res = "The VaR at the %.2f confidence level and portfolio value %.2f is %.2f" % (
+        confidence_level,
+        portfolio_value,
+        var,
+    )
+    return var
@@ -0,0 +1,114 @@
+"""Module contains analytics worker process loop and shared memory transport of series.
+
+Worker imports pandas, scipy and matplotlib once at start, then runs jobs received through a pipe.
+DataFrames are passed as SharedFrame descriptors, so worker reads series directly from shared
+memory block instead of unpickling a copy of it.
+"""
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+
+class SharedFrame:
+    """Descriptor of DataFrame (DatetimeIndex, float64 columns) copied into shared memory block.
+
+    Block holds int64 epoch (ns) index followed by (rows x columns) float64 values.
+    """
+
+    def __init__(self, name: str, rows: int, columns: list, index_name: str | None):
+        self.name = name
+        self.rows = rows
+        self.columns = columns
+        self.index_name = index_name
+
+    @staticmethod
+    def supports(data) -> bool:
+        return (
+            isinstance(data, pd.DataFrame)
+            and isinstance(data.index, pd.DatetimeIndex)
+            and data.index.tz is None
+            and len(data.columns) > 0
+            and all(dtype == np.float64 for dtype in data.dtypes)
+        )
+
+    @classmethod
+    def create(cls, data: pd.DataFrame) -> tuple["SharedFrame", SharedMemory]:
+        """Copies data into new shared memory block, caller is responsible for unlinking it."""
+        rows, width = len(data), len(data.columns)
+        shm = SharedMemory(create=True, size=max(8 * rows * (width + 1), 1))
+        frame = cls(shm.name, rows, list(data.columns), data.index.name)
+        index, values = frame._arrays(shm)
+        index[:] = data.index.values.view(np.int64)
+        values[:] = data.to_numpy(dtype=np.float64)
+        return frame, shm
+
+    def open(self) -> tuple[pd.DataFrame, SharedMemory]:
+        """Attaches to shared memory block and returns read-only DataFrame built on it."""
+        shm = SharedMemory(name=self.name)
+        index, values = self._arrays(shm)
+        values.flags.writeable = False
+        data = pd.DataFrame(
+            values,
+            index=pd.DatetimeIndex(index.view("datetime64[ns]"), name=self.index_name),
+            columns=self.columns,
+            copy=False,
+        )
+        return data, shm
+
+    def _arrays(self, shm: SharedMemory) -> tuple[np.ndarray, np.ndarray]:
+        width = len(self.columns)
+        index = np.ndarray((self.rows,), dtype=np.int64, buffer=shm.buf)
+        values = np.ndarray((self.rows, width), dtype=np.float64, buffer=shm.buf, offset=8 * self.rows)
+        return index, values
+
+
+def warm_up() -> None:
+    """Imports heavy libraries used by analytics jobs."""
+    import matplotlib.backends.backend_agg  # noqa: F401
+    import matplotlib.figure  # noqa: F401
+    import scipy.stats  # noqa: F401
+
+    import analytics.hurst  # noqa: F401
+    import analytics.plots  # noqa: F401
+    import analytics.portfolio  # noqa: F401
+    import analytics.value_at_risk  # noqa: F401
+
+
+def worker_main(conn: Connection) -> None:
+    """Worker process loop, receives (func, args, kwargs) jobs until None is received."""
+    warm_up()
+    conn.send("ready")
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        func, args, kwargs = job
+        blocks = []
+        try:
+            args = [open_shared(arg, blocks) for arg in args]
+            response = ("ok", func(*args, **kwargs))
+        except Exception as error:  # pylint: disable=broad-except
+            response = ("error", error)
+        del args
+        try:
+            conn.send(response)
+        except Exception as error:  # pylint: disable=broad-except
+            # Result or exception could not be pickled
+            conn.send(("error", RuntimeError(repr(error))))
+        for shm in blocks:
+            try:
+                shm.close()
+            except BufferError:
+                # Views of the block are still referenced, mapping is released with them
+                pass
+    conn.close()
+
+
+def open_shared(arg, blocks: list):
+    if isinstance(arg, SharedFrame):
+        data, shm = arg.open()
+        blocks.append(shm)
+        return data
+    return arg
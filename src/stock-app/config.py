@@ -15,15 +15,100 @@ class Settings(BaseSettings):
 
     DATABASE_URL: str
     MONGO_INITDB_DATABASE: str
+    # Connection pool of database client, minimal pool is opened at startup
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 4
+    MONGO_MAX_IDLE_TIME_MS: int | None = 5 * 60 * 1000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    # Wire protocol compression ("zlib", "snappy" and "zstd" need python-snappy and zstandard packages)
+    MONGO_COMPRESSORS: list[str] = []
 
     # JWT access token
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # bcrypt work factor (hashes with other cost are rehashed on login), hashing threads and waiting jobs limit
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
     CLIENT_ORIGIN: str
 
+    # Source of prices, "alpha_vantage" api or "files" (MARKET_DATA_DIR/<interval>/<SYMBOL>.csv or .parquet),
+    # company names searched by symbol search are read from MARKET_DATA_DIR/listing.csv (LISTING_STATUS csv),
+    # without it only tickers are searched
+    MARKET_DATA_PROVIDER: str = "alpha_vantage"
+    MARKET_DATA_DIR: str = "../../data/market"
+
     ALPHA_VANTAGE_API_KEY: str
+    ALPHA_VANTAGE_URL: str = "https://www.alphavantage.co/query"
+    # Api quota (0 - no limit) and number of series downloaded at once
+    ALPHA_VANTAGE_CALLS_PER_MINUTE: int = 5
+    MARKET_DATA_CONCURRENCY: int = 4
+    # Maximal number of analyses in one batch request
+    STOCK_BATCH_MAX_ITEMS: int = 50
+    # Shared HTTP client of market data api, connection pool, timeouts (seconds) and retries of failed requests
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30
+    HTTP_TIMEOUT: float = 30
+    HTTP_CONNECT_TIMEOUT: float = 5
+    HTTP_RETRIES: int = 3
+    HTTP_RETRY_BACKOFF: float = 0.5
+    # Retry-After (seconds) of 503 response when market data api is unavailable after all retries
+    MARKET_DATA_RETRY_AFTER: int = 60
+
+    # Cache of time series retrieved from Alpha Vantage, TTL in seconds per interval
+    STOCK_CACHE_TTL: dict[str, int] = {
+        "1min": 60,
+        "5min": 300,
+        "15min": 900,
+        "30min": 1800,
+        "60min": 3600,
+        "daily": 3600,
+        "weekly": 86400,
+        "monthly": 86400,
+    }
+    STOCK_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    # Disk tier of the cache, used only without PRICE_STORE_DIR (price store persists series then)
+    STOCK_CACHE_DIR: str | None = None
+    # Refresh expired series with outputsize="compact" when it covers the gap
+    STOCK_INCREMENTAL_REFRESH: bool = True
+
+    # Listing file of local symbol index (downloaded when missing, None - remote search only)
+    # and lifetime of cached remote search results in seconds
+    SYMBOL_LISTING_FILE: str | None = "../../data/listing_status.csv"
+    SYMBOL_SEARCH_CACHE_TTL: int = 24 * 60 * 60
+
+    # Thread pool for blocking network calls, process pool for analytics and plotting
+    IO_EXECUTOR_WORKERS: int = 16
+    CPU_EXECUTOR_WORKERS: int = 2
+    # Analytics job timeout in seconds, worker running longer job is restarted
+    ANALYTICS_JOB_TIMEOUT: float = 120
+
+    # Cache of logged in user identities in seconds (0 - disabled)
+    USER_IDENTITY_CACHE_TTL: float = 30
+
+    # Background analysis jobs, number of jobs run at the same time and result TTL in seconds
+    ANALYSIS_JOB_SLOTS: int = 4
+    ANALYSIS_JOB_TTL: int = 24 * 60 * 60
+
+    # Columnar on-disk store of OHLCV series (None - series are filtered in memory)
+    PRICE_STORE_DIR: str | None = "../../data/prices"
+
+    # Chart size/resolution preset (analytics.plots.CHART_PRESETS) and peak memory tracing of renders
+    CHART_PRESET: str = "default"
+    CHART_TRACE_MEMORY: bool = False
+    # Reduce plotted series to resolution of chart (LTTB for line, OHLC buckets for candlestick charts)
+    CHART_DOWNSAMPLE: bool = True
+    # Cache of rendered charts, memory tier and optional disk tier (None - memory only) caps in bytes
+    CHART_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CHART_CACHE_DIR: str | None = "../../data/charts"
+    CHART_CACHE_DISK_MAX_BYTES: int = 1024 * 1024 * 1024
+
+    # Hurst exponent, number of log-spaced segment lengths (None - every length)
+    HURST_SEGMENT_LENGTHS: int | None = 50
 
     class Config:
         env_file = "../../.env"
@@ -0,0 +1,67 @@
+"""Module contins CURD database requests for Analysis collection (analysis history of users)."""
+import datetime
+
+import bson
+import pymongo
+from fastapi.exceptions import HTTPException
+
+from crud.pagination import decode_cursor, encode_cursor
+from database import Analysis
+
+
+async def ensure_indexes() -> None:
+    # History of user is read newest first
+    await Analysis.create_index([("user_id", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING)])
+
+
+async def create_analysis(user_id: str, analysis: dict) -> dict:
+    """Inserts analysis run (request and result without chart images) of user."""
+    analysis = analysis | {"user_id": bson.ObjectId(user_id), "created_at": datetime.datetime.utcnow()}
+    new_analysis = await Analysis.insert_one(analysis)
+    analysis["_id"] = str(new_analysis.inserted_id)
+    analysis["user_id"] = user_id
+    return analysis
+
+
+async def create_analyses(user_id: str, analyses: list[dict]) -> None:
+    """Inserts analysis runs of user with one database request."""
+    if not analyses:
+        return
+    created_at = datetime.datetime.utcnow()
+    await Analysis.insert_many(
+        [analysis | {"user_id": bson.ObjectId(user_id), "created_at": created_at} for analysis in analyses]
+    )
+
+
+async def get_analyses(user_id: str, limit: int = 20, cursor: str | None = None) -> tuple[list[dict], str | None]:
+    """Returns page of user's analyses, newest first, and cursor of the next page (None on last page).
+
+    Pages are selected by (created_at, _id) of the last analysis of previous page, not by skipping.
+    """
+    query = {"user_id": bson.ObjectId(user_id)}
+    if cursor is not None:
+        try:
+            created_at, analysis_id = decode_cursor(cursor)
+            created_at = datetime.datetime.fromisoformat(created_at)
+            analysis_id = bson.ObjectId(analysis_id)
+        except (ValueError, TypeError, bson.errors.InvalidId):
+            raise HTTPException(status_code=400, detail=f"Passed invalid cursor: {cursor}.")
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": analysis_id}},
+        ]
+    analyses = (
+        await Analysis.find(query)
+        .sort([("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)])
+        .limit(limit + 1)
+        .to_list(limit + 1)
+    )
+    next_cursor = None
+    if len(analyses) > limit:
+        analyses = analyses[:limit]
+        last = analyses[-1]
+        next_cursor = encode_cursor([last["created_at"].isoformat(), str(last["_id"])])
+    for doc in analyses:
+        doc["_id"] = str(doc["_id"])
+        doc["user_id"] = str(doc["user_id"])
+    return analyses, next_cursor
@@ -0,0 +1,29 @@
+"""Module contins CURD database requests for Chart collection (charts referenced by analysis history).
+
+Charts are content-addressed (chart_key), so stored chart of a key never changes.
+"""
+import bson
+import pymongo
+
+from database import Chart
+
+
+async def save_charts(charts: dict[str, tuple[bytes, dict]]) -> None:
+    """Stores (png, meta) charts by key, already stored charts are not written again."""
+    if not charts:
+        return
+    await Chart.bulk_write(
+        [
+            pymongo.UpdateOne({"_id": key}, {"$setOnInsert": {"png": bson.Binary(png), "meta": meta}}, upsert=True)
+            for key, (png, meta) in charts.items()
+        ],
+        ordered=False,
+    )
+
+
+async def get_chart(key: str) -> tuple[bytes, dict] | None:
+    """Returns (png, meta) of stored chart or None."""
+    chart = await Chart.find_one({"_id": key})
+    if chart is None:
+        return None
+    return bytes(chart["png"]), chart["meta"]
@@ -0,0 +1,55 @@
+"""Module contins CURD database requests for Job collection (background analyses)."""
+import datetime
+
+import bson
+from fastapi.exceptions import HTTPException
+
+from config import settings
+from database import Job
+
+
+async def ensure_indexes() -> None:
+    # Finished and abandoned jobs are removed by MongoDB after ANALYSIS_JOB_TTL seconds
+    await Job.create_index("created_at", expireAfterSeconds=settings.ANALYSIS_JOB_TTL)
+
+
+async def create_job(request: dict, user_id: str | None = None) -> dict:
+    """Inserts queued job of request, job of logged in user (user_id) is visible to that user only."""
+    now = datetime.datetime.utcnow()
+    job = {
+        "user_id": bson.ObjectId(user_id) if user_id else None,
+        "status": "queued",
+        "stage": "queued",
+        "progress": 0.0,
+        "request": request,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    new_job = await Job.insert_one(job)
+    job["_id"] = str(new_job.inserted_id)
+    job["user_id"] = user_id
+    return job
+
+
+async def update_job(job_id: str, job: dict) -> None:
+    job["updated_at"] = datetime.datetime.utcnow()
+    await Job.update_one({"_id": bson.ObjectId(job_id)}, {"$set": job})
+
+
+async def get_job(job_id: str, user_id: str | None = None, with_result: bool = True) -> dict:
+    """Returns job, jobs of other users than user_id (logged in user or None) are not found."""
+    projection = None if with_result else {"result": False, "request": False}
+    try:
+        job = await Job.find_one({"_id": bson.ObjectId(job_id)}, projection)
+    except bson.errors.InvalidId:
+        raise HTTPException(status_code=400, detail=f"Passed invalid id: {job_id}.")
+    if job and job.get("user_id") is not None and str(job["user_id"]) != user_id:
+        job = None
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job with id: {job_id} not found.")
+    job["_id"] = str(job["_id"])
+    if job.get("user_id") is not None:
+        job["user_id"] = str(job["user_id"])
+    return job
@@ -0,0 +1,25 @@
+"""Module contains opaque cursors used in keyset pagination of collections."""
+import base64
+import json
+
+from fastapi.exceptions import HTTPException
+
+
+def encode_cursor(values: list) -> str:
+    """Encodes sort key values of the last returned document (JSON serializable) into opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Decodes cursor created by encode_cursor.
+
+    Raises:
+        HTTPException: cursor is malformed.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeEncodeError):
+        raise HTTPException(status_code=400, detail=f"Passed invalid cursor: {cursor}.")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=400, detail=f"Passed invalid cursor: {cursor}.")
+    return values
@@ -1,20 +1,124 @@
 """Module contins CURD database requests for User collection."""
+import threading
+import time
+
 import pymongo
 import bson
 from fastapi.exceptions import HTTPException
 
 import security as security
+from config import settings
+from crud.pagination import decode_cursor, encode_cursor
 from database import User
 from schemas.user import UserUpdate, UserCreate
 
+# Fields needed to identify logged in user (no password hash and analysis history)
+IDENTITY_PROJECTION = {"email": True, "name": True, "is_active": True, "is_superuser": True}
+# Fields returned after update
+USER_PROJECTION = {"password": False, "analysis_history": False}
+
+
+class IdentityCache:
+    """In-process cache of user identities keyed by email (subject of access token).
+
+    Entries expire after ttl seconds (0 - cache disabled), so changes made by other processes
+    are visible after at most ttl. Entries of updated or deleted users are invalidated at once.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[str, tuple[float, dict]] = {}
+        # Emails of cached identities of user id, used to invalidate entries of user
+        self._emails: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, email: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, email: str, identity: dict) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if len(self._entries) >= self.max_entries:
+                self._entries = {key: entry for key, entry in self._entries.items() if entry[0] >= now}
+                self._emails = {}
+                for key, entry in self._entries.items():
+                    self._emails.setdefault(entry[1]["_id"], set()).add(key)
+            if len(self._entries) < self.max_entries:
+                self._entries[email] = (now + self.ttl, dict(identity))
+                self._emails.setdefault(identity["_id"], set()).add(email)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            for email in self._emails.pop(user_id, ()):
+                entry = self._entries.get(email)
+                if entry is not None and entry[1]["_id"] == user_id:
+                    del self._entries[email]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._emails.clear()
+
+
+identity_cache = IdentityCache(settings.USER_IDENTITY_CACHE_TTL)
 
-async def get_users(skip: int = 0, limit: int = 100) -> list[dict]:
-    users = await User.find(limit=limit, skip=skip).to_list(limit)
-    if not users:
+
+async def ensure_indexes() -> None:
+    await User.create_index("email", unique=True)
+
+
+def after_cursor_query(cursor: str | None) -> dict:
+    """Returns query selecting users after _id encoded in cursor."""
+    if cursor is None:
+        return {}
+    try:
+        (user_id,) = decode_cursor(cursor)
+        return {"_id": {"$gt": bson.ObjectId(user_id)}}
+    except (ValueError, TypeError, bson.errors.InvalidId):
+        raise HTTPException(status_code=400, detail=f"Passed invalid cursor: {cursor}.")
+
+
+async def get_users(skip: int = 0, limit: int = 100, cursor: str | None = None) -> tuple[list[dict], str | None]:
+    """Returns page of users ordered by _id (without password and analysis history) and cursor of the next page.
+
+    Pages are selected by _id of the last user of previous page (cursor), skip is kept for
+    previous clients only, as skipped documents are still scanned by database.
+    """
+    users = (
+        await User.find(after_cursor_query(cursor), USER_PROJECTION, skip=skip)
+        .sort("_id", pymongo.ASCENDING)
+        .limit(limit + 1)
+        .to_list(limit + 1)
+    )
+    if not users and cursor is None:
         raise HTTPException(status_code=404, detail="Users not found.")
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor([str(users[-1]["_id"])])
     for doc in users:
         doc["_id"] = str(doc["_id"])
-    return users
+    return users, next_cursor
+
+
+async def stream_users(cursor: str | None = None, batch_size: int = 500):
+    """Yields all users (without password and analysis history) ordered by _id, batch_size at a time."""
+    async for doc in User.find(after_cursor_query(cursor), USER_PROJECTION).sort("_id", pymongo.ASCENDING).batch_size(
+        batch_size
+    ):
+        doc["_id"] = str(doc["_id"])
+        yield doc
 
 
 async def get_user_by_id(user_id: str) -> dict:
@@ -42,23 +146,93 @@ async def get_user_by_email(user_email: str) -> dict:
     return user
 
 
+async def get_user_identity(user_email: str) -> dict | None:
+    """Returns identity fields (_id, email, name, is_active, is_superuser) of user or None."""
+    if (identity := identity_cache.get(user_email)) is not None:
+        return identity
+    user = await User.find_one({"email": user_email}, IDENTITY_PROJECTION)
+    if not user:
+        return None
+    user["_id"] = str(user["_id"])
+    identity_cache.put(user_email, user)
+    return user
+
+
 async def update_user(user_id: str, user: UserUpdate) -> dict:
+    """Updates user and returns updated document (without password and analysis history)."""
     # remove None values from user
-    user = {k: v for k, v in user.items() if v is not None}
-    update_result = await User.update_one({"_id": user_id}, {"$set": user})
-    if update_result.modified_count == 1:
-        user = await User.find_one({"_id": user_id})
-        if (updated_student := await User.find_one({"_id": user_id})) is not None:
-            updated_student["_id"] = str(updated_student["_id"])
-            return updated_student
-    if (existing_student := await User.find_one({"_id": user_id})) is not None:
-        existing_student["_id"] = str(existing_student["_id"])
-        return existing_student
-    raise HTTPException(status_code=404, detail=f"User with id: {user_id} not found.")
+    user = {k: v for k, v in user.items() if v is not None and k != "_id"}
+    try:
+        query = {"_id": bson.ObjectId(user_id)}
+    except bson.errors.InvalidId:
+        raise HTTPException(status_code=400, detail=f"Passed invalid id: {user_id}.")
+    identity_cache.invalidate(user_id)
+    try:
+        updated_user = await User.find_one_and_update(
+            query, {"$set": user}, projection=USER_PROJECTION, return_document=pymongo.ReturnDocument.AFTER
+        )
+    except pymongo.errors.DuplicateKeyError:
+        raise HTTPException(status_code=409, detail=f"User with such email: {user.get('email')} already exists.")
+    finally:
+        # Identity loaded while update was running is the old one
+        identity_cache.invalidate(user_id)
+    if not updated_user:
+        raise HTTPException(status_code=404, detail=f"User with id: {user_id} not found.")
+    updated_user["_id"] = str(updated_user["_id"])
+    return updated_user
+
+
+async def update_users(updates: list[tuple[str, dict]]) -> dict:
+    """Applies (user_id, fields) updates in one unordered bulk write.
+
+    Raises:
+        HTTPException: invalid ids (400) or updates which could not be written, e.g. duplicate email (409),
+            other updates are written.
+
+    Returns:
+        (dict): number of matched and modified users.
+    """
+    operations = []
+    invalid_ids = []
+    for user_id, user in updates:
+        try:
+            query = {"_id": bson.ObjectId(user_id)}
+        except bson.errors.InvalidId:
+            invalid_ids.append(user_id)
+            continue
+        user = {k: v for k, v in user.items() if v is not None and k != "_id"}
+        operations.append(pymongo.UpdateOne(query, {"$set": user}))
+    if invalid_ids:
+        raise HTTPException(status_code=400, detail=f"Passed invalid ids: {', '.join(invalid_ids)}.")
+    if not operations:
+        return {"matched": 0, "modified": 0}
+    try:
+        result = await User.bulk_write(operations, ordered=False)
+    except pymongo.errors.BulkWriteError as error:
+        write_errors = error.details.get("writeErrors", [])
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": "Users could not be updated, e.g. user with such email already exists.",
+                "indexes": [write_error["index"] for write_error in write_errors],
+                "matched": error.details.get("nMatched", 0),
+                "modified": error.details.get("nModified", 0),
+            },
+        )
+    finally:
+        # Identities of users are invalidated after write, lookups during write load old documents
+        for user_id, _ in updates:
+            identity_cache.invalidate(user_id)
+    return {"matched": result.matched_count, "modified": result.modified_count}
+
+
+async def update_password_hash(user_id: str, password_hash: str) -> None:
+    """Replaces password hash of user (rehashed with current bcrypt cost), identity is not affected."""
+    await User.update_one({"_id": bson.ObjectId(user_id)}, {"$set": {"password": password_hash}})
 
 
 async def create_user(user: UserCreate) -> dict:
-    user["password"] = security.get_password_hash(user["password"])
+    user["password"] = await security.get_password_hash(user["password"])
     try:
         # returns pymongo.results.InsertOneResult (contain only _id)
         new_user = await User.insert_one(user)
@@ -74,6 +248,7 @@ async def create_user(user: UserCreate) -> dict:
 
 async def delete_user(user_id: str) -> dict:
     user = await User.find_one_and_delete({"_id": bson.ObjectId(user_id)})
+    identity_cache.invalidate(user_id)
     if not user:
         raise HTTPException(status_code=404, detail=f"User with id: {user_id} not found.")
     user["_id"] = str(user["_id"])
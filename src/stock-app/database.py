@@ -1,12 +1,122 @@
-"""Module contains database connection."""
+"""Module contains database connection.
+
+Client is created at import with connect=False, so no connections (and no monitoring threads) are
+opened until connect is awaited in app startup, which also fills the pool up to minPoolSize.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 
 from config import settings
 
 
-client = AsyncIOMotorClient(settings.DATABASE_URL)
-print("Connected to MongoDB...")
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Counts connection pool events per server, used for capacity planning of pool size."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers: dict[str, dict] = defaultdict(
+            lambda: {
+                "open": 0,
+                "checked_out": 0,
+                "max_checked_out": 0,
+                "created": 0,
+                "closed": 0,
+                "check_outs": 0,
+                "check_out_failures": 0,
+                "pool_cleared": 0,
+            }
+        )
+
+    def _update(self, event, **changes) -> None:
+        with self._lock:
+            server = self._servers[f"{event.address[0]}:{event.address[1]}"]
+            for name, change in changes.items():
+                server[name] += change
+            server["max_checked_out"] = max(server["max_checked_out"], server["checked_out"])
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._update(event, pool_cleared=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._update(event, open=1, created=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event, open=-1, closed=1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._update(event, check_out_failures=1)
+
+    def connection_checked_out(self, event):
+        self._update(event, checked_out=1, check_outs=1)
+
+    def connection_checked_in(self, event):
+        self._update(event, checked_out=-1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            servers = {address: dict(server) for address, server in self._servers.items()}
+        return {
+            "max_pool_size": settings.MONGO_MAX_POOL_SIZE,
+            "min_pool_size": settings.MONGO_MIN_POOL_SIZE,
+            "servers": {
+                address: server | {"utilization": server["checked_out"] / settings.MONGO_MAX_POOL_SIZE}
+                for address, server in servers.items()
+            },
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+def create_client() -> AsyncIOMotorClient:
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    }
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = ",".join(settings.MONGO_COMPRESSORS)
+    return AsyncIOMotorClient(settings.DATABASE_URL, connect=False, event_listeners=[pool_metrics], **options)
+
+
+client = create_client()
 
 db = client[settings.MONGO_INITDB_DATABASE]
 
 User = db.users
+Job = db.jobs
+Analysis = db.analyses
+Chart = db.charts
+
+
+async def connect() -> None:
+    """Selects server and opens minPoolSize connections (at least one), so first requests do not wait for them.
+
+    Raises pymongo.errors.ServerSelectionTimeoutError when database is not available.
+    """
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(max(settings.MONGO_MIN_POOL_SIZE, 1))))
+    print("Connected to MongoDB...")
+
+
+def close() -> None:
+    client.close()
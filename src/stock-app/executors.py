@@ -0,0 +1,340 @@
+"""Module contains executors used to run blocking work outside of asyncio event loop.
+
+io_executor (threads) runs blocking network calls (market data api), password_executor
+(threads) runs bcrypt password hashing and verification, cpu_executor
+(analytics worker farm) runs CPU-bound analytics and chart rendering in separate processes,
+so they do not hold the GIL of the worker serving requests.
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import struct
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from multiprocessing.reduction import ForkingPickler
+
+from analytics.worker import SharedFrame, worker_main
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Delay before next attempt to start worker when replacement of worker failed (in seconds)
+RESTART_RETRY_DELAY = 1.0
+# Maximal chunk of worker message read at once
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class MeteredExecutor:
+    """Wraps concurrent.futures executor, awaits submitted jobs and counts them."""
+
+    def __init__(self, name: str, executor: Executor, workers: int):
+        self.name = name
+        self.executor = executor
+        self.workers = workers
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.busy_seconds = 0.0
+
+    async def run(self, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) on executor and awaits its result."""
+        loop = asyncio.get_running_loop()
+        self.submitted += 1
+        self.in_flight += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        start = time.perf_counter()
+        try:
+            result = await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+        except BaseException:
+            self.failed += 1
+            raise
+        else:
+            self.completed += 1
+            return result
+        finally:
+            self.in_flight -= 1
+            self.busy_seconds += time.perf_counter() - start
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of submitted jobs waiting for free worker."""
+        return max(self.in_flight - self.workers, 0)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "busy_seconds": round(self.busy_seconds, 3),
+        }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+io_executor = MeteredExecutor(
+    "io",
+    ThreadPoolExecutor(max_workers=settings.IO_EXECUTOR_WORKERS, thread_name_prefix="io"),
+    settings.IO_EXECUTOR_WORKERS,
+)
+
+# Bounded thread pool for bcrypt, limits CPU spent hashing passwords during login bursts
+password_executor = MeteredExecutor(
+    "password",
+    ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password"),
+    settings.PASSWORD_HASH_WORKERS,
+)
+
+
+def message_header_size(buffer: bytearray) -> int:
+    """Returns size of length header of Connection message in buffer, 0 when header is incomplete."""
+    if len(buffer) < 4:
+        return 0
+    if struct.unpack("!i", buffer[:4])[0] == -1:
+        # Messages over 2 GiB have 8 bytes length after -1
+        return 12 if len(buffer) >= 12 else 0
+    return 4
+
+
+def message_remaining(buffer: bytearray) -> int:
+    """Returns number of bytes missing to complete Connection message (or its header) in buffer."""
+    header_size = message_header_size(buffer)
+    if not header_size:
+        return (12 if len(buffer) >= 4 else 4) - len(buffer)
+    size = struct.unpack("!Q", buffer[4:12])[0] if header_size == 12 else struct.unpack("!i", buffer[:4])[0]
+    return header_size + size - len(buffer)
+
+
+class AnalyticsWorker:
+    def __init__(self, process: multiprocessing.Process, conn: Connection):
+        self.process = process
+        self.conn = conn
+
+
+class AnalyticsFarm:
+    """Pool of pre-started analytics worker processes.
+
+    Workers are spawned (forking server process with running threads is not safe) and warmed up
+    with pandas, scipy and matplotlib imports before they accept jobs. DataFrame arguments are
+    passed through shared memory. Worker running a job which exceeds its timeout or whose caller
+    was cancelled is killed and replaced with a new one.
+    """
+
+    def __init__(self, name: str, workers: int, timeout: float):
+        self.name = name
+        self.workers = workers
+        self.timeout = timeout
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.restarts = 0
+        self.failed_restarts = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_queue_depth = 0
+        self.busy_seconds = 0.0
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: asyncio.Queue | None = None
+        self._workers: set[AnalyticsWorker] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Starts all workers and waits until they are warmed up."""
+        if self._idle is not None:
+            return
+        self._idle = asyncio.Queue()
+        await asyncio.gather(*[self._start_worker() for _ in range(self.workers)])
+
+    async def run(self, func, *args, job_timeout: float | None = None, **kwargs):
+        """Runs func(*args, **kwargs) on idle worker and awaits its result.
+
+        Raises:
+            asyncio.TimeoutError: job exceeded job_timeout (defaults to farm timeout).
+            RuntimeError: worker process died.
+        """
+        await self.start()
+        self.submitted += 1
+        self.waiting += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.waiting)
+        try:
+            worker = await self._idle.get()
+        finally:
+            self.waiting -= 1
+        blocks = []
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            try:
+                args = tuple(self._share(arg, blocks) for arg in args)
+                job = ForkingPickler.dumps((func, args, kwargs))
+            except Exception:
+                # Job could not be shared or pickled, worker did not receive it
+                self.failed += 1
+                self._idle.put_nowait(worker)
+                raise
+            try:
+                worker.conn.send_bytes(job)
+                status, result = await asyncio.wait_for(self._receive(worker.conn), job_timeout or self.timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                self._replace(worker)
+                raise
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                self._replace(worker)
+                raise
+            except (EOFError, OSError) as error:
+                self.failed += 1
+                self._replace(worker)
+                raise RuntimeError(f"Analytics worker died: {error!r}") from error
+            except Exception:
+                # Result could not be read (e.g. unpickled), state of worker connection is unknown
+                self.failed += 1
+                self._replace(worker)
+                raise
+        finally:
+            self.in_flight -= 1
+            self.busy_seconds += time.perf_counter() - start
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+        self._idle.put_nowait(worker)
+        if status == "error":
+            self.failed += 1
+            raise result
+        self.completed += 1
+        return result
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of submitted jobs waiting for idle worker."""
+        return self.waiting
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "alive": sum(worker.process.is_alive() for worker in self._workers),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+            "restarts": self.restarts,
+            "failed_restarts": self.failed_restarts,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "busy_seconds": round(self.busy_seconds, 3),
+        }
+
+    def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for worker in self._workers:
+            worker.process.kill()
+            worker.process.join()
+            worker.conn.close()
+        self._workers.clear()
+        self._idle = None
+
+    @staticmethod
+    def _share(arg, blocks: list):
+        if SharedFrame.supports(arg):
+            frame, shm = SharedFrame.create(arg)
+            blocks.append(shm)
+            return frame
+        return arg
+
+    @staticmethod
+    async def _receive(conn: Connection):
+        """Returns message sent by worker (Connection.send), message is read in chunks when pipe is readable,
+        so event loop does not wait for the whole message.
+        """
+        loop = asyncio.get_running_loop()
+        fd = conn.fileno()
+        received = loop.create_future()
+        buffer = bytearray()
+
+        def read() -> None:
+            if received.done():
+                return
+            try:
+                chunk = os.read(fd, min(message_remaining(buffer), READ_CHUNK_SIZE))
+                if not chunk:
+                    raise EOFError("connection closed by worker")
+                buffer.extend(chunk)
+                if message_remaining(buffer) == 0 and message_header_size(buffer):
+                    received.set_result(ForkingPickler.loads(buffer[message_header_size(buffer) :]))
+            except Exception as error:  # pylint: disable=broad-except
+                received.set_exception(error)
+
+        loop.add_reader(fd, read)
+        try:
+            return await received
+        finally:
+            loop.remove_reader(fd)
+
+    async def _start_worker(self) -> None:
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=worker_main, args=(child_conn,), name=f"{self.name}-worker", daemon=True)
+        process.start()
+        child_conn.close()
+        worker = AnalyticsWorker(process, conn)
+        self._workers.add(worker)
+        try:
+            # Worker sends "ready" after imports
+            await self._receive(conn)
+        except BaseException:
+            process.kill()
+            process.join()
+            conn.close()
+            self._workers.discard(worker)
+            raise
+        self._idle.put_nowait(worker)
+
+    def _replace(self, worker: AnalyticsWorker) -> None:
+        worker.process.kill()
+        worker.process.join()
+        worker.conn.close()
+        self._workers.discard(worker)
+        self.restarts += 1
+        self._restart()
+
+    def _restart(self) -> None:
+        if self._idle is None:
+            return
+        task = asyncio.get_running_loop().create_task(self._start_worker())
+        self._tasks.add(task)
+        task.add_done_callback(self._restarted)
+
+    def _restarted(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if task.cancelled() or task.exception() is None:
+            return
+        # Farm would shrink by failed worker, start is retried
+        self.failed_restarts += 1
+        logger.error("Restart of %s analytics worker failed", self.name, exc_info=task.exception())
+        asyncio.get_running_loop().call_later(RESTART_RETRY_DELAY, self._restart)
+
+
+cpu_executor = AnalyticsFarm("cpu", settings.CPU_EXECUTOR_WORKERS, settings.ANALYTICS_JOB_TIMEOUT)
+
+
+def executors_stats() -> dict:
+    return {executor.name: executor.stats() for executor in (io_executor, password_executor, cpu_executor)}
+
+
+def shutdown_executors() -> None:
+    for executor in (io_executor, password_executor, cpu_executor):
+        executor.shutdown()
@@ -0,0 +1,62 @@
+"""Module contains in-process queue of background analysis jobs."""
+import asyncio
+import traceback
+
+from config import settings
+
+
+class JobRunner:
+    """Runs submitted coroutine functions in background, at most `slots` at the same time."""
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.queued = 0
+        self.running = 0
+        self.finished = 0
+        self._semaphore: asyncio.Semaphore | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def submit(self, job, cancelled=None) -> asyncio.Task:
+        """Schedules job (coroutine function without arguments) and returns its task.
+
+        cancelled (coroutine function without arguments) is awaited when job is cancelled while
+        it is queued (job handles its own cancellation once started).
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.slots)
+        task = asyncio.get_running_loop().create_task(self._run(job, cancelled))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(self, job, cancelled=None) -> None:
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        except asyncio.CancelledError:
+            if cancelled is not None:
+                await cancelled()
+            raise
+        finally:
+            self.queued -= 1
+        self.running += 1
+        try:
+            await job()
+        except Exception:  # pylint: disable=broad-except
+            # Job stores its failure, background task has no caller to raise to
+            traceback.print_exc()
+        finally:
+            self.running -= 1
+            self.finished += 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {"slots": self.slots, "queued": self.queued, "running": self.running, "finished": self.finished}
+
+    async def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+job_runner = JobRunner(settings.ANALYSIS_JOB_SLOTS)
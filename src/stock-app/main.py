@@ -1,10 +1,18 @@
 """Module contains Fastapi app instance with applied configurations and routes."""
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 
+from analytics.plots import chart_metrics
+import database
 from config import settings
+from crud import analysis_crud, job_crud, user_crud
+from executors import cpu_executor, executors_stats, shutdown_executors
+from jobs import job_runner
 from routes import user, auth, stock_data
+from stock_api import load_symbol_index, market_data
 
 app = FastAPI()
 
@@ -27,6 +35,44 @@ app.include_router(auth.router, tags=["Auth"], prefix="/auth")
 app.include_router(stock_data.router, tags=["StockData"], prefix="/stock-data")
 
 
+@app.on_event("startup")
+async def startup():
+    await database.connect()
+    await user_crud.ensure_indexes()
+    await job_crud.ensure_indexes()
+    await analysis_crud.ensure_indexes()
+    await cpu_executor.start()
+    market_data.open()
+    # Listing may be downloaded, search uses remote api until index is loaded
+    app.state.symbol_index_task = asyncio.create_task(load_symbol_index())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await job_runner.shutdown()
+    await market_data.aclose()
+    shutdown_executors()
+    database.close()
+
+
+@app.get("/metrics/executors")
+async def get_executors_stats():
+    """Endpoint returns queue depth and job counters of thread and process pools."""
+    return executors_stats() | {"analysis_jobs": job_runner.stats()}
+
+
+@app.get("/metrics/database")
+async def get_database_stats():
+    """Endpoint returns open and checked out connections of database connection pool by server."""
+    return database.pool_metrics.stats()
+
+
+@app.get("/metrics/charts")
+async def get_charts_stats():
+    """Endpoint returns render time and peak memory of rendered charts by chart kind and chart cache counters."""
+    return chart_metrics.stats() | {"cache": stock_data.chart_cache.stats()}
+
+
 @app.get("/favicon.ico", include_in_schema=False)
 async def favicon():
     return FileResponse("../../favicon.png")
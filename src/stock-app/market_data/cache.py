@@ -0,0 +1,260 @@
+"""Module contains LRU cache of OHLCV series retrieved from Alpha Vantage api."""
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from io import StringIO
+
+import pandas as pd
+
+from market_data.providers import run_inline
+from market_data.refresh import compact_covers_gap, merge_bars
+from market_data.single_flight import SingleFlight
+from market_data.store import atomic_file, to_ohlcv
+
+
+@dataclass
+class CacheEntry:
+    data: pd.DataFrame
+    meta: dict
+    outputsize: str
+    fetched_at: float
+    size: int
+
+
+def frame_size(data: pd.DataFrame) -> int:
+    """Returns number of bytes used by DataFrame (with index)."""
+    return int(data.memory_usage(index=True, deep=True).sum())
+
+
+class SeriesCache:
+    """LRU cache of (data, meta) pairs keyed by (function, symbol, interval).
+
+    Entries expire after interval specific TTL, least recently used entries are evicted
+    when total size of cached frames exceeds max_bytes. When directory is given, entries
+    are also written to disk and loaded back after restart.
+    """
+
+    def __init__(self, ttl: dict[str, int], max_bytes: int, directory: str | None = None):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.refreshes = 0
+        self._entries: OrderedDict[tuple, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: tuple, outputsize: str = "full") -> tuple[pd.DataFrame, dict] | None:
+        """Returns copy of cached (data, meta) pair or None.
+
+        Entry fetched with outputsize="full" also serves "compact" requests.
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None and self._expired(key, entry):
+                self.expirations += 1
+                entry = None
+            if entry is None or not self._covers(entry, outputsize):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.data.copy(), dict(entry.meta)
+
+    def stale(self, key: tuple) -> CacheEntry | None:
+        """Returns cached entry regardless of its TTL, used to refresh expired series incrementally."""
+        with self._lock:
+            return self._lookup(key)
+
+    def put(self, key: tuple, data: pd.DataFrame, meta: dict, outputsize: str = "full") -> None:
+        """Stores copy of (data, meta) pair and evicts least recently used entries above memory cap."""
+        entry = CacheEntry(data.copy(), dict(meta), outputsize, time.time(), frame_size(data))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._insert(key, entry)
+            self._dump(key, entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "refreshes": self.refreshes,
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _lookup(self, key: tuple) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._load(key)
+            if entry is not None:
+                self._insert(key, entry)
+                self.disk_hits += 1
+        else:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _expired(self, key: tuple, entry: CacheEntry) -> bool:
+        _, _, interval = key
+        return time.time() - entry.fetched_at > self.ttl.get(interval, 0)
+
+    @staticmethod
+    def _covers(entry: CacheEntry, outputsize: str) -> bool:
+        return entry.outputsize == "full" or entry.outputsize == outputsize
+
+    def _insert(self, key: tuple, entry: CacheEntry) -> None:
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self.size += entry.size
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._entries.pop(key)
+        self.size -= entry.size
+
+    def _path(self, key: tuple) -> str:
+        name = "-".join(re.sub(r"[^A-Za-z0-9._]", "_", str(part)) for part in key)
+        return os.path.join(self.directory, f"{name}.json")
+
+    def _dump(self, key: tuple, entry: CacheEntry) -> None:
+        if not self.directory:
+            return
+        content = {
+            "meta": entry.meta,
+            "outputsize": entry.outputsize,
+            "fetched_at": entry.fetched_at,
+            "data": entry.data.to_json(orient="split", date_format="iso", date_unit="ns"),
+        }
+        path = self._path(key)
+        with atomic_file(path, "w") as file:
+            json.dump(content, file)
+
+    def _load(self, key: tuple) -> CacheEntry | None:
+        if not self.directory or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with open(self._path(key), encoding="utf-8") as file:
+                content = json.load(file)
+            data = pd.read_json(StringIO(content["data"]), orient="split", dtype=False, convert_dates=False)
+        except (OSError, ValueError, KeyError):
+            return None
+        data.index = pd.to_datetime(data.index)
+        data.index.name = "date"
+        return CacheEntry(data, content["meta"], content["outputsize"], content["fetched_at"], frame_size(data))
+
+
+class CachedTimeSeries:
+    """Wraps market data provider (TimeSeries methods returning (data, meta)) with SeriesCache.
+
+    With incremental refresh enabled, expired full series are updated with outputsize="compact"
+    download when it covers all bars published since the newest cached one. Series missing from
+    the cache (after restart or eviction) are refreshed from stored function result - OHLCV frame
+    of the key persisted elsewhere (price store) or None. Cache lookups (which read disk tier)
+    and stored calls are run with run coroutine function.
+
+    Concurrent cache misses of the same series await one download (full download in flight
+    also serves compact requests), downloaded frame is shared by them and must not be modified.
+    """
+
+    def __init__(self, ts, cache: SeriesCache, incremental: bool = True, run=run_inline, stored=None):
+        self.ts = ts
+        self.cache = cache
+        self.incremental = incremental
+        self.run = run
+        self.stored = stored
+        self.flights = SingleFlight()
+
+    async def get_daily(self, symbol: str, outputsize: str = "compact") -> tuple[pd.DataFrame, dict]:
+        return await self._fetch(
+            "get_daily", symbol, "daily", outputsize, self.ts.get_daily, {"outputsize": outputsize}
+        )
+
+    async def get_daily_adjusted(self, symbol: str, outputsize: str = "compact") -> tuple[pd.DataFrame, dict]:
+        return await self._fetch(
+            "get_daily_adjusted", symbol, "daily", outputsize, self.ts.get_daily_adjusted, {"outputsize": outputsize}
+        )
+
+    async def get_weekly(self, symbol: str) -> tuple[pd.DataFrame, dict]:
+        return await self._fetch("get_weekly", symbol, "weekly", "full", self.ts.get_weekly, {})
+
+    async def get_monthly(self, symbol: str) -> tuple[pd.DataFrame, dict]:
+        return await self._fetch("get_monthly", symbol, "monthly", "full", self.ts.get_monthly, {})
+
+    async def get_intraday(
+        self, symbol: str, interval: str = "15min", outputsize: str = "compact"
+    ) -> tuple[pd.DataFrame, dict]:
+        return await self._fetch(
+            "get_intraday",
+            symbol,
+            interval,
+            outputsize,
+            self.ts.get_intraday,
+            {"interval": interval, "outputsize": outputsize},
+        )
+
+    def __getattr__(self, name):
+        # Methods which are not cached are passed directly to the client
+        return getattr(self.ts, name)
+
+    async def _fetch(self, function: str, symbol: str, interval: str, outputsize: str, fetch, params: dict):
+        key = (function, symbol.upper(), interval)
+        cached = await self.run(self.cache.get, key, outputsize)
+        if cached is not None:
+            return cached
+        if outputsize == "compact" and self.flights.in_flight(key + ("full",)):
+            outputsize = "full"
+        data, meta = await self.flights.run(key + (outputsize,), self._download, key, outputsize, fetch, symbol, params)
+        return data, dict(meta)
+
+    async def _download(self, key: tuple, outputsize: str, fetch, symbol: str, params: dict):
+        if self.incremental and params.get("outputsize") == "full":
+            refreshed = await self._refresh(key, fetch, symbol, params)
+            if refreshed is not None:
+                return refreshed
+        data, meta = await fetch(symbol=symbol, **params)
+        await self.run(self.cache.put, key, data, meta, outputsize)
+        return data, meta
+
+    async def _refresh(self, key: tuple, fetch, symbol: str, params: dict) -> tuple[pd.DataFrame, dict] | None:
+        """Updates stale full series with the latest bars, returns None when full download is needed."""
+        _, _, interval = key
+        stale = await self.run(self.cache.stale, key)
+        cached = stale is not None and stale.outputsize == "full"
+        if cached:
+            stored = stale.data
+        elif self.stored is not None:
+            stored = await self.run(self.stored, key)
+        else:
+            stored = None
+        if stored is None or stored.empty or not compact_covers_gap(stored.index.max(), interval):
+            return None
+        new, meta = await fetch(symbol=symbol, **params | {"outputsize": "compact"})
+        # Stale cached series has columns of the api frame, stored one OHLCV columns
+        data = merge_bars(stored, new if cached else to_ohlcv(new))
+        if data is None:
+            return None
+        await self.run(self.cache.put, key, data, meta, "full")
+        self.cache.refreshes += 1
+        return data.copy(), dict(meta)
@@ -0,0 +1,197 @@
+"""Module contains Alpha Vantage api adapter built on shared pooled async HTTP client.
+
+All market data requests (time series, symbol search, listing) go through one httpx.AsyncClient,
+so TLS sessions and keep-alive connections are reused. Failed requests (connection errors,
+timeouts, 429 and 5xx responses and throttling messages returned with 200) are retried with
+exponential backoff.
+"""
+import asyncio
+import random
+
+import httpx
+import pandas as pd
+
+from market_data.providers import MarketDataProvider, run_inline
+from market_data.rate_limit import RateLimiter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# TimeSeries method -> api function and key of series in response
+TIME_SERIES_FUNCTIONS = {
+    "get_intraday": ("TIME_SERIES_INTRADAY", "Time Series ({interval})"),
+    "get_daily": ("TIME_SERIES_DAILY", "Time Series (Daily)"),
+    "get_daily_adjusted": ("TIME_SERIES_DAILY_ADJUSTED", "Time Series (Daily)"),
+    "get_weekly": ("TIME_SERIES_WEEKLY", "Weekly Time Series"),
+    "get_monthly": ("TIME_SERIES_MONTHLY", "Monthly Time Series"),
+}
+
+
+class RateLimitExceeded(Exception):
+    """Api answered with throttling message (200 response with "Note" or "Information"), call quota is exceeded."""
+
+
+def api_json(response: httpx.Response) -> dict:
+    """Returns json response of api.
+
+    Raises:
+        RateLimitExceeded: throttling message returned by api.
+        ValueError: error message (incorrect symbol) returned by api.
+    """
+    data = response.json()
+    if not data:
+        raise ValueError("Error getting data from the api, no return was given.")
+    if "Error Message" in data:
+        raise ValueError(data["Error Message"])
+    for key in ("Note", "Information"):
+        if key in data:
+            raise RateLimitExceeded(data[key])
+    return data
+
+
+def api_csv(response: httpx.Response) -> bytes:
+    """Returns csv response of api, api errors are returned as json.
+
+    Raises:
+        RateLimitExceeded: throttling message returned by api.
+        ValueError: error message returned by api.
+    """
+    if response.content.lstrip().startswith(b"{"):
+        api_json(response)
+    return response.content
+
+
+def series_frame(data: dict, series_key: str) -> pd.DataFrame:
+    """Returns series from api response as frame with float columns ("1. open", ...) and date index,
+    same as frame returned by alpha_vantage TimeSeries client with pandas output format.
+    """
+    frame = pd.DataFrame.from_dict(data[series_key], orient="index", dtype=float)
+    frame.index = pd.DatetimeIndex(frame.index, name="date")
+    return frame
+
+
+def retry_after(response: httpx.Response) -> float:
+    """Returns delay requested by Retry-After header (in seconds) or 0."""
+    try:
+        return float(response.headers.get("Retry-After", 0))
+    except ValueError:
+        return 0.0
+
+
+class AlphaVantageClient(MarketDataProvider):
+    """Async Alpha Vantage client with TimeSeries methods (get_daily, get_intraday, ...) returning (data, meta).
+
+    Args:
+        api_key (str): api key.
+        url (str): api url.
+        limits (httpx.Limits): connection pool size.
+        timeout (httpx.Timeout): request timeouts.
+        retries (int, optional): number of retries of failed request. Defaults to 3.
+        backoff (float, optional): delay before the first retry in seconds, doubled with every retry. Defaults to 0.5.
+        rate_limiter (RateLimiter | None, optional): limiter of api calls. Defaults to None.
+        run (optional): coroutine function running blocking parsing of responses. Defaults to run_inline.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        url: str,
+        limits: httpx.Limits,
+        timeout: httpx.Timeout,
+        retries: int = 3,
+        backoff: float = 0.5,
+        rate_limiter: RateLimiter | None = None,
+        run=run_inline,
+    ):
+        self.api_key = api_key
+        self.url = url
+        self.limits = limits
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.rate_limiter = rate_limiter
+        self.run = run
+        self.http: httpx.AsyncClient | None = None
+        self.requests = 0
+        self.retried = 0
+        self.failed = 0
+
+    def open(self) -> None:
+        """Creates HTTP client, called in app startup (requests open it when it was not)."""
+        if self.http is None:
+            self.http = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+
+    async def aclose(self) -> None:
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+
+    async def get_intraday(self, symbol: str, interval: str = "15min", outputsize: str = "compact"):
+        return await self._time_series("get_intraday", symbol=symbol, interval=interval, outputsize=outputsize)
+
+    async def get_daily(self, symbol: str, outputsize: str = "compact"):
+        return await self._time_series("get_daily", symbol=symbol, outputsize=outputsize)
+
+    async def get_daily_adjusted(self, symbol: str, outputsize: str = "compact"):
+        return await self._time_series("get_daily_adjusted", symbol=symbol, outputsize=outputsize)
+
+    async def get_weekly(self, symbol: str):
+        return await self._time_series("get_weekly", symbol=symbol)
+
+    async def get_monthly(self, symbol: str):
+        return await self._time_series("get_monthly", symbol=symbol)
+
+    async def symbol_search(self, keywords: str) -> list[dict]:
+        """Returns best matches ("1. symbol", "2. name", ...) of SYMBOL_SEARCH api."""
+        data = await self.get({"function": "SYMBOL_SEARCH", "keywords": keywords}, parse=api_json)
+        if "bestMatches" not in data:
+            raise ValueError("incorrect symbol value.")
+        return data["bestMatches"]
+
+    async def listing_status(self) -> bytes:
+        """Returns csv of active listings (LISTING_STATUS api)."""
+        return await self.get({"function": "LISTING_STATUS"}, parse=api_csv)
+
+    async def get(self, params: dict, parse=None):
+        """Sends api request, retries connection errors, timeouts, 429/5xx responses and throttling
+        messages with backoff.
+
+        Args:
+            params (dict): query parameters (without api key).
+            parse (optional): function parsing response (run with run), raising RateLimitExceeded for
+                throttling messages. Defaults to None (response is returned).
+
+        Raises:
+            httpx.HTTPError: last error when all retries failed or other error response.
+            RateLimitExceeded: api was throttling all retries.
+        """
+        self.open()
+        params = params | {"apikey": self.api_key}
+        for attempt in range(self.retries + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.wait()
+            self.requests += 1
+            delay = self.backoff * 2**attempt * (1 + random.random()) / 2
+            try:
+                response = await self.http.get(self.url, params=params)
+                response.raise_for_status()
+                return response if parse is None else await self.run(parse, response)
+            except httpx.HTTPStatusError as error:
+                if attempt == self.retries or error.response.status_code not in RETRY_STATUSES:
+                    self.failed += 1
+                    raise
+                delay = max(delay, retry_after(error.response))
+            except (httpx.TransportError, RateLimitExceeded):
+                if attempt == self.retries:
+                    self.failed += 1
+                    raise
+            self.retried += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "retried": self.retried, "failed": self.failed}
+
+    async def _time_series(self, function: str, **params) -> tuple[pd.DataFrame, dict]:
+        api_function, series_key = TIME_SERIES_FUNCTIONS[function]
+        data = await self.get({"function": api_function, **params}, parse=api_json)
+        frame = await self.run(series_frame, data, series_key.format(**params))
+        return frame, data["Meta Data"]
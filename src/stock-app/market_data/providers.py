@@ -0,0 +1,168 @@
+"""Module contains interface of market data providers and provider serving prices from local files.
+
+Provider is selected with MARKET_DATA_PROVIDER setting: Alpha Vantage api (market_data.client)
+or pre-downloaded dataset (FileProvider), which serves the whole analytics path without network.
+"""
+import csv
+import io
+import os
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+from market_data.refresh import COMPACT_SIZE
+from market_data.store import PRICE_COLUMNS
+
+LISTING_COLUMNS = "symbol,name,exchange,assetType,ipoDate,delistingDate,status"
+# Optional listing of dataset (LISTING_STATUS csv format) in root of provider directory
+LISTING_FILE = "listing.csv"
+
+
+async def run_inline(func, *args):
+    return func(*args)
+
+
+class MarketDataProvider(ABC):
+    """Async source of OHLCV series with TimeSeries methods (get_daily, get_intraday, ...) returning
+    (data, meta), where data has open/high/low/close/volume columns (optionally numbered, "1. open")
+    and date index sorted from the newest bar, and meta has "2. Symbol" key.
+
+    Methods raise ValueError for unknown symbols.
+    """
+
+    # Provider reads local data, its listing is not saved to SYMBOL_LISTING_FILE
+    local = False
+
+    def open(self) -> None:
+        """Opens resources used by provider, called in app startup."""
+
+    async def aclose(self) -> None:
+        """Closes resources used by provider, called in app shutdown."""
+
+    def stats(self) -> dict:
+        return {}
+
+    @abstractmethod
+    async def get_intraday(self, symbol: str, interval: str = "15min", outputsize: str = "compact"):
+        ...
+
+    @abstractmethod
+    async def get_daily(self, symbol: str, outputsize: str = "compact"):
+        ...
+
+    async def get_daily_adjusted(self, symbol: str, outputsize: str = "compact"):
+        return await self.get_daily(symbol, outputsize)
+
+    @abstractmethod
+    async def get_weekly(self, symbol: str):
+        ...
+
+    @abstractmethod
+    async def get_monthly(self, symbol: str):
+        ...
+
+    @abstractmethod
+    async def symbol_search(self, keywords: str) -> list[dict]:
+        """Returns best matches in SYMBOL_SEARCH api format ("1. symbol", "2. name", ...)."""
+
+    @abstractmethod
+    async def listing_status(self) -> bytes:
+        """Returns csv of listed symbols in LISTING_STATUS api format."""
+
+
+class FileProvider(MarketDataProvider):
+    """Serves series from directory/interval/SYMBOL.csv (or .parquet) files.
+
+    Files have date column (or index) and open, high, low, close, volume columns, other columns
+    are ignored. Parquet files need pyarrow (or fastparquet) installed. Company names, exchanges
+    and types are read from optional directory/listing.csv (LISTING_STATUS csv), without it
+    symbols are listed with their tickers as names.
+
+    Args:
+        directory (str): dataset directory, with subdirectory per interval (daily, weekly, 5min...).
+        run (optional): coroutine function running blocking file reads. Defaults to run_inline.
+    """
+
+    local = True
+
+    def __init__(self, directory: str, run=run_inline):
+        self.directory = directory
+        self.run = run
+        self.reads = 0
+
+    async def get_intraday(self, symbol: str, interval: str = "15min", outputsize: str = "compact"):
+        return await self._series(symbol, interval, outputsize)
+
+    async def get_daily(self, symbol: str, outputsize: str = "compact"):
+        return await self._series(symbol, "daily", outputsize)
+
+    async def get_weekly(self, symbol: str):
+        return await self._series(symbol, "weekly", "full")
+
+    async def get_monthly(self, symbol: str):
+        return await self._series(symbol, "monthly", "full")
+
+    async def symbol_search(self, keywords: str) -> list[dict]:
+        keywords = keywords.casefold()
+        rows = csv.DictReader(io.StringIO((await self.listing_status()).decode()))
+        return [
+            {"1. symbol": row["symbol"], "2. name": row["name"], "3. type": row["assetType"], "9. matchScore": "1.0000"}
+            for row in rows
+            if row["symbol"].casefold().startswith(keywords) or keywords in row["name"].casefold()
+        ]
+
+    async def listing_status(self) -> bytes:
+        return await self.run(self.listing)
+
+    def listing(self) -> bytes:
+        """Returns directory/listing.csv or listing of symbols with files (tickers as names)."""
+        try:
+            with open(os.path.join(self.directory, LISTING_FILE), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            rows = [f"{symbol},{symbol},,Stock,,null,Active" for symbol in self.symbols()]
+            return "\n".join([LISTING_COLUMNS, *rows]).encode()
+
+    def stats(self) -> dict:
+        return {"reads": self.reads}
+
+    def symbols(self) -> list[str]:
+        """Returns sorted symbols with file of any interval."""
+        symbols = set()
+        for root, _, names in os.walk(self.directory):
+            # Series are kept in interval subdirectories, root has listing only
+            if os.path.samefile(root, self.directory):
+                continue
+            symbols.update(os.path.splitext(name)[0].upper() for name in names if name.endswith((".csv", ".parquet")))
+        return sorted(symbols)
+
+    def read(self, symbol: str, interval: str) -> pd.DataFrame:
+        """Reads OHLCV frame of symbol sorted from the newest bar.
+
+        Raises:
+            ValueError: there is no file of symbol and interval.
+        """
+        path = os.path.join(self.directory, interval, symbol.upper())
+        if os.path.exists(f"{path}.parquet"):
+            data = pd.read_parquet(f"{path}.parquet")
+        elif os.path.exists(f"{path}.csv"):
+            data = pd.read_csv(f"{path}.csv")
+        else:
+            raise ValueError(f"Invalid API call. No {interval} prices of {symbol} in {self.directory}.")
+        if "date" in data.columns:
+            data = data.set_index("date")
+        data = data[PRICE_COLUMNS].astype(float)
+        data.index = pd.DatetimeIndex(data.index, name="date")
+        self.reads += 1
+        return data.sort_index(ascending=False)
+
+    async def _series(self, symbol: str, interval: str, outputsize: str) -> tuple[pd.DataFrame, dict]:
+        data = await self.run(self.read, symbol, interval)
+        if outputsize == "compact":
+            data = data.iloc[:COMPACT_SIZE]
+        meta = {
+            "1. Information": f"{interval} prices from {self.directory}",
+            "2. Symbol": symbol.upper(),
+            "3. Last Refreshed": str(data.index.max()),
+        }
+        return data, meta
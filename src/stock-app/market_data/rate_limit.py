@@ -0,0 +1,44 @@
+"""Module contains rate limiter matched to per-minute quota of market data api."""
+import asyncio
+import threading
+import time
+from collections import deque
+
+
+class RateLimiter:
+    """Sliding window rate limiter, allows at most `calls` calls within `period` seconds.
+
+    wait() is awaited in event loop before each api request.
+    """
+
+    def __init__(self, calls: int, period: float = 60.0):
+        self.calls = calls
+        self.period = period
+        self.waits = 0
+        self._timestamps: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    async def wait(self) -> float:
+        """Waits (without blocking event loop) until call is allowed.
+
+        Returns:
+            (float): number of seconds spent waiting.
+        """
+        waited = 0.0
+        while (delay := self._reserve(waited)) > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
+
+    def _reserve(self, waited: float) -> float:
+        """Records call and returns 0 when it is allowed, otherwise returns delay until it could be."""
+        with self._lock:
+            now = time.monotonic()
+            while self._timestamps and now - self._timestamps[0] >= self.period:
+                self._timestamps.popleft()
+            if len(self._timestamps) < self.calls:
+                self._timestamps.append(now)
+                if waited:
+                    self.waits += 1
+                return 0
+            return self._timestamps[0] + self.period - now
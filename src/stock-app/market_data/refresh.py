@@ -0,0 +1,66 @@
+"""Module contains helpers used to refresh cached series with outputsize="compact" downloads."""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+
+# Number of the latest data points returned by Alpha Vantage for outputsize="compact"
+COMPACT_SIZE = 100
+
+INTRADAY_MINUTES = {"1min": 1, "5min": 5, "15min": 15, "30min": 30, "60min": 60}
+
+
+def missing_bars(last_bar: pd.Timestamp, interval: str, now: datetime.datetime | None = None) -> int:
+    """Estimates upper bound of bars published after last_bar.
+
+    Daily bars are counted as business days (holidays make the estimate only larger),
+    intraday bars as elapsed minutes divided by interval length.
+
+    Args:
+        last_bar (pd.Timestamp): timestamp of the newest stored bar.
+        interval (str): series interval.
+        now (datetime.datetime | None, optional): current time. Defaults to None (datetime.now()).
+
+    Returns:
+        (int): estimated number of missing bars.
+    """
+    now = now or datetime.datetime.now()
+    if interval == "daily":
+        return int(np.busday_count(last_bar.date() + datetime.timedelta(1), now.date() + datetime.timedelta(1)))
+    elapsed_minutes = (pd.Timestamp(now) - last_bar).total_seconds() / 60
+    return int(elapsed_minutes // INTRADAY_MINUTES[interval])
+
+
+def compact_covers_gap(last_bar: pd.Timestamp, interval: str, now: datetime.datetime | None = None) -> bool:
+    """Checks if outputsize="compact" download is enough to fill the gap after last_bar."""
+    if interval != "daily" and interval not in INTRADAY_MINUTES:
+        return False
+    return missing_bars(last_bar, interval, now) < COMPACT_SIZE
+
+
+def merge_bars(stored: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame | None:
+    """Merges newly downloaded bars into stored series.
+
+    Bars from the new download take precedence. Returns None when new bars do not overlap
+    stored series or overlapping bars differ (e.g. adjusted prices after split),
+    in that case full download is needed. The newest stored bar is not compared,
+    it could be downloaded before the end of the session.
+
+    Args:
+        stored (pd.DataFrame): stored series.
+        new (pd.DataFrame): bars downloaded with outputsize="compact".
+
+    Returns:
+        (pd.DataFrame | None): merged series sorted from the newest bar, as returned by api.
+    """
+    if new.empty or list(new.columns) != list(stored.columns):
+        return None
+    overlap = new.index.intersection(stored.index)
+    if overlap.empty:
+        return None
+    settled = overlap[overlap < stored.index.max()]
+    if not np.allclose(new.loc[settled].to_numpy(dtype=float), stored.loc[settled].to_numpy(dtype=float)):
+        return None
+    merged = pd.concat([new, stored.loc[stored.index.difference(new.index)]])
+    return merged.sort_index(ascending=False)
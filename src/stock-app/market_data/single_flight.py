@@ -0,0 +1,50 @@
+"""Module contains coalescing of concurrent calls with the same key (single-flight).
+
+While a call is in flight, other callers of the same key await its result instead of starting
+their own, so concurrent requests for the same series use one api call from provider quota.
+"""
+import asyncio
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time, concurrent callers of the key share its result.
+
+    Result (or exception) is shared as is, callers must not modify it (frames are shared read-only).
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self.failed = 0
+        self._in_flight: dict = {}
+
+    async def run(self, key, func, *args, **kwargs):
+        """Awaits func(*args, **kwargs) started by this call or in-flight call of the same key."""
+        task = self._in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._done(key, done))
+        else:
+            self.coalesced += 1
+        # Shared call is not cancelled with one of waiting callers
+        return await asyncio.shield(task)
+
+    def in_flight(self, key) -> bool:
+        return key in self._in_flight
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "in_flight": len(self._in_flight),
+        }
+
+    def _done(self, key, task: asyncio.Future) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Exception is retrieved, so it is not logged when all callers were cancelled
+        if not task.cancelled() and task.exception() is not None:
+            self.failed += 1
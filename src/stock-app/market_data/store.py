@@ -0,0 +1,138 @@
+"""Module contains columnar on-disk store of OHLCV series.
+
+Each (function, symbol, interval) series is kept in one .npy file holding a single record
+with int64 epoch (ns) index column and float64 open/high/low/close/volume columns, sorted
+from the oldest bar. Files are memory-mapped, so reading a date range touches only pages
+of that range and the page cache is shared between workers. Meta data and download time
+are kept in a JSON file next to it.
+"""
+import contextlib
+import datetime
+import json
+import os
+import re
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+@contextlib.contextmanager
+def atomic_file(path: str, mode: str = "wb"):
+    """Opens temporary file in directory of path, which replaces path when the block exits without error.
+
+    Temporary file is unique per writer, so concurrent writers (threads or worker processes) never
+    write the same file and readers see either the previous or the new complete file.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else "utf-8") as file:
+            yield file
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+
+
+def to_ohlcv(data: pd.DataFrame) -> pd.DataFrame:
+    """Selects open/high/low/close/volume columns from api frame ("1. open", ..., "5. volume").
+
+    Args:
+        data (pd.DataFrame): frame returned by market data client.
+
+    Returns:
+        (pd.DataFrame): float64 OHLCV frame sorted from the newest bar.
+    """
+    names = {re.sub(r"^\d+\. ", "", column): column for column in data.columns}
+    ohlcv = pd.DataFrame({column: data[names[column]].astype(np.float64) for column in PRICE_COLUMNS})
+    ohlcv.index = pd.DatetimeIndex(data.index, name="date")
+    return ohlcv.sort_index(ascending=False)
+
+
+def slice_dates(data: pd.DataFrame, date_from: datetime.date, date_to: datetime.date) -> pd.DataFrame:
+    """Selects bars between date_from and date_to (both inclusive) with binary search on sorted index.
+
+    Args:
+        data (pd.DataFrame): frame with sorted (ascending or descending) DatetimeIndex.
+        date_from (datetime.date): first day.
+        date_to (datetime.date): last day.
+
+    Returns:
+        (pd.DataFrame): view of selected bars.
+    """
+    first = pd.Timestamp(date_from)
+    last = pd.Timestamp(date_to) + pd.Timedelta(days=1) - pd.Timedelta(1)
+    if data.index.is_monotonic_decreasing:
+        return data.iloc[data.index.slice_indexer(last, first)]
+    return data.iloc[data.index.slice_indexer(first, last)]
+
+
+class PriceStore:
+    """Columnar store of OHLCV series, one file per (function, symbol, interval)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, key: tuple, data: pd.DataFrame, meta: dict) -> None:
+        """Replaces stored series with data (OHLCV frame) and saves its meta data."""
+        data = data.sort_index()
+        size = len(data)
+        dtype = np.dtype([("time", np.int64, (size,))] + [(column, np.float64, (size,)) for column in PRICE_COLUMNS])
+        record = np.zeros((), dtype=dtype)
+        record["time"] = data.index.values.astype("datetime64[ns]").view(np.int64)
+        for column in PRICE_COLUMNS:
+            record[column] = data[column].to_numpy(dtype=np.float64)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_file(f"{path}.npy") as file:
+            np.save(file, record)
+        info = {"meta": meta, "fetched_at": datetime.datetime.now().timestamp(), "rows": size}
+        with atomic_file(f"{path}.json", "w") as file:
+            json.dump(info, file)
+
+    def info(self, key: tuple) -> dict | None:
+        """Returns meta data and download time (fetched_at) of stored series or None."""
+        try:
+            with open(f"{self._path(key)}.json", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def read(
+        self,
+        key: tuple,
+        date_from: datetime.date | None = None,
+        date_to: datetime.date | None = None,
+    ) -> pd.DataFrame:
+        """Reads bars between date_from and date_to (both inclusive).
+
+        Args:
+            key (tuple): (function, symbol, interval).
+            date_from (datetime.date | None, optional): first day. Defaults to None (the oldest bar).
+            date_to (datetime.date | None, optional): last day. Defaults to None (the newest bar).
+
+        Returns:
+            (pd.DataFrame): OHLCV frame sorted from the newest bar, as returned by api.
+        """
+        record = np.load(f"{self._path(key)}.npy", mmap_mode="r")
+        time = record["time"]
+        start, stop = 0, len(time)
+        if date_from is not None:
+            start = np.searchsorted(time, pd.Timestamp(date_from).value, side="left")
+        if date_to is not None:
+            stop = np.searchsorted(time, pd.Timestamp(date_to + datetime.timedelta(1)).value, side="left")
+        index = pd.DatetimeIndex(np.array(time[start:stop][::-1]).view("datetime64[ns]"), name="date")
+        return pd.DataFrame(
+            {column: np.array(record[column][start:stop][::-1]) for column in PRICE_COLUMNS}, index=index
+        )
+
+    def _path(self, key: tuple) -> str:
+        function, symbol, interval = key
+        return os.path.join(self.directory, interval, f"{function}-{re.sub(r'[^A-Za-z0-9._]', '_', symbol)}")
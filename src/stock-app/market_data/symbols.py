@@ -0,0 +1,202 @@
+"""Module contains local symbol index and cached search of company symbols.
+
+Queries are answered from index of listed companies (Alpha Vantage LISTING_STATUS file), remote
+SYMBOL_SEARCH api is called only when index has no match. Remote results are cached by normalized
+query and concurrent requests for the same query share one api call.
+"""
+import bisect
+import csv
+import heapq
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+
+from market_data.single_flight import SingleFlight
+
+# Fields of listed US companies, which are not present in listing file
+US_MARKET = {"region": "United States", "marketOpen": "09:30", "marketClose": "16:00", "timezone": "UTC-04"}
+# Minimal trigram similarity of fuzzy match
+FUZZY_THRESHOLD = 0.3
+
+
+@dataclass(frozen=True)
+class Listing:
+    symbol: str
+    name: str
+    type: str
+    exchange: str
+
+
+def normalize_query(query: str) -> str:
+    """Returns query without repeated whitespace, case folded."""
+    return " ".join(query.split()).casefold()
+
+
+def trigrams(text: str) -> set[str]:
+    text = f"  {text} "
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def listing_result(listing: Listing, score: float) -> dict:
+    """Returns listing in format of search results (as prepared from SYMBOL_SEARCH api)."""
+    return {
+        "symbol": listing.symbol,
+        "name": listing.name,
+        "type": listing.type,
+        **US_MARKET,
+        "currency": "USD",
+        "matchScore": f"{score:.4f}",
+    }
+
+
+def remote_result(match: dict) -> dict:
+    """Returns SYMBOL_SEARCH api match ("1. symbol", "2. name"...) with keys without numbers."""
+    return {key.split(". ", 1)[-1]: value for key, value in match.items()}
+
+
+class SymbolIndex:
+    """Index of listed symbols with prefix matching of symbols and words of company names
+    and trigram fuzzy matching used when no prefix matches.
+    """
+
+    def __init__(self, listings: list[Listing]):
+        self.listings = listings
+        self._names = [listing.name.casefold() for listing in listings]
+        self._symbols = sorted((listing.symbol.casefold(), i) for i, listing in enumerate(listings))
+        self._words = sorted(
+            (word, i) for i, listing in enumerate(listings) for word in set(listing.name.casefold().split())
+        )
+        # Fuzzy matching compares query with symbol, each word of name and whole name (terms) of listing
+        self._terms: list[tuple[int, int]] = []
+        self._trigrams: dict[str, list[int]] = {}
+        for i, listing in enumerate(listings):
+            name = listing.name.casefold()
+            for term in {listing.symbol.casefold(), name, *name.split()}:
+                grams = trigrams(term)
+                for gram in grams:
+                    self._trigrams.setdefault(gram, []).append(len(self._terms))
+                self._terms.append((i, len(grams)))
+
+    @classmethod
+    def from_csv(cls, path: str) -> "SymbolIndex":
+        """Loads active listings from LISTING_STATUS csv (symbol, name, exchange, assetType, ... status)."""
+        with open(path, newline="", encoding="utf-8") as file:
+            return cls.from_listing(file)
+
+    @classmethod
+    def from_listing(cls, lines) -> "SymbolIndex":
+        """Loads active listings from lines of LISTING_STATUS csv."""
+        listings = [
+            Listing(row["symbol"], row["name"], row["assetType"], row["exchange"])
+            for row in csv.DictReader(lines)
+            if row.get("status", "Active") == "Active" and row["symbol"] and row["name"]
+        ]
+        return cls(listings)
+
+    def __len__(self) -> int:
+        return len(self.listings)
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """Returns up to limit best matches of normalized query, best first.
+
+        Exact symbol scores 1, symbol prefixes score by covered part of symbol, company names by
+        covered part of name (at most 0.8). Trigram similarity (at most 0.6) is used when nothing matches.
+        """
+        if not query or not self.listings:
+            return []
+        scores: dict[int, float] = {}
+        for symbol, i in self._prefixed(self._symbols, query):
+            scores[i] = max(scores.get(i, 0), len(query) / len(symbol))
+        words = query.split()
+        for _, i in self._prefixed(self._words, words[0]):
+            name = self._names[i]
+            if len(words) == 1 or query in name:
+                scores[i] = max(scores.get(i, 0), 0.8 * len(query) / len(name))
+        if not scores:
+            scores = self._fuzzy(query)
+        best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], self.listings[item[0]].symbol))
+        return [listing_result(self.listings[i], score) for i, score in best]
+
+    @staticmethod
+    def _prefixed(keys: list[tuple[str, int]], prefix: str) -> list[tuple[str, int]]:
+        start = bisect.bisect_left(keys, (prefix, -1))
+        end = bisect.bisect_left(keys, (prefix + "\uffff", -1))
+        return keys[start:end]
+
+    def _fuzzy(self, query: str) -> dict[int, float]:
+        grams = trigrams(query)
+        shared = Counter(term for gram in grams for term in self._trigrams.get(gram, ()))
+        scores = {}
+        for term, count in shared.items():
+            i, size = self._terms[term]
+            similarity = count / (len(grams) + size - count)
+            if similarity >= FUZZY_THRESHOLD:
+                scores[i] = max(scores.get(i, 0), 0.6 * similarity)
+        return scores
+
+
+class SymbolSearch:
+    """Searches symbols in local index, falls back to remote search cached for ttl seconds.
+
+    Args:
+        index (SymbolIndex): local index (may be empty).
+        remote: coroutine function returning search results of normalized query.
+        ttl (float): lifetime of cached remote results in seconds.
+        max_entries (int, optional): number of cached queries. Defaults to 10000.
+    """
+
+    def __init__(self, index: SymbolIndex, remote, ttl: float, max_entries: int = 10000):
+        self.index = index
+        self.remote = remote
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.local_hits = 0
+        self.hits = 0
+        self.flights = SingleFlight()
+        self._entries: OrderedDict[str, tuple[float, list[dict]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def search(self, query: str) -> list[dict]:
+        key = normalize_query(query)
+        if not key:
+            return []
+        if results := self.index.search(key):
+            self.local_hits += 1
+            return results
+        if (results := self._get(key)) is not None:
+            self.hits += 1
+            return results
+        results = await self.flights.run(key, self._fetch, key)
+        return [dict(result) for result in results]
+
+    def stats(self) -> dict:
+        return {
+            "indexed_symbols": len(self.index),
+            "local_hits": self.local_hits,
+            "hits": self.hits,
+            "misses": self.flights.calls,
+            "deduplicated": self.flights.coalesced,
+            "in_flight": self.flights.stats()["in_flight"],
+            "entries": len(self._entries),
+        }
+
+    async def _fetch(self, key: str) -> list[dict]:
+        results = await self.remote(key)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return results
+
+    def _get(self, key: str) -> list[dict] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return [dict(result) for result in entry[1]]
@@ -19,6 +19,7 @@ router = APIRouter()
 async def authenticate_user(email: str, password: str):
     """Checks if there is username in databe based on given email
     and compares password from databe with given password.
+    Password hashed with other bcrypt cost than configured is rehashed.
 
     Args:
         email (str): user email.
@@ -30,8 +31,11 @@ async def authenticate_user(email: str, password: str):
     user = await user_crud.get_user_by_email(email)
     if not user:
         return False
-    if not security.verify_password(password, user["password"]):
+    verified, new_hash = await security.verify_and_update_password(password, user["password"])
+    if not verified:
         return False
+    if new_hash is not None:
+        await user_crud.update_password_hash(user["_id"], new_hash)
     return user
 
 
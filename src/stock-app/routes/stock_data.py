@@ -1,52 +1,72 @@
 """Module contains endpoints for User collection."""
+import asyncio
 import base64
-import requests
 import json
 import datetime
 import os
+import re
 from io import BytesIO
 import matplotlib
 from pprint import pprint
 
+import httpx
 import numpy as np
-from fastapi import APIRouter, status, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Header, Query, Response, status, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import HTTPException
 import pandas as pd
 import matplotlib.pyplot as plt
-from stock_api import ts
+from stock_api import (
+    batch_loader,
+    load_prices,
+    load_prices_concurrently,
+    market_data,
+    series_cache,
+    store_flights,
+    symbol_search,
+    ts,
+)
 import numpy as np
-from scipy.stats import norm
-from pydantic import parse_obj_as
 from scipy.stats import shapiro
 
-from schemas.stock import GetStockData, GetPortfolioData
-from schemas.user import UserOut
+from analytics.chart_cache import CachedChart, ChartCache, chart_key
+from analytics.hurst import calculate_hurst_exponent
+from analytics.plots import chart_metrics, plot_data, png_to_webp
+from analytics.portfolio import portfolio_historical_var
+from analytics.value_at_risk import calculate_returns, calculate_value_at_risk
+from market_data.client import RateLimitExceeded, retry_after
+from config import settings
+from executors import cpu_executor, io_executor
+from schemas.stock import AnalysisPage, GetStockData, GetStockDataBatch, GetPortfolioData
 from security import oauth2_scheme, get_current_user
-from crud import user_crud
+from crud import analysis_crud, chart_crud, job_crud
+from jobs import job_runner
 
 
 STOCK_DATA_INTERVALS = ["1min", "5min", "15min", "30min", "60min", "daily", "weekly", "monthly"]
+# inline - base64 charts in response, reference - chart urls, data - OHLC arrays instead of price chart
+RESPONSE_MODES = ["inline", "reference", "data"]
+CHART_MEDIA_TYPES = {"png": "image/png", "webp": "image/webp"}
+# Stream formats of batch analysis, newline delimited JSON or server-sent events
+BATCH_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+# Result fields not kept in analysis history
+HISTORY_EXCLUDED = ["plot", "hurst_plot", "ohlc"]
+# Path of get_chart endpoint, router is included under /stock-data prefix
+CHARTS_PATH = "/stock-data/charts"
+CHART_KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+# Charts are content-addressed, chart under given key never changes
+CHART_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 
 router = APIRouter()
 pd.options.mode.chained_assignment = None
 
-
-def prepare_search_data(data: list[dict]) -> list[dict]:
-    """Preparation of retrieved data from api for search result."""
-    for company in data:
-        company["symbol"] = company.pop("1. symbol")
-        company["name"] = company.pop("2. name")
-        company["type"] = company.pop("3. type")
-        company["region"] = company.pop("4. region")
-        company["marketOpen"] = company.pop("5. marketOpen")
-        company["marketClose"] = company.pop("6. marketClose")
-        company["timezone"] = company.pop("7. timezone")
-        company["currency"] = company.pop("8. currency")
-        company["matchScore"] = company.pop("9. matchScore")
-    return data
+chart_cache = ChartCache(
+    max_bytes=settings.CHART_CACHE_MAX_BYTES,
+    directory=settings.CHART_CACHE_DIR,
+    disk_max_bytes=settings.CHART_CACHE_DISK_MAX_BYTES,
+)
 
 
 def prepare_data(data: pd.DataFrame, interval: str) -> pd.DataFrame:
@@ -57,252 +77,20 @@ def prepare_data(data: pd.DataFrame, interval: str) -> pd.DataFrame:
     # Rename columns names and index name
     columns_names = ["open", "high", "low", "close", "volume"]
     data.columns = columns_names
-    # data["TradeDate"] = data.index
-    data["TradeDate"] = data.index.date
-    data["time"] = data.index.time
     return data
 
 
-def linear_plot(data: pd.DataFrame, ax: matplotlib.axes.Axes):
-    shift = np.linspace(0, 6)
-    for _ in shift:
-        ax.plot(data["close"], color="#00ccff", linewidth=0.5)
-
-
-def candle_stick_plot(data: pd.DataFrame):
-    plt.subplots_adjust(bottom=0.20)
-    plt.xticks(rotation=70, fontsize=6)
-    plt.yticks(fontsize=8)
-    up = data[data.close >= data["open"]]
-    down = data[data["close"] < data["open"]]
-    up_color = "#89ff00"
-    up_shadow_color = "#4CAE50"
-    down_color = "#ff005e"
-    down_shadow_color = "#9C2525"
-    bar_width = 0.5
-    shadow_width = 0.2
-    # Plotting up prices of the stock
-    plt.bar(up.index, up.close - up.open, bar_width, bottom=up.open, color=up_color)
-    plt.bar(up.index, up.high - up.close, shadow_width, bottom=up.close, color=up_shadow_color)
-    plt.bar(up.index, up.low - up.open, shadow_width, bottom=up.open, color=up_shadow_color)
-    # Plotting down prices of the stock
-    plt.bar(down.index, down.close - down.open, bar_width, bottom=down.open, color=down_color)
-    plt.bar(down.index, down.high - down.open, shadow_width, bottom=down.open, color=down_shadow_color)
-    plt.bar(down.index, down.low - down.close, shadow_width, bottom=down.close, color=down_shadow_color)
-
-
-def plot_data(plot_type: str, data: pd.DataFrame, meta: dict, name: str, frequency: str):
-    """Plot charts based on stock market data."""
-    plt.style.use("dark_background")
-    fig, ax = plt.subplots()
-    plt.rc("font", size=8)
-    if frequency not in ["daily", "weekly", "monthly"]:
-        plt.subplots_adjust(bottom=0.20)
-        plt.xticks(rotation=70, fontsize=6)
-    if plot_type == "linear":
-        linear_plot(data, ax)
-    elif plot_type == "candlestick":
-        candle_stick_plot(data)
-    ax.set_xlabel("time", fontsize=12, labelpad=6, fontweight="bold")
-    ax.set_ylabel("value", fontsize=12, labelpad=6, fontweight="bold")
-    ax.set_title(f'{meta["2. Symbol"]} ({name})', fontsize=14, pad=12, fontweight="bold")
-    buf = BytesIO()
-    fig.savefig(buf, format="png", dpi=300)
-    data = base64.b64encode(buf.getbuffer()).decode("ascii")
-    return data
+def prepare_ohlc_data(data: pd.DataFrame) -> dict:
+    """Preparation of compact OHLC arrays (time in epoch milliseconds) rendered by client."""
+    data = data.sort_index()
+    ohlc = {"time": (data.index.asi8 // 1_000_000).tolist()}
+    for column in ["open", "high", "low", "close", "volume"]:
+        ohlc[column] = data[column].tolist()
+    return ohlc
 
 
-def calculate_returns(data: pd.Series) -> pd.Series:
-    """Calculate normalized returns."""
-    returns = data / data.shift(-1)
-    returns = returns.dropna()
-    return returns
-
-
-def calculate_log_returns(data: pd.Series) -> pd.Series:
-    """Calculate normalized log returns."""
-    returns = np.log(data / data.shift(-1))
-    returns = returns.dropna()
-    return returns
-
-
-def daterange(start_date, end_date):
-    for n in range(int((end_date - start_date).days)):
-        yield start_date + datetime.timedelta(n)
-
-
-def portfolio_historical_var(
-    portfolio_with_data: dict,
-    symbol_data: pd.Series,
-    confidence_level: float,
-    horizon_days: int,
-    date_from: datetime.date,
-    date_to: datetime.date,
-) -> float:
-    portfolio_values = pd.Series()
-    for day in daterange(date_from, date_to + datetime.timedelta(1)):
-        pd_day = pd.Timestamp(day)
-        portfolio_value = 0
-        include_date = True
-        for symbol, symbol_data in portfolio_with_data.items():
-            value = symbol_data["value"]
-            returns: pd.Series = symbol_data["returns"]
-            if pd_day in returns:
-                portfolio_value += value * returns[pd_day]
-            else:
-                include_date = False
-                break
-        if include_date:
-            portfolio_values[pd_day] = portfolio_value
-
-    sorted_portfolio_values = np.sort(portfolio_values)
-    percentile = 1 - confidence_level
-    percentile_sample_index = int(percentile * len(sorted_portfolio_values))
-    worst_portfolio_value = sorted_portfolio_values[percentile_sample_index]
-    current_portfolio_value = sum(symbol_data["value"] for symbol_data in portfolio_with_data.values())
-    var = (current_portfolio_value - worst_portfolio_value) * np.sqrt(horizon_days)
-    return var
-
-
-def historical_simulation_var(
-    returns: pd.Series,
-    confidence_level: float,
-    portfolio_value: int | float,
-    historical_days: int,
-    horizon_days: int,
-) -> float:
-    """Calculate Value at Risk using historical simulation method."""
-    first_return = max(len(returns) - historical_days, 0)
-    returns_subset: pd.Series = returns[first_return:]
-    sorted_returns = np.sort(returns_subset)
-    percentile = 1 - confidence_level
-    percentile_sample_index = int(percentile * len(sorted_returns))
-    worst_portfolio_value = sorted_returns[percentile_sample_index] * portfolio_value
-    var = (portfolio_value - worst_portfolio_value) * np.sqrt(horizon_days)
-    return var
-
-
-def linear_model_var(
-    returns: pd.Series,
-    confidence_level: float,
-    portfolio_value: int | float,
-    historical_days: int,
-    horizon_days: int,
-) -> float:
-    """Calculate Value at Risk using linear model simulation."""
-    first_return = max(len(returns) - historical_days, 0)
-    returns_subset: pd.Series = returns[first_return:]
-    # Standard deviation is the statistical measure of market volatility
-    std_dev = np.std(returns_subset)
-    standard_score = norm.ppf(confidence_level)
-    var = standard_score * std_dev * portfolio_value * np.sqrt(horizon_days)
-    return var
-
-
-def monte_carlo_var(
-    returns: pd.Series,
-    confidence_level: float,
-    portfolio_value: int | float,
-    historical_days: int,
-    horizon_days: int,
-    number_of_samples: int = 5000,
-) -> float:
-    """Calculate Value at Risk using monte carlo simulation."""
-    first_return = max(len(returns) - historical_days, 0)
-    returns_subset: pd.Series = returns[first_return:]
-    std_dev = np.std(returns_subset)
-    # loc=Mean(center), scale=Std(Spread/Width)
-    norm_distribution_samples = np.random.normal(loc=0, scale=std_dev, size=number_of_samples)
-    sorted_norm_distribution_samples = np.sort(norm_distribution_samples)
-    percentile = 1 - confidence_level
-    percentile_sample_index = int(percentile * len(sorted_norm_distribution_samples))
-    one_day_var = portfolio_value * sorted_norm_distribution_samples[percentile_sample_index]
-    var = abs(one_day_var * np.sqrt(horizon_days))
-    return var
-
-
-def calculate_value_at_risk(
-    var_type: str,
-    data: pd.DataFrame,
-    confidence_level: float,
-    portfolio_value: int | float,
-    historical_days: int,
-    horizon_days: int,
-):
-    """Calcualte Value at Risk."""
-    data = data["close"]
-    returns = calculate_returns(data)
-
-    if var_type == "historical":
-        var = historical_simulation_var(returns, confidence_level, portfolio_value, historical_days, horizon_days)
-    if var_type == "linear_model":
-        var = linear_model_var(returns, confidence_level, portfolio_value, historical_days, horizon_days)
-    if var_type == "monte_carlo":
-        var = monte_carlo_var(returns, confidence_level, portfolio_value, historical_days, horizon_days)
-
-    res = "The VaR at the %.2f confidence level and portfolio value %.2f is %.2f" % (
-        confidence_level,
-        portfolio_value,
-        var,
-    )
-    return var
-
-
-def plot_hurst_eponent(intervals: list, data: list) -> float:
-    fig, ax = plt.subplots()
-    plt.xscale("log")
-    plt.yscale("log")
-    ax.plot(intervals, data)
-    a, b = np.polyfit(np.log(intervals), np.log(data), 1)
-    plt.plot(intervals, [np.exp(y) for y in [a * np.log(x) + b for x in intervals]])
-    ax.set_xlabel("Segment length (log)", fontsize=8, labelpad=6, fontweight="bold")
-    ax.set_ylabel("Mean standard deviation (log)", fontsize=8, labelpad=6, fontweight="bold")
-    ax.set_title(
-        "Mean standard deviation depending on segment length",
-        fontsize=9,
-        pad=12,
-        fontweight="bold",
-    )
-    buf = BytesIO()
-    fig.savefig(buf, format="png", dpi=300)
-    plot = base64.b64encode(buf.getbuffer()).decode("ascii")
-    return a, plot
-
-
-def calculate_hurst_exponent(data: pd.DataFrame):
-    data = data["close"]
-    # 1. logarytmiczna stopy zwrotu
-    log_returns = calculate_log_returns(data)
-    ro = []
-    # 9. powtarzamy kroki <2, 8>, każdorazowo zwiększając długość przedziału m o jeden do momentu aż n osiągnie górną granicę
-    intervals = range(5, int(len(log_returns - 1) / 2))
-    for n in intervals:
-        # 2. Dzielimy szereg stóp procentowych na m części złożonych z n elementów
-        m = int(len(log_returns) / n)
-        z = np.zeros(shape=(m, n))
-        u = np.zeros(shape=(m, n))
-        r = np.zeros(shape=m)
-        s = np.zeros(shape=m)
-        ro_iter = np.zeros(shape=m)
-        for i in range(m):
-            y_mean = np.mean(log_returns[i * n : (i + 1) * n])
-            for j in range(n):
-                # 3.Definiujemy z_ij
-                z[i][j] = log_returns[i * n + j] - y_mean
-                # 4.Ciag sum czesciowych
-                u[i][j] = np.sum(z[i])
-            # 5. Liczymy odchylenie standardowe
-            s[i] = np.std(z[i])
-            # 6. Określamy zakres i-tego przedziału
-            r[i] = np.max(u[i] - np.min(u[i]))
-        # 7. Normalizujemy wartości i-tego przedziału
-        ro_iter = r / s
-        # 8. Obliczamy średnią wartość znormalizowanego i-tego przedziału
-        ro.append(np.mean(ro_iter))
-    # 10,11. nachylenie prostej średniego odchylenia standardowego zależnego od długości segmentów na skali logarytmicznej to wykladnik Hursta
-    hurst_exponent, hurst_plot = plot_hurst_eponent(intervals, ro)
-    print(hurst_exponent)
-    return hurst_exponent, hurst_plot
+def chart_url(key: str) -> str:
+    return f"{CHARTS_PATH}/{key}"
 
 
 def check_normal_distribution():
@@ -344,57 +132,91 @@ async def search_stock_data():
     check_normal_distribution()
 
 
-@router.post("/", response_description="Stock data retrieved")
-async def calculate_stock_data(req_data: GetStockData, token: str = Depends(oauth2_scheme)) -> JSONResponse:
-    """Endpoint to get data and calculate statistics for specified company."""
-    # Check if user is logged in
-    user = None
+def market_data_error(error: httpx.HTTPError | RateLimitExceeded) -> HTTPException:
+    """Returns error response of market data request which failed after all retries.
+
+    Exceeded api quota (429 or throttling message) and unavailable api (connection errors, timeouts)
+    are 503 with Retry-After, other error responses of api are 502.
+    """
+    if isinstance(error, httpx.HTTPStatusError) and error.response.status_code != 429:
+        return HTTPException(
+            status_code=502, detail=f"market data provider error (status {error.response.status_code})."
+        )
+    delay = retry_after(error.response) if isinstance(error, httpx.HTTPStatusError) else 0
+    return HTTPException(
+        status_code=503,
+        detail="market data provider unavailable, try again later.",
+        headers={"Retry-After": str(round(delay or settings.MARKET_DATA_RETRY_AFTER))},
+    )
+
+
+async def get_optional_user(token: str) -> dict | None:
+    """Returns logged in user or None."""
     try:
-        user = await get_current_user(token)
-    except HTTPException as error:
-        if error.status_code == 401:
-            user_availability = False
-        else:
-            user_availability = True
+        return await get_current_user(token)
+    except HTTPException:
+        return None
+
+
+async def cached_chart(kind: str, data: pd.DataFrame | pd.Series, render, **params) -> tuple[str, CachedChart]:
+    """Returns chart key and chart from chart cache, renders and caches chart on miss.
+
+    Args:
+        kind (str): chart kind, part of the key.
+        data (pd.DataFrame | pd.Series): plotted series, part of the key.
+        render: coroutine function returning (png, meta) of rendered chart.
+        params: plot parameters, part of the key.
+    """
+    key = await io_executor.run(chart_key, kind, data, **params)
+    chart = await io_executor.run(chart_cache.get, key)
+    if chart is None:
+        png, meta = await render()
+        chart = CachedChart(png, meta)
+        await io_executor.run(chart_cache.put, key, png, meta)
+    return key, chart
+
+
+async def analyse_stock_data(req_data: dict, progress=None, loader=None) -> dict:
+    """Gets data and calculates statistics for specified company.
+
+    Args:
+        req_data (dict): GetStockData fields.
+        progress (optional): coroutine function called with (stage, progress) after each stage.
+        loader (optional): coroutine function loading prices, called as load_prices. Defaults to load_prices.
+
+    Raises:
+        HTTPException: incorrect request data, symbol or analysis timeout.
+
+    Returns:
+        (dict): plot and requested statistics.
+    """
     data: pd.DataFrame
     meta: dict
-    req_data: dict = jsonable_encoder(req_data)
     symbol = req_data["symbol"]
     name = req_data["name"]
     interval = req_data["interval"]
     date_from = req_data["date_from"]
     date_to = req_data["date_to"]
     plot_type = req_data["plot_type"]
+    response_mode = req_data.get("response_mode") or "inline"
 
     if interval not in STOCK_DATA_INTERVALS:
         raise HTTPException(status_code=400, detail="incorrect interval value.")
-    try:
-        if interval == "monthly":
-            data, meta = ts.get_monthly(symbol=symbol)
-        elif interval == "weekly":
-            data, meta = ts.get_weekly(symbol=symbol)
-        elif interval == "daily":
-            data, meta = ts.get_daily(symbol=symbol, outputsize="full")
-        else:
-            data, meta = ts.get_intraday(symbol=symbol, interval=interval, outputsize="full")
-    except ValueError as ex:
-        raise HTTPException(status_code=400, detail=f"incorrect symbol value. {ex}")
-    # data_path = os.path.join(os.path.dirname(__file__), "samsung_pand.csv")
-    # data = pd.read_csv(data_path, index_col='date')
-    # meta = {"2. Symbol": "xd"}
-    # print(data)
-    data = prepare_data(data, interval)
-
+    if response_mode not in RESPONSE_MODES:
+        raise HTTPException(status_code=400, detail="incorrect response_mode value.")
     # adjust selected datetime
     date_from = datetime.datetime.strptime(date_from, "%Y-%m-%d").date()
     date_to = datetime.datetime.strptime(date_to, "%Y-%m-%d").date()
     print(f"Data from: {date_from} to {date_to}")
-    mask = (data["TradeDate"] >= date_from) & (data["TradeDate"] <= date_to)
-    data = data.loc[mask]
-    # print("hihihihi")
-    # print(data)
-    # data.to_csv("wtf", sep=',')
-    # print(len(data.index))
+    try:
+        data, meta = await (loader or load_prices)(symbol, interval, date_from, date_to)
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail=f"incorrect symbol value. {ex}")
+    except (httpx.HTTPError, RateLimitExceeded) as error:
+        raise market_data_error(error)
+    data = prepare_data(data, interval)
+    if progress:
+        await progress("data retrieved", 0.2)
 
     if "var" in req_data["calculate"]:
         var_type = req_data["var_type"]
@@ -406,30 +228,346 @@ async def calculate_stock_data(req_data: GetStockData, token: str = Depends(oaut
         else:
             historical_days = req_data["historical_days"]
 
-    plot = plot_data(plot_type, data, meta, name, interval)
-    res_data = {"plot": plot}
-    # data.to_csv("file_name.csv", encoding="utf-8")
+    # plot and statistics are calculated at the same time in worker processes
+    chart_options = {"preset": settings.CHART_PRESET, "trace_memory": settings.CHART_TRACE_MEMORY}
+
+    async def render_plot():
+        png, render_stats = await cpu_executor.run(
+            plot_data, plot_type, data, meta, name, interval, downsample=settings.CHART_DOWNSAMPLE, **chart_options
+        )
+        chart_metrics.record(plot_type, render_stats)
+        return png, {}
+
+    async def render_hurst():
+        exponent, png, render_stats = await cpu_executor.run(
+            calculate_hurst_exponent, data, settings.HURST_SEGMENT_LENGTHS, **chart_options
+        )
+        chart_metrics.record("hurst", render_stats)
+        return png, {"hurst_exponent": exponent}
+
+    calculations = {}
+    if response_mode != "data":
+        calculations["plot"] = cached_chart(
+            "plot",
+            data,
+            render_plot,
+            plot_type=plot_type,
+            symbol=meta["2. Symbol"],
+            name=name,
+            interval=interval,
+            preset=settings.CHART_PRESET,
+            downsample=settings.CHART_DOWNSAMPLE,
+        )
     for statistic in req_data["calculate"]:
         if statistic == "var":
-            var = calculate_value_at_risk(
-                var_type, data, confidence_level, portfolio_value, historical_days, horizon_days
+            calculations["var"] = cpu_executor.run(
+                calculate_value_at_risk,
+                var_type,
+                data,
+                confidence_level,
+                portfolio_value,
+                historical_days,
+                horizon_days,
             )
-            res_data["var"] = var
-            res_data["historical_days"] = historical_days
         if statistic == "hurst":
-            hurst_exponent, hurst_plot = calculate_hurst_exponent(data)
-            res_data["hurst_exponent"] = hurst_exponent
-            res_data["hurst_plot"] = hurst_plot
+            calculations["hurst"] = cached_chart(
+                "hurst",
+                data["close"],
+                render_hurst,
+                segment_count=settings.HURST_SEGMENT_LENGTHS,
+                preset=settings.CHART_PRESET,
+            )
+    try:
+        results = dict(zip(calculations, await asyncio.gather(*calculations.values())))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="analysis timed out.")
+    res_data = {}
+    if response_mode == "data":
+        res_data["ohlc"] = prepare_ohlc_data(data)
+    else:
+        res_data["plot_url"] = chart_url(results["plot"][0])
+    if response_mode == "inline":
+        res_data["plot"] = base64.b64encode(results["plot"][1].png).decode("ascii")
+    if "var" in results:
+        res_data["var"] = results["var"]
+        res_data["historical_days"] = historical_days
+    if "hurst" in results:
+        key, hurst = results["hurst"]
+        res_data["hurst_exponent"] = hurst.meta["hurst_exponent"]
+        res_data["hurst_plot_url"] = chart_url(key)
+        if response_mode == "inline":
+            res_data["hurst_plot"] = base64.b64encode(hurst.png).decode("ascii")
+    if progress:
+        await progress("statistics calculated", 0.9)
+    return res_data
+
+
+def stock_data_response(req_data: dict, res_data: dict) -> JSONResponse:
+    """Returns analysis result, inline mode keeps previous JSON encoded string body."""
+    if (req_data.get("response_mode") or "inline") == "inline":
+        res_data = json.dumps(res_data)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=res_data)
+
+
+async def add_to_analysis_history(user: dict, req_data: dict, res_data: dict) -> None:
+    """Add Analyse data to history of current loged in user.
+
+    History keeps charts by reference (plot_url, hurst_plot_url), base64 images and
+    OHLC arrays are not stored. Referenced charts are stored in database (save_history_charts).
+    """
+    entry = history_entry(req_data, res_data)
+    await save_history_charts([entry])
+    await analysis_crud.create_analysis(user["_id"], entry)
+
+
+def history_entry(req_data: dict, res_data: dict) -> dict:
+    """Returns analysis request with result fields kept in history."""
+    return req_data | {key: value for key, value in res_data.items() if key not in HISTORY_EXCLUDED}
+
+
+async def save_history_charts(entries: list[dict]) -> None:
+    """Stores charts referenced by history entries in database, chart cache may evict them
+    (or lose them on restart without CHART_CACHE_DIR), get_chart serves them from database then.
+    """
+    charts = {}
+    for entry in entries:
+        for field in ("plot_url", "hurst_plot_url"):
+            if not entry.get(field):
+                continue
+            key = entry[field].rsplit("/", 1)[-1]
+            chart = await io_executor.run(chart_cache.get, key)
+            if chart is not None:
+                charts[key] = (chart.png, chart.meta)
+    await chart_crud.save_charts(charts)
+
+
+async def stored_chart(key: str) -> CachedChart | None:
+    """Returns chart of analysis history from database and caches it again, None when it is not stored."""
+    stored = await chart_crud.get_chart(key)
+    if stored is None:
+        return None
+    chart = CachedChart(*stored)
+    await io_executor.run(chart_cache.put, key, chart.png, chart.meta)
+    return chart
 
-    # Add Analyse data to history of current loged in user
+
+@router.post("/", response_description="Stock data retrieved")
+async def calculate_stock_data(req_data: GetStockData, token: str = Depends(oauth2_scheme)) -> JSONResponse:
+    """Endpoint to get data and calculate statistics for specified company."""
+    # Check if user is logged in
+    user = await get_optional_user(token)
+    req_data: dict = jsonable_encoder(req_data)
+    res_data = await analyse_stock_data(req_data)
     if user:
-        user = jsonable_encoder(parse_obj_as(UserOut, user))
-        analysed: dict = req_data | res_data
-        user["analysis_history"].append(analysed)
-        await user_crud.update_user(user["_id"], user)
+        await add_to_analysis_history(user, req_data, res_data)
+    return stock_data_response(req_data, res_data)
+
+
+def batch_event(event: dict, stream_format: str) -> str:
+    """Returns event of batch analysis as NDJSON line or SSE message (event named by status)."""
+    data = json.dumps(event)
+    if stream_format == "sse":
+        return f"event: {event['status']}\ndata: {data}\n\n"
+    return f"{data}\n"
+
+
+async def analyse_stock_data_batch(items: list[dict], user: dict | None, stream_format: str):
+    """Analyses items concurrently and yields their events (NDJSON lines or SSE messages) as they finish.
+
+    Event has index of item in batch, symbol, status ("done" or "failed") and result or error with
+    status code. Prices of each symbol and interval are loaded once for all its items (batch_loader).
+    Analyses of logged in user are added to history with one request after the last event, SSE stream
+    ends with "end" event.
+    """
+    requests = [
+        (
+            item["symbol"],
+            item["interval"],
+            datetime.datetime.strptime(item["date_from"], "%Y-%m-%d").date(),
+            datetime.datetime.strptime(item["date_to"], "%Y-%m-%d").date(),
+        )
+        for item in items
+    ]
+    loader = batch_loader(requests)
 
-    res_data = json.dumps(res_data)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=res_data)
+    async def analyse(index: int, item: dict) -> tuple[dict, dict | None]:
+        event = {"index": index, "symbol": item["symbol"]}
+        try:
+            res_data = await analyse_stock_data(item, loader=loader)
+        except HTTPException as error:
+            return event | {"status": "failed", "error": error.detail, "status_code": error.status_code}, None
+        except Exception as error:  # pylint: disable=broad-except
+            return event | {"status": "failed", "error": repr(error), "status_code": 500}, None
+        return event | {"status": "done", "result": res_data}, res_data
+
+    tasks = [asyncio.ensure_future(analyse(index, item)) for index, item in enumerate(items)]
+    history = []
+    failed = 0
+    try:
+        for next_task in asyncio.as_completed(tasks):
+            event, res_data = await next_task
+            if res_data is None:
+                failed += 1
+            else:
+                history.append(history_entry(items[event["index"]], res_data))
+            yield batch_event(event, stream_format)
+    finally:
+        # Client disconnected, remaining analyses are not needed
+        for task in tasks:
+            task.cancel()
+    if user:
+        await save_history_charts(history)
+        await analysis_crud.create_analyses(user["_id"], history)
+    if stream_format == "sse":
+        yield batch_event({"status": "end", "count": len(items), "failed": failed}, stream_format)
+
+
+@router.post("/batch", response_description="Stock data of many companies streamed")
+async def calculate_stock_data_batch(
+    req_data: GetStockDataBatch,
+    stream_format: str = Query("ndjson", alias="format", regex="^(ndjson|sse)$"),
+    token: str = Depends(oauth2_scheme),
+) -> StreamingResponse:
+    """Endpoint to get data and calculate statistics for many companies at once.
+
+    Results are streamed in order of completion as NDJSON lines or server-sent events (format query
+    parameter), so the whole batch takes about as long as its slowest analysis. Results are objects
+    (inline mode results are not JSON encoded strings as in POST /stock-data/).
+    """
+    if len(req_data.items) > settings.STOCK_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"batch has more than {settings.STOCK_BATCH_MAX_ITEMS} items.")
+    user = await get_optional_user(token)
+    items: list[dict] = jsonable_encoder(req_data.items)
+    return StreamingResponse(
+        analyse_stock_data_batch(items, user, stream_format),
+        media_type=BATCH_MEDIA_TYPES[stream_format],
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.post("/jobs", response_description="Stock data analysis job created")
+async def create_stock_data_job(req_data: GetStockData, token: str = Depends(oauth2_scheme)) -> JSONResponse:
+    """Endpoint to start analysis of specified company in background.
+
+    Returns:
+        JSONResponse: job id, used to poll job status and retrieve its result.
+    """
+    user = await get_optional_user(token)
+    req_data: dict = jsonable_encoder(req_data)
+    job = await job_crud.create_job(req_data, user["_id"] if user else None)
+
+    async def cancel_job():
+        # Job cancelled in app shutdown, clients polling it see its final state
+        await job_crud.update_job(
+            job["_id"], {"status": "failed", "stage": "cancelled", "error": "job cancelled.", "error_status_code": 503}
+        )
+
+    async def run_job():
+        async def progress(stage: str, value: float):
+            await job_crud.update_job(job["_id"], {"stage": stage, "progress": value})
+
+        try:
+            await job_crud.update_job(job["_id"], {"status": "running", "stage": "started"})
+            res_data = await analyse_stock_data(req_data, progress)
+            if user:
+                await add_to_analysis_history(user, req_data, res_data)
+        except HTTPException as error:
+            await job_crud.update_job(
+                job["_id"], {"status": "failed", "error": error.detail, "error_status_code": error.status_code}
+            )
+        except asyncio.CancelledError:
+            await cancel_job()
+            raise
+        except Exception as error:  # pylint: disable=broad-except
+            await job_crud.update_job(job["_id"], {"status": "failed", "error": repr(error), "error_status_code": 500})
+            raise
+        else:
+            await job_crud.update_job(
+                job["_id"], {"status": "done", "stage": "done", "progress": 1.0, "result": jsonable_encoder(res_data)}
+            )
+
+    job_runner.submit(run_job, cancelled=cancel_job)
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content={"id": job["_id"], "status": job["status"]})
+
+
+@router.get("/history", response_description="Analysis history retrieved", response_model=AnalysisPage)
+async def get_analysis_history(
+    limit: int = Query(20, ge=1, le=100), cursor: str | None = None, token: str = Depends(oauth2_scheme)
+) -> JSONResponse:
+    """Endpoint returns page of logged in user's analyses, newest first.
+
+    Args:
+        limit (int, optional): Maximum number of analyses to return. Defaults to 20.
+        cursor (str | None, optional): next_cursor returned with previous page. Defaults to None.
+
+    Returns:
+        JSONResponse: analyses and cursor of the next page (null on the last page).
+    """
+    user = await get_current_user(token)
+    analyses, next_cursor = await analysis_crud.get_analyses(user["_id"], limit=limit, cursor=cursor)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"data": jsonable_encoder(analyses), "next_cursor": next_cursor},
+    )
+
+
+@router.get("/jobs/{job_id}", response_description="Stock data analysis job status retrieved")
+async def get_stock_data_job(job_id: str, token: str = Depends(oauth2_scheme)) -> JSONResponse:
+    """Endpoint returns status and progress of analysis job.
+
+    Job created by logged in user is returned to that user only.
+    """
+    user = await get_optional_user(token)
+    job = await job_crud.get_job(job_id, user["_id"] if user else None, with_result=False)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(job))
+
+
+@router.get("/jobs/{job_id}/result", response_description="Stock data analysis job result retrieved")
+async def get_stock_data_job_result(job_id: str, token: str = Depends(oauth2_scheme)) -> JSONResponse:
+    """Endpoint returns result of finished analysis job (of logged in user, when user created it)."""
+    user = await get_optional_user(token)
+    job = await job_crud.get_job(job_id, user["_id"] if user else None)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=job["error_status_code"], detail=job["error"])
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job with id: {job_id} is {job['status']}.")
+    return stock_data_response(job["request"], job["result"])
+
+
+@router.get("/charts/{key}", response_description="Chart retrieved")
+async def get_chart(
+    key: str,
+    image_format: str | None = Query(None, alias="format"),
+    accept: str | None = Header(None),
+    if_none_match: str | None = Header(None),
+) -> Response:
+    """Endpoint returns chart rendered by analysis as PNG or WebP image.
+
+    Format is taken from format query parameter or Accept header (WebP when client accepts it).
+    Charts of analysis history are served from database when chart cache does not have them.
+    """
+    if not CHART_KEY_PATTERN.fullmatch(key):
+        raise HTTPException(status_code=404, detail=f"Chart with key: {key} not found.")
+    if image_format is None:
+        image_format = "webp" if accept and "image/webp" in accept else "png"
+    if image_format not in CHART_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="incorrect format value.")
+    variant = key if image_format == "png" else f"{key}-{image_format}"
+    headers = {"ETag": f'"{variant}"', "Cache-Control": CHART_CACHE_CONTROL, "Vary": "Accept"}
+    if if_none_match and headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    chart = await io_executor.run(chart_cache.get, variant)
+    if chart is None:
+        # Charts of analysis history evicted from chart cache are served from database
+        png = await io_executor.run(chart_cache.get, key) or await stored_chart(key)
+        if png is not None and image_format == "webp":
+            chart = CachedChart(await cpu_executor.run(png_to_webp, png.png), png.meta)
+            await io_executor.run(chart_cache.put, variant, chart.png, chart.meta)
+        else:
+            chart = png
+    if chart is None:
+        raise HTTPException(status_code=404, detail=f"Chart with key: {key} not found.")
+    return Response(content=chart.png, media_type=CHART_MEDIA_TYPES[image_format], headers=headers)
 
 
 @router.post("/portfolio-var", response_description="Stock data retrieved")
@@ -446,27 +584,22 @@ async def calculate_portfolio_var(req_data: GetPortfolioData, token: str = Depen
     date_from = datetime.datetime.strptime(date_from, "%Y-%m-%d").date()
     date_to = datetime.datetime.strptime(date_to, "%Y-%m-%d").date()
     # Get data for each portfolio item
+    try:
+        prices, errors = await load_prices_concurrently(
+            [company["symbol"] for company in portfolio], "daily", date_from, date_to, function="get_daily_adjusted"
+        )
+    except (httpx.HTTPError, RateLimitExceeded) as error:
+        raise market_data_error(error)
+    if errors:
+        raise HTTPException(status_code=400, detail={"message": "incorrect symbol value.", "errors": errors})
     for company in portfolio:
-        try:
-            data, meta = ts.get_daily_adjusted(symbol=company["symbol"], outputsize="full")
-            data = prepare_data(data, interval="daily")
-            # adjust selected datetime
-            print(f"Data from: {date_from} to {date_to}")
-            mask = (data["TradeDate"] >= date_from) & (data["TradeDate"] <= date_to)
-            data = data.loc[mask]
-            historical_days_list.append(len(data))
-            portfolio_with_data[company["symbol"]] = {
-                "value": company["value"],
-                "data": data,
-            }
-            # portfolio_with_data.append({
-            #     "symbol": company["symbol"],
-            #     "value": company["value"],
-            #     "data": data,
-            #     "meta": meta
-            # })
-        except ValueError as ex:
-            raise HTTPException(status_code=400, detail=f"incorrect symbol value. {ex}")
+        data, meta = prices[company["symbol"]]
+        data = prepare_data(data, interval="daily")
+        historical_days_list.append(len(data))
+        portfolio_with_data[company["symbol"]] = {
+            "value": company["value"],
+            "data": data,
+        }
     historical_days = round(sum(historical_days_list) / len(historical_days_list))
     if var_type == "historical":
         # calculate returns
@@ -476,15 +609,34 @@ async def calculate_portfolio_var(req_data: GetPortfolioData, token: str = Depen
             close_prices: pd.Series = data["close"]
             returns: pd.Series = calculate_returns(close_prices)
             symbol_data["returns"] = returns
-        var = portfolio_historical_var(
-            portfolio_with_data, symbol_data, confidence_level, horizon_days, date_from, date_to
-        )
+        try:
+            var = await cpu_executor.run(
+                portfolio_historical_var, portfolio_with_data, confidence_level, horizon_days, date_from, date_to
+            )
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="analysis timed out.")
 
     res_data = {"var": var, "historical_days": historical_days}
     res_data = json.dumps(res_data)
     return JSONResponse(status_code=status.HTTP_200_OK, content=res_data)
 
 
+@router.get("/cache-stats", response_description="Stock data cache statistics retrieved")
+async def get_cache_stats() -> JSONResponse:
+    """Endpoint returns hit/miss/eviction counters of stock data cache, symbol search and api requests
+    and number of requests coalesced with in-flight download of the same series.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=series_cache.stats()
+        | {
+            "search": symbol_search.stats(),
+            "api": market_data.stats(),
+            "single_flight": {"series": ts.flights.stats(), "store": store_flights.stats()},
+        },
+    )
+
+
 @router.get("/search", response_description="Stock data retrieved")
 async def search_stock_data(symbol: str, token: str = Depends(oauth2_scheme)):
     """Endpoint to search for company based on a given phrase."""
@@ -498,21 +650,17 @@ async def search_stock_data(symbol: str, token: str = Depends(oauth2_scheme)):
         user_availability = True
 
     try:
-        print("#################")
-        url = f"https://www.alphavantage.co/query?function=SYMBOL_SEARCH&keywords={symbol}&apikey=D6Q2O1GZ0MZO4FO0"
-        r: requests.Response = requests.get(url, timeout=10)
-        data: dict = r.json()
-        data: list = data["bestMatches"]
-    except KeyError:
+        data: list[dict] = await symbol_search.search(symbol)
+    except ValueError:
         raise HTTPException(status_code=400, detail=f"incorrect symbol value.")
+    except (httpx.HTTPError, RateLimitExceeded) as error:
+        raise market_data_error(error)
 
     if not data:
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={"message": f"For phrase '{symbol}' company not found"},
         )
-    data: list[dict] = prepare_search_data(data)
-
     return JSONResponse(
         status_code=status.HTTP_200_OK,
         content={"data": data, "user_availability": user_availability},
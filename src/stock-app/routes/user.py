@@ -1,36 +1,53 @@
 """Module contains endpoints for User collection."""
 import json
-from datetime import timedelta
+from datetime import datetime, timedelta
 
-from fastapi import APIRouter, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import HTTPException
 from pydantic import parse_obj_as
 
 import security as security
 from config import settings
-from schemas.user import UserOut, UserCreate, UserUpdate
+from schemas.user import UserOut, UserCreate, UserUpdate, UserBatchUpdate, UserPage
 from crud import user_crud
 
 
 router = APIRouter()
 
 
-@router.get("/", response_description="Users retrieved", response_model=list[UserOut])
-async def get_users(skip: int = 0, limit: int = 100) -> JSONResponse:
-    """Endpoint returns all users from database.
+@router.get("/", response_description="Users retrieved", response_model=UserPage)
+async def get_users(
+    skip: int = Query(0, ge=0, deprecated=True),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+    stream_format: str = Query("json", alias="format", regex="^(json|ndjson)$"),
+) -> JSONResponse | StreamingResponse:
+    """Endpoint returns users from database ordered by id (without password and analysis history).
 
     Args:
         skip (int, optional): The number of records to skip starting from the first record \
-            in the collection. Defaults to 0.
+            in the collection, use cursor instead. Defaults to 0.
         limit (int, optional): Maximum number of records to return. Defaults to 100.
+        cursor (str | None, optional): next_cursor returned with previous page. Defaults to None.
+        stream_format (str, optional): format query parameter, "json" returns one page, "ndjson" streams \
+            all users (after cursor) one JSON document per line. Defaults to "json".
 
     Returns:
-        JSONResponse: All users returned from the database
+        JSONResponse | StreamingResponse: Page of users and cursor of the next page (null on the last page) \
+            or stream of all users.
     """
-    users = await user_crud.get_users(skip=skip, limit=limit)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=users)
+    if stream_format == "ndjson":
+        return StreamingResponse(
+            (json.dumps(jsonable_encoder(user)) + "\n" async for user in user_crud.stream_users(cursor)),
+            media_type="application/x-ndjson",
+        )
+    users, next_cursor = await user_crud.get_users(skip=skip, limit=limit, cursor=cursor)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"data": jsonable_encoder(users), "next_cursor": next_cursor},
+    )
 
 
 @router.get("/by-email/{email}", response_description="User retrieved", response_model=UserOut)
@@ -113,6 +130,33 @@ async def update_user(user_id: str, user: UserUpdate) -> JSONResponse:
     )
 
 
+@router.patch("/", response_description="Users updated")
+async def update_users(users: list[UserBatchUpdate], token: str = Depends(security.oauth2_scheme)) -> JSONResponse:
+    """Endpoint to update many users at once (admin bulk operations), requires superuser.
+
+    Only fields given for each user are updated.
+
+    Args:
+        users (list[UserBatchUpdate]): User ids with details to be updated.
+
+    Returns:
+        JSONResponse: Number of matched and modified users.
+    """
+    current_user = await security.get_current_user(token)
+    if not current_user["is_superuser"]:
+        raise HTTPException(status_code=403, detail="Not enough permissions.")
+    updates = []
+    for user in users:
+        data: dict = jsonable_encoder(user.data, exclude_unset=True)
+        data.pop("confirm_password", None)
+        if data.get("password"):
+            data["password"] = await security.get_password_hash(data["password"])
+        data["updated_at"] = jsonable_encoder(datetime.now())
+        updates.append((user.id, data))
+    result = await user_crud.update_users(updates)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=result)
+
+
 @router.delete("/{user_id}", response_description="User deleted", response_model=UserOut)
 async def delete_user(user_id: str) -> JSONResponse:
     """Endpoint to delete selected user.
@@ -1,7 +1,7 @@
 """Module contains User pydantic schemas."""
 from datetime import datetime
 from bson.objectid import ObjectId
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, validator
 from dataclasses import dataclass
 
 from schemas.py_object_id import PyObjectId
@@ -26,9 +26,18 @@ class GetStockData(BaseModel):
     confidence_level: float | None = Field(example=0.99)
     historical_days: int | None = Field(example=200)
     horizon_days: int | None = Field(example=1)
+    response_mode: str | None = Field(example="inline")
     plot: str | None
     var: float | None
 
+    @validator("date_from", "date_to")
+    def check_date(cls, value: str) -> str:
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError("incorrect date value, expected YYYY-MM-DD.")
+        return value
+
     class Config:
         orm_mode = True
         json_encoders = {ObjectId: str}
@@ -49,10 +58,30 @@ class GetStockData(BaseModel):
                 "confidence_level": 0.99,
                 "historical_days": 200,
                 "horizon_days": 1,
+                "response_mode": "inline",
             }
         }
 
 
+class GetStockDataBatch(BaseModel):
+    items: list[GetStockData] = Field(min_items=1)
+
+
+class AnalysisOut(GetStockData):
+    id: str = Field(alias="_id")
+    user_id: str
+    created_at: datetime
+    plot_url: str | None
+    hurst_plot_url: str | None
+    hurst_exponent: float | None
+    historical_days: int | None
+
+
+class AnalysisPage(BaseModel):
+    data: list[AnalysisOut]
+    next_cursor: str | None
+
+
 class GetPortfolioData(BaseModel):
     portfolio: list
     var_type: str | None = Field(example="historical")
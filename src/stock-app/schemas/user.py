@@ -70,9 +70,27 @@ class UserUpdate(BaseModel):
         }
 
 
+class UserBatchUpdate(BaseModel):
+    id: str = Field(example="6440f5b8a3b1e7d2c9a0b1c2")
+    data: UserUpdate
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "id": "6440f5b8a3b1e7d2c9a0b1c2",
+                "data": {"is_active": False},
+            }
+        }
+
+
 class UserInDB(UserBase):
     hashed_password: str
 
 
 class UserOut(UserBase):
     pass
+
+
+class UserPage(BaseModel):
+    data: list[UserOut]
+    next_cursor: str | None
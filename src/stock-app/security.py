@@ -7,16 +7,33 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
 from config import settings
+from executors import password_executor
 from schemas.token import TokenData
 from schemas.user import UserBase
 from crud import user_crud
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with other number of rounds are marked as deprecated and rehashed on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
-def verify_password(plain_password, hashed_password):
+async def run_password_job(func, *args):
+    """Runs bcrypt job on password_executor (bcrypt releases the GIL, hashing does not block event loop).
+
+    Raises:
+        HTTPException: HTTP 503 code when PASSWORD_HASH_MAX_QUEUE jobs are already waiting for worker.
+    """
+    if password_executor.queue_depth >= settings.PASSWORD_HASH_MAX_QUEUE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login requests, try again later.",
+            headers={"Retry-After": "1"},
+        )
+    return await password_executor.run(func, *args)
+
+
+async def verify_password(plain_password, hashed_password):
     """Comapres given password in plain text with hased_password.
 
     Args:
@@ -26,10 +43,23 @@ def verify_password(plain_password, hashed_password):
     Returns:
         True | False (bool): True if password are equal or False if not.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return await run_password_job(pwd_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_update_password(plain_password, hashed_password):
+    """Comapres given password in plain text with hased_password and rehashes it when hash is deprecated.
+
+    Args:
+        plain_password (str): password in plain text.
+        hashed_password (str): encrypted password.
+
+    Returns:
+        (tuple[bool, str | None]): True if password are equal and new hash (None if hash is up to date).
+    """
+    return await run_password_job(pwd_context.verify_and_update, plain_password, hashed_password)
 
 
-def get_password_hash(password):
+async def get_password_hash(password):
     """Hashes password.
 
     Args:
@@ -38,7 +68,7 @@ def get_password_hash(password):
     Returns:
         (str): hashed password.
     """
-    return pwd_context.hash(password)
+    return await run_password_job(pwd_context.hash, password)
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -75,7 +105,7 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = await user_crud.get_user_by_email(user_email=token_data.username)
+    user = await user_crud.get_user_identity(user_email=token_data.username)
     if user is None:
         raise credentials_exception
     return user
@@ -1,8 +1,264 @@
-from alpha_vantage.timeseries import TimeSeries
+import asyncio
+import datetime
+import os
+
+import httpx
+import pandas as pd
 
 from config import settings
+from executors import io_executor
+from market_data.cache import CachedTimeSeries, SeriesCache
+from market_data.client import AlphaVantageClient, RateLimitExceeded
+from market_data.providers import FileProvider, MarketDataProvider
+from market_data.rate_limit import RateLimiter
+from market_data.single_flight import SingleFlight
+from market_data.store import PriceStore, atomic_file, slice_dates, to_ohlcv
+from market_data.symbols import SymbolIndex, SymbolSearch, remote_result
 
 
 api_key = settings.ALPHA_VANTAGE_API_KEY
 
-ts = TimeSeries(api_key, output_format="pandas")
+INTERVAL_FUNCTIONS = {"monthly": "get_monthly", "weekly": "get_weekly", "daily": "get_daily"}
+
+price_store = PriceStore(settings.PRICE_STORE_DIR) if settings.PRICE_STORE_DIR else None
+# Concurrent refreshes of the same stored series download and write it once
+store_flights = SingleFlight()
+
+# Price store persists downloaded series, cache disk tier is used only without it
+series_cache = SeriesCache(
+    ttl=settings.STOCK_CACHE_TTL,
+    max_bytes=settings.STOCK_CACHE_MAX_BYTES,
+    directory=settings.STOCK_CACHE_DIR if price_store is None else None,
+)
+
+
+def create_provider(name: str) -> MarketDataProvider:
+    """Returns market data provider selected with MARKET_DATA_PROVIDER setting ("alpha_vantage" or "files")."""
+    if name == "files":
+        return FileProvider(settings.MARKET_DATA_DIR, run=io_executor.run)
+    if name == "alpha_vantage":
+        return AlphaVantageClient(
+            api_key,
+            settings.ALPHA_VANTAGE_URL,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+            retries=settings.HTTP_RETRIES,
+            backoff=settings.HTTP_RETRY_BACKOFF,
+            rate_limiter=RateLimiter(settings.ALPHA_VANTAGE_CALLS_PER_MINUTE)
+            if settings.ALPHA_VANTAGE_CALLS_PER_MINUTE
+            else None,
+            run=io_executor.run,
+        )
+    raise ValueError(f"Unknown market data provider: {name}.")
+
+
+# Shared by all market data requests, provider is opened in app startup and closed in shutdown
+market_data = create_provider(settings.MARKET_DATA_PROVIDER)
+
+
+def stored_series(key: tuple) -> pd.DataFrame | None:
+    """Returns series of the key from the price store (None when it is not stored), seeds incremental refresh."""
+    if price_store is None or price_store.info(key) is None:
+        return None
+    return price_store.read(key)
+
+
+ts = CachedTimeSeries(
+    market_data,
+    series_cache,
+    incremental=settings.STOCK_INCREMENTAL_REFRESH,
+    run=io_executor.run,
+    stored=stored_series,
+)
+
+
+async def fetch_series(function: str, symbol: str, interval: str) -> tuple[pd.DataFrame, dict]:
+    """Downloads full series through cached market data client.
+
+    Args:
+        function (str): TimeSeries method name (get_daily, get_daily_adjusted, get_intraday...).
+        symbol (str): company symbol.
+        interval (str): series interval.
+
+    Raises:
+        ValueError: incorrect symbol or api error.
+        RateLimitExceeded: api call quota exceeded.
+
+    Returns:
+        (tuple[pd.DataFrame, dict]): OHLCV frame and meta data.
+    """
+    if function == "get_intraday":
+        data, meta = await ts.get_intraday(symbol=symbol, interval=interval, outputsize="full")
+    elif function in ("get_daily", "get_daily_adjusted"):
+        data, meta = await getattr(ts, function)(symbol=symbol, outputsize="full")
+    else:
+        data, meta = await getattr(ts, function)(symbol=symbol)
+    return to_ohlcv(data), meta
+
+
+async def load_prices(
+    symbol: str,
+    interval: str,
+    date_from: datetime.date,
+    date_to: datetime.date,
+    function: str | None = None,
+) -> tuple[pd.DataFrame, dict]:
+    """Returns OHLCV bars between date_from and date_to (both inclusive).
+
+    Bars are read from the price store (on io_executor), series is downloaded again when stored
+    one is older than interval TTL. Without price store series is filtered in memory.
+
+    Args:
+        symbol (str): company symbol.
+        interval (str): series interval.
+        date_from (datetime.date): first day.
+        date_to (datetime.date): last day.
+        function (str | None, optional): TimeSeries method name. Defaults to None (selected by interval).
+
+    Raises:
+        ValueError: incorrect symbol or api error.
+        RateLimitExceeded: api call quota exceeded.
+
+    Returns:
+        (tuple[pd.DataFrame, dict]): OHLCV frame sorted from the newest bar and meta data.
+    """
+    function = function or INTERVAL_FUNCTIONS.get(interval, "get_intraday")
+    if price_store is None:
+        data, meta = await fetch_series(function, symbol, interval)
+        return slice_dates(data, date_from, date_to), meta
+    key = (function, symbol.upper(), interval)
+    info = await io_executor.run(price_store.info, key)
+    ttl = settings.STOCK_CACHE_TTL.get(interval, 0)
+    if info is None or datetime.datetime.now().timestamp() - info["fetched_at"] > ttl:
+        info = await store_flights.run(key, refresh_store, key, function, symbol, interval)
+    return await io_executor.run(price_store.read, key, date_from, date_to), info["meta"]
+
+
+async def refresh_store(key: tuple, function: str, symbol: str, interval: str) -> dict:
+    """Downloads series and replaces stored one, returns its meta data."""
+    data, meta = await fetch_series(function, symbol, interval)
+    await io_executor.run(price_store.write, key, data, meta)
+    return {"meta": meta}
+
+
+async def load_prices_concurrently(
+    symbols: list[str],
+    interval: str,
+    date_from: datetime.date,
+    date_to: datetime.date,
+    function: str | None = None,
+) -> tuple[dict[str, tuple[pd.DataFrame, dict]], dict[str, str]]:
+    """Loads prices of many symbols concurrently (at most MARKET_DATA_CONCURRENCY at once).
+
+    Args:
+        symbols (list[str]): company symbols.
+        interval (str): series interval.
+        date_from (datetime.date): first day.
+        date_to (datetime.date): last day.
+        function (str | None, optional): TimeSeries method name. Defaults to None (selected by interval).
+
+    Returns:
+        (tuple[dict, dict]): symbol -> (data, meta) for loaded symbols and symbol -> error message
+            for symbols which could not be loaded.
+    """
+    semaphore = asyncio.Semaphore(settings.MARKET_DATA_CONCURRENCY)
+
+    async def load(symbol: str) -> tuple[pd.DataFrame, dict]:
+        async with semaphore:
+            return await load_prices(symbol, interval, date_from, date_to, function)
+
+    symbols = list(dict.fromkeys(symbols))
+    results = await asyncio.gather(*[load(symbol) for symbol in symbols], return_exceptions=True)
+    prices, errors = {}, {}
+    for symbol, result in zip(symbols, results):
+        if isinstance(result, ValueError):
+            errors[symbol] = str(result)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            prices[symbol] = result
+    return prices, errors
+
+
+def batch_loader(requests: list[tuple[str, str, datetime.date, datetime.date]]):
+    """Returns load_prices replacement for batch of analyses.
+
+    Each (symbol, interval) of requests is loaded once (between the first and the last day of its
+    requests, at most MARKET_DATA_CONCURRENCY series at once) and requests slice their days from
+    shared frame (frames are shared read-only). Series not in requests are loaded with load_prices.
+
+    Args:
+        requests (list[tuple]): (symbol, interval, date_from, date_to) of analyses in batch.
+    """
+    ranges: dict[tuple[str, str], tuple[datetime.date, datetime.date]] = {}
+    for symbol, interval, date_from, date_to in requests:
+        key = (symbol.upper(), interval)
+        first, last = ranges.get(key, (date_from, date_to))
+        ranges[key] = (min(first, date_from), max(last, date_to))
+    semaphore = asyncio.Semaphore(settings.MARKET_DATA_CONCURRENCY)
+    loads: dict[tuple[str, str], asyncio.Future] = {}
+
+    async def load(key: tuple[str, str]) -> tuple[pd.DataFrame, dict]:
+        async with semaphore:
+            return await load_prices(key[0], key[1], *ranges[key])
+
+    async def loader(
+        symbol: str, interval: str, date_from: datetime.date, date_to: datetime.date
+    ) -> tuple[pd.DataFrame, dict]:
+        key = (symbol.upper(), interval)
+        if key not in ranges:
+            return await load_prices(symbol, interval, date_from, date_to)
+        if key not in loads:
+            loads[key] = asyncio.ensure_future(load(key))
+        # Shared load is not cancelled with one of waiting analyses
+        data, meta = await asyncio.shield(loads[key])
+        return slice_dates(data, date_from, date_to), meta
+
+    return loader
+
+
+async def search_symbols_remote(keywords: str) -> list[dict]:
+    """Searches companies with SYMBOL_SEARCH api.
+
+    Raises:
+        ValueError: api error.
+
+    Returns:
+        (list[dict]): best matches (symbol, name, type, region...).
+    """
+    return [remote_result(match) for match in await market_data.symbol_search(keywords)]
+
+
+def write_file(path: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with atomic_file(path) as file:
+        file.write(content)
+
+
+async def read_symbol_index(path: str) -> SymbolIndex:
+    """Reads listing file, downloads it (LISTING_STATUS api) first when it does not exist.
+    Listing of local provider is read from provider.
+    """
+    if market_data.local:
+        listing = await market_data.listing_status()
+        return await io_executor.run(SymbolIndex.from_listing, listing.decode().splitlines())
+    if not os.path.exists(path):
+        await io_executor.run(write_file, path, await market_data.listing_status())
+    return await io_executor.run(SymbolIndex.from_csv, path)
+
+
+symbol_search = SymbolSearch(SymbolIndex([]), search_symbols_remote, ttl=settings.SYMBOL_SEARCH_CACHE_TTL)
+
+
+async def load_symbol_index() -> None:
+    """Loads local symbol index (on io_executor), search falls back to remote api when it can not be loaded."""
+    if not settings.SYMBOL_LISTING_FILE:
+        return
+    try:
+        symbol_search.index = await read_symbol_index(settings.SYMBOL_LISTING_FILE)
+    except (OSError, httpx.HTTPError, RateLimitExceeded, KeyError, ValueError) as error:
+        print(f"Symbol index not loaded: {error!r}")
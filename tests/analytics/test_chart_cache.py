@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from analytics.chart_cache import ChartCache, chart_key
+
+
+def close_prices(rows: int = 30) -> pd.Series:
+    return pd.Series(
+        np.linspace(100, 130, rows), index=pd.date_range("2022-01-03", periods=rows, freq="B"), name="close"
+    )
+
+
+def test_chart_key_depends_on_series_and_params():
+    data = close_prices()
+    key = chart_key("plot", data, plot_type="linear", interval="daily")
+    assert key == chart_key("plot", data.copy(), interval="daily", plot_type="linear")
+    assert key != chart_key("plot", data, plot_type="candlestick", interval="daily")
+    assert key != chart_key("hurst", data, plot_type="linear", interval="daily")
+    changed = data.copy()
+    changed.iloc[-1] += 0.01
+    assert key != chart_key("plot", changed, plot_type="linear", interval="daily")
+    assert key != chart_key("plot", data.iloc[1:], plot_type="linear", interval="daily")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ChartCache(max_bytes=25)
+    cache.put("a", b"a" * 10)
+    cache.put("b", b"b" * 10)
+    assert cache.get("a").png == b"a" * 10
+    cache.put("c", b"c" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    stats = cache.stats()
+    assert (stats["evictions"], stats["misses"], stats["entries"], stats["bytes"]) == (1, 1, 2, 20)
+
+
+def test_disk_tier_serves_memory_misses(tmp_path):
+    cache = ChartCache(max_bytes=1024, directory=str(tmp_path))
+    cache.put("ab12", b"png", {"hurst_exponent": 0.5})
+    restarted = ChartCache(max_bytes=1024, directory=str(tmp_path))
+    chart = restarted.get("ab12")
+    assert (chart.png, chart.meta) == (b"png", {"hurst_exponent": 0.5})
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.get("ab12") is chart
+    assert restarted.stats()["hits"] == 1
+
+
+def test_disk_tier_is_pruned_above_cap(tmp_path):
+    cache = ChartCache(max_bytes=1024, directory=str(tmp_path), disk_max_bytes=50)
+    for key in ("aa01", "aa02", "aa03"):
+        cache.put(key, b"x" * 20)
+    stats = cache.stats()
+    assert stats["disk_bytes"] <= 50
+    assert stats["disk_evictions"] >= 1
+    cache.clear()
+    assert cache.get("aa03") is not None
+
+
+def test_disk_tier_evicts_least_recently_used_from_index(tmp_path):
+    cache = ChartCache(max_bytes=1024, directory=str(tmp_path), disk_max_bytes=100)
+    for key in ("aa01", "aa02"):
+        cache.put(key, b"x" * 20)
+    restarted = ChartCache(max_bytes=1024, directory=str(tmp_path), disk_max_bytes=60)
+    assert restarted.stats()["disk_bytes"] == cache.stats()["disk_bytes"]
+    assert restarted.get("aa01") is not None
+    restarted.put("aa03", b"x" * 20)
+    restarted.clear()
+    assert restarted.get("aa02") is None
+    assert restarted.get("aa01") is not None and restarted.get("aa03") is not None
+    assert restarted.stats()["disk_evictions"] == 1
+    assert not [name for root, _, names in os.walk(tmp_path) for name in names if name.endswith(".tmp")]
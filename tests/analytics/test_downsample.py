@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from analytics.downsample import CANDLE_PIXELS, lttb, ohlc_buckets, reduce_for_plot
+
+
+def minute_bars(rows: int) -> pd.DataFrame:
+    close = 100 + np.cumsum(np.random.default_rng(2).normal(size=rows))
+    return pd.DataFrame(
+        {"open": close - 0.1, "high": close + 1, "low": close - 1, "close": close, "volume": 10.0},
+        index=pd.date_range("2023-01-02 09:30", periods=rows, freq="1min")[::-1],
+    )
+
+
+def test_lttb_keeps_ends_and_extremes():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[[250, 700]] = [5.0, -5.0]
+    indices = lttb(x, y, 50)
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+    assert {250, 700} <= set(indices)
+    assert np.array_equal(lttb(x[:10], y[:10], 50), np.arange(10))
+
+
+def test_ohlc_buckets_aggregate_bars():
+    data = minute_bars(10).sort_index()
+    buckets = ohlc_buckets(data, 3)
+    assert len(buckets) == 3
+    first = data.iloc[:3]
+    assert buckets.index[0] == first.index[0]
+    assert buckets.iloc[0].to_dict() == {
+        "open": first["open"].iloc[0],
+        "high": first["high"].max(),
+        "low": first["low"].min(),
+        "close": first["close"].iloc[-1],
+        "volume": first["volume"].sum(),
+    }
+    assert buckets["volume"].sum() == data["volume"].sum()
+    assert buckets["high"].max() == data["high"].max()
+    assert buckets["close"].iloc[-1] == data["close"].iloc[-1]
+
+
+def test_reduce_for_plot_targets_pixel_width():
+    data = minute_bars(5000)
+    line = reduce_for_plot("linear", data, 400)
+    assert len(line) == 400
+    assert line.index.is_monotonic_increasing
+    candles = reduce_for_plot("candlestick", data, 400)
+    assert len(candles) == 400 // CANDLE_PIXELS
+    assert candles.index.is_monotonic_increasing
+    short = reduce_for_plot("candlestick", data.iloc[:50], 400)
+    assert short.equals(data.iloc[:50].sort_index())
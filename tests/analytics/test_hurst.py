@@ -0,0 +1,54 @@
+import os
+import numpy as np
+import pandas as pd
+
+from analytics.hurst import hurst_exponent, rescaled_range, segment_lengths
+
+
+def loop_rescaled_range(log_returns: np.ndarray, intervals) -> list:
+    """Reference implementation with nested loops (previous calculate_hurst_exponent)."""
+    ro = []
+    for n in intervals:
+        m = int(len(log_returns) / n)
+        z = np.zeros(shape=(m, n))
+        u = np.zeros(shape=(m, n))
+        r = np.zeros(shape=m)
+        s = np.zeros(shape=m)
+        for i in range(m):
+            y_mean = np.mean(log_returns[i * n : (i + 1) * n])
+            for j in range(n):
+                z[i][j] = log_returns[i * n + j] - y_mean
+                u[i][j] = np.sum(z[i])
+            s[i] = np.std(z[i])
+            r[i] = np.max(u[i] - np.min(u[i]))
+        ro.append(np.mean(r / s))
+    return ro
+
+
+def load_log_returns() -> np.ndarray:
+    data_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "routes", "data.csv")
+    close = pd.read_csv(data_path)["close"][:400]
+    return np.log(close / close.shift(-1)).dropna().to_numpy()
+
+
+def test_segment_lengths():
+    assert segment_lengths(20).tolist() == [5, 6, 7, 8, 9]
+    lengths = segment_lengths(10_000, count=30)
+    assert lengths[0] == 5
+    assert lengths[-1] == 4999
+    assert np.all(np.diff(lengths) > 0)
+    assert len(segment_lengths(10)) == 0
+
+
+def test_rescaled_range_parity():
+    log_returns = load_log_returns()
+    intervals = segment_lengths(len(log_returns))
+    expected = loop_rescaled_range(log_returns, intervals)
+    np.testing.assert_allclose(rescaled_range(log_returns, intervals), expected, rtol=1e-10)
+
+
+def test_hurst_exponent_parity():
+    log_returns = load_log_returns()
+    intervals = segment_lengths(len(log_returns))
+    expected, _ = np.polyfit(np.log(intervals), np.log(loop_rescaled_range(log_returns, intervals)), 1)
+    assert np.isclose(hurst_exponent(log_returns, intervals), expected, rtol=1e-10)
@@ -0,0 +1,47 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from analytics.plots import CHART_PRESETS, ChartMetrics, plot_data, plot_hurst_eponent
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def ohlc_data(rows: int = 60) -> pd.DataFrame:
+    close = 100 + np.cumsum(np.random.default_rng(1).normal(size=rows))
+    return pd.DataFrame(
+        {"open": close - 0.5, "high": close + 1, "low": close - 1, "close": close, "volume": 1000.0},
+        index=pd.date_range("2022-01-03", periods=rows, freq="B"),
+    )
+
+
+def test_plot_data_renders_png_with_preset_size():
+    for plot_type in ("linear", "candlestick"):
+        png, stats = plot_data(plot_type, ohlc_data(), {"2. Symbol": "TEST"}, "Test", "daily", preset="preview")
+        assert png.startswith(PNG_SIGNATURE)
+        preset = CHART_PRESETS["preview"]
+        assert (stats.width_px, stats.height_px) == (preset.width * preset.dpi, preset.height * preset.dpi)
+        assert stats.png_bytes == len(png)
+        assert stats.seconds > 0
+        assert stats.peak_memory is None
+
+
+def test_charts_do_not_use_pyplot_state():
+    figures = plt.get_fignums()
+    intervals = np.arange(5, 30)
+    exponent, png, stats = plot_hurst_eponent(intervals, intervals**0.5, preset="preview", trace_memory=True)
+    assert np.isclose(exponent, 0.5)
+    assert png.startswith(PNG_SIGNATURE)
+    assert stats.peak_memory >= 4 * stats.width_px * stats.height_px
+    assert plt.get_fignums() == figures
+
+
+def test_chart_metrics_aggregates_by_kind():
+    metrics = ChartMetrics()
+    for _ in range(2):
+        _, stats = plot_data("linear", ohlc_data(), {"2. Symbol": "TEST"}, "Test", "5min", preset="preview")
+        metrics.record("linear", stats)
+    linear = metrics.stats()["linear"]
+    assert linear["renders"] == 2
+    assert linear["max_peak_memory"] is None
+    assert linear["mean_seconds"] <= linear["max_seconds"]
@@ -0,0 +1,62 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from analytics.portfolio import portfolio_historical_var, returns_matrix
+
+
+def loop_portfolio_historical_var(portfolio_with_data, confidence_level, horizon_days, date_from, date_to):
+    """Reference implementation with per-day loop (previous portfolio_historical_var)."""
+    portfolio_values = []
+    for n in range(int((date_to - date_from).days) + 1):
+        pd_day = pd.Timestamp(date_from + datetime.timedelta(n))
+        portfolio_value = 0
+        include_date = True
+        for symbol_data in portfolio_with_data.values():
+            returns: pd.Series = symbol_data["returns"]
+            if pd_day in returns:
+                portfolio_value += symbol_data["value"] * returns[pd_day]
+            else:
+                include_date = False
+                break
+        if include_date:
+            portfolio_values.append(portfolio_value)
+    sorted_portfolio_values = np.sort(portfolio_values)
+    worst_portfolio_value = sorted_portfolio_values[int((1 - confidence_level) * len(sorted_portfolio_values))]
+    current_portfolio_value = sum(symbol_data["value"] for symbol_data in portfolio_with_data.values())
+    return (current_portfolio_value - worst_portfolio_value) * np.sqrt(horizon_days)
+
+
+def portfolio(number_of_symbols: int) -> dict:
+    rng = np.random.default_rng(0)
+    days = pd.bdate_range("2020-01-01", "2020-12-31")[::-1]
+    portfolio_with_data = {}
+    for i in range(number_of_symbols):
+        # every symbol misses some days
+        symbol_days = days[rng.random(len(days)) > 0.05]
+        returns = pd.Series(rng.normal(1, 0.02, len(symbol_days)), index=symbol_days)
+        portfolio_with_data[f"S{i}"] = {"value": 1000 * (i + 1), "returns": returns}
+    return portfolio_with_data
+
+
+def test_returns_matrix():
+    index = pd.DatetimeIndex(["2023-08-17", "2023-08-16", "2023-08-15"])
+    matrix = returns_matrix(
+        {"A": pd.Series([1.0, 2.0, 3.0], index=index), "B": pd.Series([4.0, 5.0], index=index[1:])},
+        datetime.date(2023, 8, 14),
+        datetime.date(2023, 8, 16),
+    )
+    assert matrix.index.tolist() == [pd.Timestamp("2023-08-15"), pd.Timestamp("2023-08-16")]
+    assert matrix.to_numpy().tolist() == [[3.0, 5.0], [2.0, 4.0]]
+
+
+def test_portfolio_historical_var_parity():
+    parameters = {
+        "portfolio_with_data": portfolio(5),
+        "confidence_level": 0.95,
+        "horizon_days": 10,
+        "date_from": datetime.date(2020, 3, 1),
+        "date_to": datetime.date(2020, 11, 30),
+    }
+    assert np.isclose(portfolio_historical_var(**parameters), loop_portfolio_historical_var(**parameters))
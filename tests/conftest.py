@@ -0,0 +1,18 @@
+"""Pytest configuration, makes backend app modules importable in tests."""
+import os
+import sys
+import tempfile
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "stock-app")
+sys.path.insert(0, APP_DIR)
+
+# Settings required by config module, real values are provided by .env file
+os.environ.setdefault("DATABASE_URL", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_INITDB_DATABASE", "test")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("CLIENT_ORIGIN", "http://localhost:3000")
+os.environ.setdefault("ALPHA_VANTAGE_API_KEY", "test")
+os.environ.setdefault("PRICE_STORE_DIR", tempfile.mkdtemp(prefix="price-store-"))
+os.environ.setdefault("CHART_CACHE_DIR", tempfile.mkdtemp(prefix="chart-cache-"))
@@ -0,0 +1,58 @@
+import asyncio
+
+import bson
+import pytest
+from fastapi.exceptions import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+from crud import analysis_crud
+from crud.pagination import decode_cursor, encode_cursor
+
+
+@pytest.fixture(autouse=True)
+def analyses(monkeypatch):
+    collection = AsyncMongoMockClient()["test"]["analyses"]
+    monkeypatch.setattr(analysis_crud, "Analysis", collection)
+    return collection
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(["2023-01-02T00:00:00", "abc"])) == ["2023-01-02T00:00:00", "abc"]
+    for cursor in ["not base64!", encode_cursor({"a": 1})[:-2], "e30="]:
+        with pytest.raises(HTTPException) as error:
+            decode_cursor(cursor)
+        assert error.value.status_code == 400
+
+
+def test_history_is_paged_newest_first(analyses):
+    user_id, other_user_id = str(bson.ObjectId()), str(bson.ObjectId())
+
+    async def run():
+        for number in range(5):
+            await analysis_crud.create_analysis(user_id, {"symbol": f"S{number}", "plot_url": "/stock-data/charts/x"})
+        await analysis_crud.create_analysis(other_user_id, {"symbol": "OTHER"})
+        pages = []
+        cursor = None
+        while True:
+            page, cursor = await analysis_crud.get_analyses(user_id, limit=2, cursor=cursor)
+            pages.append([analysis["symbol"] for analysis in page])
+            if cursor is None:
+                return pages
+
+    assert asyncio.run(run()) == [["S4", "S3"], ["S2", "S1"], ["S0"]]
+
+
+def test_analysis_documents_keep_user_reference(analyses):
+    user_id = str(bson.ObjectId())
+    analysis = asyncio.run(analysis_crud.create_analysis(user_id, {"symbol": "INTC"}))
+    stored = asyncio.run(analyses.find_one({"_id": bson.ObjectId(analysis["_id"])}))
+    assert stored["user_id"] == bson.ObjectId(user_id)
+    assert analysis["user_id"] == user_id
+
+
+def test_batch_of_analyses_is_inserted_at_once(analyses):
+    user_id = str(bson.ObjectId())
+    asyncio.run(analysis_crud.create_analyses(user_id, [{"symbol": "INTC"}, {"symbol": "IBM"}]))
+    asyncio.run(analysis_crud.create_analyses(user_id, []))
+    page, _ = asyncio.run(analysis_crud.get_analyses(user_id))
+    assert sorted(analysis["symbol"] for analysis in page) == ["IBM", "INTC"]
@@ -0,0 +1,27 @@
+import asyncio
+
+import bson
+import pytest
+from fastapi.exceptions import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+from crud import job_crud
+
+
+@pytest.fixture(autouse=True)
+def jobs(monkeypatch):
+    collection = AsyncMongoMockClient()["test"]["jobs"]
+    monkeypatch.setattr(job_crud, "Job", collection)
+    return collection
+
+
+def test_job_of_user_is_visible_to_owner_only():
+    owner, other = str(bson.ObjectId()), str(bson.ObjectId())
+    job = asyncio.run(job_crud.create_job({"symbol": "INTC"}, owner))
+    anonymous_job = asyncio.run(job_crud.create_job({"symbol": "IBM"}))
+    assert asyncio.run(job_crud.get_job(job["_id"], owner))["request"] == {"symbol": "INTC"}
+    for user_id in [other, None]:
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(job_crud.get_job(job["_id"], user_id, with_result=False))
+        assert error.value.status_code == 404
+    assert asyncio.run(job_crud.get_job(anonymous_job["_id"], other))["user_id"] is None
@@ -0,0 +1,160 @@
+import asyncio
+
+import pymongo
+import pytest
+from fastapi.exceptions import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+from crud import user_crud
+
+
+@pytest.fixture(autouse=True)
+def users(monkeypatch):
+    collection = AsyncMongoMockClient()["test"]["users"]
+    monkeypatch.setattr(user_crud, "User", collection)
+    monkeypatch.setattr(user_crud, "identity_cache", user_crud.IdentityCache(ttl=30))
+    asyncio.run(user_crud.ensure_indexes())
+    return collection
+
+
+def insert_user(users, email: str = "john@email.com") -> str:
+    user = {
+        "email": email,
+        "name": "John",
+        "is_active": True,
+        "is_superuser": False,
+        "password": "hash",
+        "analysis_history": [{"plot": "x" * 1000}],
+    }
+    return str(asyncio.run(users.insert_one(user)).inserted_id)
+
+
+def test_identity_lookup_projects_identity_fields(users):
+    user_id = insert_user(users)
+    identity = asyncio.run(user_crud.get_user_identity("john@email.com"))
+    assert identity == {
+        "_id": user_id,
+        "email": "john@email.com",
+        "name": "John",
+        "is_active": True,
+        "is_superuser": False,
+    }
+    assert asyncio.run(user_crud.get_user_identity("nobody@email.com")) is None
+
+
+def test_identity_is_cached_until_user_is_deleted(users):
+    user_id = insert_user(users)
+    asyncio.run(user_crud.get_user_identity("john@email.com"))
+    asyncio.run(users.update_one({"email": "john@email.com"}, {"$set": {"name": "Changed elsewhere"}}))
+    identity = asyncio.run(user_crud.get_user_identity("john@email.com"))
+    assert identity["name"] == "John"
+    assert user_crud.identity_cache.hits == 1
+    # Cached identities are copies
+    identity["name"] = "Mutated"
+    assert asyncio.run(user_crud.get_user_identity("john@email.com"))["name"] == "John"
+
+    asyncio.run(user_crud.delete_user(user_id))
+    assert asyncio.run(user_crud.get_user_identity("john@email.com")) is None
+
+
+def test_identity_cache_expires_and_can_be_disabled(monkeypatch):
+    cache = user_crud.IdentityCache(ttl=30)
+    cache.put("john@email.com", {"_id": "1"})
+    now = user_crud.time.monotonic()
+    monkeypatch.setattr(user_crud.time, "monotonic", lambda: now + 31)
+    assert cache.get("john@email.com") is None
+    disabled = user_crud.IdentityCache(ttl=0)
+    disabled.put("john@email.com", {"_id": "1"})
+    assert disabled.get("john@email.com") is None
+
+
+def test_identity_loaded_during_update_is_invalidated(users, monkeypatch):
+    user_id = insert_user(users)
+    find_one_and_update = users.find_one_and_update
+
+    async def concurrent_lookup_and_update(*args, **kwargs):
+        # Lookup served while update is in flight caches the old identity
+        await user_crud.get_user_identity("john@email.com")
+        return await find_one_and_update(*args, **kwargs)
+
+    monkeypatch.setattr(users, "find_one_and_update", concurrent_lookup_and_update)
+    asyncio.run(user_crud.update_user(user_id, {"name": "Jack"}))
+    assert asyncio.run(user_crud.get_user_identity("john@email.com"))["name"] == "Jack"
+
+
+def test_email_is_unique(users):
+    insert_user(users)
+    with pytest.raises(pymongo.errors.DuplicateKeyError):
+        insert_user(users)
+
+
+def test_update_user_returns_updated_document_without_heavy_fields(users):
+    user_id = insert_user(users)
+    asyncio.run(user_crud.get_user_identity("john@email.com"))
+    updated = asyncio.run(user_crud.update_user(user_id, {"name": "Jack", "is_active": None, "_id": user_id}))
+    assert updated == {
+        "_id": user_id,
+        "email": "john@email.com",
+        "name": "Jack",
+        "is_active": True,
+        "is_superuser": False,
+    }
+    assert asyncio.run(user_crud.get_user_identity("john@email.com"))["name"] == "Jack"
+    for user_id, status_code in [("invalid", 400), ("0" * 24, 404)]:
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(user_crud.update_user(user_id, {"name": "Jack"}))
+        assert error.value.status_code == status_code
+
+
+def test_update_users_in_bulk(users):
+    first, second = insert_user(users, "first@email.com"), insert_user(users, "second@email.com")
+    result = asyncio.run(
+        user_crud.update_users(
+            [(first, {"is_active": False}), (second, {"is_active": True}), ("0" * 24, {"name": "x"})]
+        )
+    )
+    assert result == {"matched": 2, "modified": 1}
+    assert asyncio.run(users.count_documents({"is_active": False})) == 1
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(user_crud.update_users([(first, {"name": "x"}), ("invalid", {"name": "y"})]))
+    assert error.value.status_code == 400
+    assert asyncio.run(users.count_documents({"name": "x"})) == 0
+
+
+def test_update_to_existing_email_is_conflict(users):
+    first, second = insert_user(users, "first@email.com"), insert_user(users, "second@email.com")
+    asyncio.run(user_crud.get_user_identity("first@email.com"))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(user_crud.update_user(first, {"email": "second@email.com"}))
+    assert error.value.status_code == 409
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(user_crud.update_users([(first, {"name": "First"}), (second, {"email": "first@email.com"})]))
+    assert error.value.status_code == 409
+    assert error.value.detail["indexes"] == [1]
+    assert asyncio.run(user_crud.get_user_identity("first@email.com"))["name"] == "First"
+
+
+def test_get_users_pages_by_cursor_without_heavy_fields(users):
+    ids = [insert_user(users, f"user{n}@email.com") for n in range(5)]
+    first, cursor = asyncio.run(user_crud.get_users(limit=2))
+    assert [user["_id"] for user in first] == ids[:2]
+    assert all("password" not in user and "analysis_history" not in user for user in first)
+    second, cursor = asyncio.run(user_crud.get_users(limit=2, cursor=cursor))
+    last, cursor = asyncio.run(user_crud.get_users(limit=2, cursor=cursor))
+    assert [user["_id"] for user in second + last] == ids[2:]
+    assert cursor is None
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(user_crud.get_users(cursor="invalid"))
+    assert error.value.status_code == 400
+
+
+def test_stream_users_yields_all_users_after_cursor(users):
+    ids = [insert_user(users, f"user{n}@email.com") for n in range(5)]
+    _, cursor = asyncio.run(user_crud.get_users(limit=1))
+
+    async def collect():
+        return [user async for user in user_crud.stream_users(cursor, batch_size=2)]
+
+    streamed = asyncio.run(collect())
+    assert [user["_id"] for user in streamed] == ids[1:]
+    assert all("analysis_history" not in user for user in streamed)
@@ -0,0 +1,84 @@
+import asyncio
+import os
+
+import pandas as pd
+
+from market_data.cache import CachedTimeSeries, SeriesCache, frame_size
+
+
+time_index = pd.DatetimeIndex(["2023-08-18", "2023-08-17", "2023-08-16"], name="date")
+DATA = pd.DataFrame(
+    {"1. open": [1.0, 2.0, 3.0], "2. high": [2.0, 3.0, 4.0], "4. close": [1.5, 2.5, 3.5]},
+    index=time_index,
+)
+META = {"2. Symbol": "INTC"}
+TTL = {"daily": 3600}
+
+
+class FakeTimeSeries:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_daily(self, symbol, outputsize="compact"):
+        self.calls += 1
+        return DATA.copy(), dict(META)
+
+
+def test_cached_time_series_hit_and_miss():
+    client = FakeTimeSeries()
+    ts = CachedTimeSeries(client, SeriesCache(TTL, max_bytes=10**6))
+    data, _ = asyncio.run(ts.get_daily(symbol="INTC", outputsize="full"))
+    data.columns = ["open", "high", "close"]
+    cached, meta = asyncio.run(ts.get_daily(symbol="intc", outputsize="compact"))
+    assert client.calls == 1
+    assert list(cached.columns) == list(DATA.columns)
+    assert meta == META
+    assert ts.cache.stats()["hits"] == 1
+    assert ts.cache.stats()["misses"] == 1
+
+
+def test_lru_eviction():
+    cache = SeriesCache(TTL, max_bytes=2 * frame_size(DATA))
+    cache.put(("get_daily", "A", "daily"), DATA, META)
+    cache.put(("get_daily", "B", "daily"), DATA, META)
+    cache.get(("get_daily", "A", "daily"))
+    cache.put(("get_daily", "C", "daily"), DATA, META)
+    assert cache.get(("get_daily", "B", "daily")) is None
+    assert cache.get(("get_daily", "A", "daily")) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entry():
+    cache = SeriesCache({"daily": -1}, max_bytes=10**6)
+    cache.put(("get_daily", "A", "daily"), DATA, META)
+    assert cache.get(("get_daily", "A", "daily")) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_disk_persistence(tmp_path):
+    SeriesCache(TTL, max_bytes=10**6, directory=str(tmp_path)).put(("get_daily", "A", "daily"), DATA, META)
+    data, meta = SeriesCache(TTL, max_bytes=10**6, directory=str(tmp_path)).get(("get_daily", "A", "daily"))
+    pd.testing.assert_frame_equal(data, DATA, check_freq=False)
+    assert meta == META
+    assert os.listdir(tmp_path) == ["get_daily-A-daily.json"]
+
+
+class SlowTimeSeries(FakeTimeSeries):
+    async def get_daily(self, symbol, outputsize="compact"):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return DATA.copy(), dict(META)
+
+
+def test_concurrent_misses_share_one_download():
+    client = SlowTimeSeries()
+    ts = CachedTimeSeries(client, SeriesCache(TTL, max_bytes=10**6))
+
+    async def run():
+        full = [ts.get_daily(symbol="INTC", outputsize="full") for _ in range(3)]
+        return await asyncio.gather(*full, ts.get_daily(symbol="intc", outputsize="compact"))
+
+    results = asyncio.run(run())
+    assert client.calls == 1
+    assert all(data is results[0][0] for data, _ in results)
+    assert ts.flights.stats()["coalesced"] == 3
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+import httpx
+import pytest
+
+from market_data.client import AlphaVantageClient, RateLimitExceeded
+
+DAILY = {
+    "Meta Data": {"2. Symbol": "INTC"},
+    "Time Series (Daily)": {
+        "2023-08-18": {"1. open": "34.1", "2. high": "34.5", "3. low": "33.9", "4. close": "34.2", "5. volume": "100"},
+        "2023-08-17": {"1. open": "34.0", "2. high": "34.3", "3. low": "33.8", "4. close": "34.1", "5. volume": "90"},
+    },
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append(dict(parse_qsl(urlparse(self.path).query)))
+        self.server.connections.add(self.client_address)
+        status, body, headers = self.server.responses.pop(0) if self.server.responses else self.server.default
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """Local stub of market data api, answers with queued (status, body, headers) responses or default one."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.requests, server.connections, server.responses = [], set(), []
+    server.default = (200, DAILY, {})
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def client(server, **kwargs) -> AlphaVantageClient:
+    return AlphaVantageClient(
+        "key",
+        f"http://127.0.0.1:{server.server_address[1]}/query",
+        limits=httpx.Limits(max_connections=2),
+        timeout=httpx.Timeout(5),
+        backoff=0.01,
+        **kwargs,
+    )
+
+
+def run(av: AlphaVantageClient, coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await av.aclose()
+
+    return asyncio.run(main())
+
+
+def test_time_series_is_returned_as_frame_and_meta(server):
+    av = client(server)
+    data, meta = run(av, av.get_daily("INTC", outputsize="full"))
+    assert meta == {"2. Symbol": "INTC"}
+    assert list(data.columns) == ["1. open", "2. high", "3. low", "4. close", "5. volume"]
+    assert data.index.name == "date"
+    assert data["4. close"].tolist() == [34.2, 34.1]
+    assert server.requests == [
+        {"function": "TIME_SERIES_DAILY", "symbol": "INTC", "outputsize": "full", "apikey": "key"}
+    ]
+
+
+def test_requests_reuse_pooled_connections(server):
+    av = client(server)
+
+    async def requests():
+        for _ in range(5):
+            await av.get_daily("INTC")
+        await asyncio.gather(*(av.get_daily("INTC") for _ in range(10)))
+
+    run(av, requests())
+    assert len(server.requests) == 15
+    assert len(server.connections) <= 2
+
+
+def test_failed_requests_are_retried(server):
+    server.responses = [(503, {}, {}), (429, {}, {"Retry-After": "0"})]
+    av = client(server)
+    data, _ = run(av, av.get_daily("INTC"))
+    assert len(data) == 2
+    assert av.stats() == {"requests": 3, "retried": 2, "failed": 0}
+
+
+def test_errors_are_raised_after_retries(server):
+    server.responses = [(500, {}, {})] * 4 + [(404, {}, {})]
+    av = client(server, retries=3)
+    with pytest.raises(httpx.HTTPStatusError):
+        run(av, av.get_daily("INTC"))
+    assert len(server.requests) == 4
+    with pytest.raises(httpx.HTTPStatusError):
+        run(av, av.get_daily("INTC"))
+    assert len(server.requests) == 5
+    assert av.stats()["failed"] == 2
+
+
+def test_api_error_messages_raise_value_error(server):
+    server.responses = [(200, {"Error Message": "Invalid API call."}, {}), (200, {"bestMatches": []}, {})]
+    av = client(server)
+    with pytest.raises(ValueError, match="Invalid API call."):
+        run(av, av.get_daily("WRONG"))
+    assert run(av, av.symbol_search("nothing")) == []
+
+
+def test_throttling_messages_are_retried(server):
+    note = {"Note": "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute."}
+    server.responses = [(200, note, {}), (200, {"Information": "API rate limit reached."}, {})]
+    av = client(server)
+    data, _ = run(av, av.get_daily("INTC"))
+    assert len(data) == 2
+    assert av.stats() == {"requests": 3, "retried": 2, "failed": 0}
+    server.responses = [(200, note, {})] * 2
+    throttled = client(server, retries=1)
+    with pytest.raises(RateLimitExceeded):
+        run(throttled, throttled.get_daily("INTC"))
+    assert throttled.stats()["failed"] == 1
@@ -0,0 +1,56 @@
+import asyncio
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from market_data.providers import FileProvider
+from market_data.store import to_ohlcv
+from market_data.symbols import SymbolIndex
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "routes", "data.csv")
+
+
+@pytest.fixture
+def provider(tmp_path):
+    os.makedirs(tmp_path / "daily")
+    shutil.copy(DATA_PATH, tmp_path / "daily" / "INTC.csv")
+    return FileProvider(str(tmp_path))
+
+
+def test_file_provider_serves_series_as_api(provider):
+    data, meta = asyncio.run(provider.get_daily("intc", outputsize="full"))
+    compact, _ = asyncio.run(provider.get_daily_adjusted("INTC"))
+    expected = pd.read_csv(DATA_PATH, index_col="date", parse_dates=True)
+    assert meta["2. Symbol"] == "INTC"
+    assert list(data.columns) == ["open", "high", "low", "close", "volume"]
+    assert len(data) == len(expected)
+    assert data.index.is_monotonic_decreasing
+    assert len(compact) == min(100, len(expected))
+    pd.testing.assert_frame_equal(to_ohlcv(data), data, check_freq=False)
+
+
+def test_file_provider_raises_value_error_for_missing_series(provider):
+    with pytest.raises(ValueError, match="Invalid API call"):
+        asyncio.run(provider.get_weekly("INTC"))
+    with pytest.raises(ValueError):
+        asyncio.run(provider.get_daily("IBM"))
+
+
+def test_file_provider_lists_symbols_of_dataset(provider):
+    listing = asyncio.run(provider.listing_status()).decode().splitlines()
+    index = SymbolIndex.from_listing(listing)
+    assert [result["symbol"] for result in index.search("int")] == ["INTC"]
+    assert [match["1. symbol"] for match in asyncio.run(provider.symbol_search("in"))] == ["INTC"]
+
+
+def test_file_provider_reads_company_names_from_listing(provider, tmp_path):
+    (tmp_path / "listing.csv").write_text(
+        "symbol,name,exchange,assetType,ipoDate,delistingDate,status\n"
+        "INTC,Intel Corp,NASDAQ,Stock,1978-03-17,null,Active\n"
+    )
+    assert provider.symbols() == ["INTC"]
+    index = SymbolIndex.from_listing(asyncio.run(provider.listing_status()).decode().splitlines())
+    assert [(result["symbol"], result["name"]) for result in index.search("intel")] == [("INTC", "Intel Corp")]
+    assert [match["2. name"] for match in asyncio.run(provider.symbol_search("intel"))] == ["Intel Corp"]
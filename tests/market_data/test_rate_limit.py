@@ -0,0 +1,21 @@
+import asyncio
+
+from market_data.rate_limit import RateLimiter
+
+
+def test_rate_limiter_waits_for_window():
+    limiter = RateLimiter(calls=2, period=0.2)
+    assert asyncio.run(limiter.wait()) == 0
+    assert asyncio.run(limiter.wait()) == 0
+    assert asyncio.run(limiter.wait()) > 0
+    assert limiter.waits == 1
+
+
+def test_rate_limiter_waits_in_event_loop():
+    limiter = RateLimiter(calls=1, period=0.2)
+
+    async def run():
+        return await asyncio.gather(limiter.wait(), limiter.wait())
+
+    assert sorted(waited > 0 for waited in asyncio.run(run())) == [False, True]
+    assert limiter.waits == 1
@@ -0,0 +1,59 @@
+import asyncio
+import datetime
+
+import pandas as pd
+
+from market_data.cache import CachedTimeSeries, SeriesCache
+from market_data.refresh import compact_covers_gap, merge_bars, missing_bars
+
+
+def frame(dates: list[str], close: list[float]) -> pd.DataFrame:
+    index = pd.DatetimeIndex(dates, name="date")
+    return pd.DataFrame({"1. open": close, "4. close": close}, index=index)
+
+
+STORED = frame(["2023-08-16", "2023-08-15", "2023-08-14"], [3.0, 2.0, 1.0])
+
+
+def test_missing_bars():
+    friday = pd.Timestamp("2023-08-18")
+    assert missing_bars(friday, "daily", datetime.datetime(2023, 8, 21, 12)) == 1
+    assert missing_bars(pd.Timestamp("2023-08-18 15:00"), "5min", datetime.datetime(2023, 8, 18, 16)) == 12
+    assert compact_covers_gap(friday, "daily", datetime.datetime(2023, 9, 1))
+    assert not compact_covers_gap(friday, "daily", datetime.datetime(2024, 9, 1))
+    assert not compact_covers_gap(friday, "weekly", datetime.datetime(2023, 8, 19))
+
+
+def test_merge_bars():
+    new = frame(["2023-08-18", "2023-08-17", "2023-08-16", "2023-08-15"], [5.0, 4.0, 3.5, 2.0])
+    merged = merge_bars(STORED, new)
+    assert merged.index.is_unique
+    assert merged.index.is_monotonic_decreasing
+    assert merged["4. close"].tolist() == [5.0, 4.0, 3.5, 2.0, 1.0]
+
+
+def test_merge_bars_requires_full_download():
+    assert merge_bars(STORED, frame(["2023-08-18", "2023-08-17"], [5.0, 4.0])) is None
+    assert merge_bars(STORED, frame(["2023-08-17", "2023-08-16", "2023-08-15"], [4.0, 3.0, 9.0])) is None
+
+
+class FakeTimeSeries:
+    def __init__(self):
+        self.calls = []
+        self.days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=4, name="date")[::-1]
+
+    async def get_daily(self, symbol, outputsize="compact"):
+        self.calls.append(outputsize)
+        if outputsize == "compact":
+            return pd.DataFrame({"4. close": [4.0, 3.0]}, index=self.days[:2]), {}
+        return pd.DataFrame({"4. close": [3.0, 2.0, 1.0]}, index=self.days[1:]), {}
+
+
+def test_incremental_refresh():
+    client = FakeTimeSeries()
+    ts = CachedTimeSeries(client, SeriesCache({"daily": -1}, max_bytes=10**6))
+    asyncio.run(ts.get_daily("INTC", outputsize="full"))
+    data, _ = asyncio.run(ts.get_daily("INTC", outputsize="full"))
+    assert client.calls == ["full", "compact"]
+    assert data["4. close"].tolist() == [4.0, 3.0, 2.0, 1.0]
+    assert ts.cache.stats()["refreshes"] == 1
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from market_data.single_flight import SingleFlight
+
+
+def test_concurrent_calls_of_the_same_key_are_coalesced():
+    flights = SingleFlight()
+    calls = []
+
+    async def download(symbol):
+        calls.append(symbol)
+        await asyncio.sleep(0.01)
+        return symbol.lower()
+
+    async def run():
+        return await asyncio.gather(*(flights.run(symbol, download, symbol) for symbol in ["INTC"] * 5 + ["IBM"]))
+
+    assert asyncio.run(run()) == ["intc"] * 5 + ["ibm"]
+    assert calls == ["INTC", "IBM"]
+    assert flights.stats() == {"calls": 2, "coalesced": 4, "failed": 0, "in_flight": 0}
+
+
+def test_errors_are_shared_and_not_cached():
+    flights = SingleFlight()
+
+    async def download():
+        await asyncio.sleep(0.01)
+        raise ValueError("Invalid API call.")
+
+    async def run():
+        return await asyncio.gather(*(flights.run("WRONG", download) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in asyncio.run(run()))
+    with pytest.raises(ValueError):
+        asyncio.run(flights.run("WRONG", download))
+    assert flights.stats() == {"calls": 2, "coalesced": 2, "failed": 2, "in_flight": 0}
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    flights = SingleFlight()
+
+    async def download():
+        await asyncio.sleep(0.02)
+        return "data"
+
+    async def run():
+        first = asyncio.create_task(flights.run("INTC", download))
+        second = asyncio.create_task(flights.run("INTC", download))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "data"
@@ -0,0 +1,60 @@
+import datetime
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from market_data.store import PriceStore, slice_dates, to_ohlcv
+
+
+time_index = pd.DatetimeIndex(["2023-08-18", "2023-08-17", "2023-08-16", "2023-08-15"], name="date")
+API_DATA = pd.DataFrame(
+    {
+        "1. open": [4.0, 3.0, 2.0, 1.0],
+        "2. high": [4.5, 3.5, 2.5, 1.5],
+        "3. low": [3.5, 2.5, 1.5, 0.5],
+        "4. close": [4.2, 3.2, 2.2, 1.2],
+        "5. adjusted close": [4.1, 3.1, 2.1, 1.1],
+        "6. volume": [400, 300, 200, 100],
+    },
+    index=time_index,
+)
+KEY = ("get_daily_adjusted", "INTC", "daily")
+
+
+def test_to_ohlcv():
+    data = to_ohlcv(API_DATA)
+    assert list(data.columns) == ["open", "high", "low", "close", "volume"]
+    assert data["close"].tolist() == [4.2, 3.2, 2.2, 1.2]
+    assert (data.dtypes == np.float64).all()
+
+
+def test_write_and_read_range(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.write(KEY, to_ohlcv(API_DATA), {"2. Symbol": "INTC"})
+    data = store.read(KEY, datetime.date(2023, 8, 16), datetime.date(2023, 8, 17))
+    assert data.index.tolist() == [pd.Timestamp("2023-08-17"), pd.Timestamp("2023-08-16")]
+    assert data["close"].tolist() == [3.2, 2.2]
+    pd.testing.assert_frame_equal(store.read(KEY), to_ohlcv(API_DATA))
+    assert store.info(KEY)["meta"] == {"2. Symbol": "INTC"}
+    assert store.read(KEY, datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)).empty
+
+
+def test_concurrent_writes_publish_complete_files(tmp_path):
+    store = PriceStore(str(tmp_path))
+    assert store.info(KEY) is None
+    assert os.listdir(tmp_path) == []
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda _: store.write(KEY, to_ohlcv(API_DATA), {"2. Symbol": "INTC"}), range(32)))
+    pd.testing.assert_frame_equal(store.read(KEY), to_ohlcv(API_DATA))
+    assert sorted(os.listdir(tmp_path / "daily")) == ["get_daily_adjusted-INTC.json", "get_daily_adjusted-INTC.npy"]
+
+
+def test_slice_dates():
+    data = to_ohlcv(API_DATA)
+    selected = slice_dates(data, datetime.date(2023, 8, 16), datetime.date(2023, 8, 17))
+    assert selected["close"].tolist() == [3.2, 2.2]
+    selected = slice_dates(data.sort_index(), datetime.date(2023, 8, 16), datetime.date(2023, 8, 17))
+    assert selected["close"].tolist() == [2.2, 3.2]
+    assert slice_dates(data, datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)).empty
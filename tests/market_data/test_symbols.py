@@ -0,0 +1,103 @@
+import asyncio
+
+from market_data.symbols import Listing, SymbolIndex, SymbolSearch, remote_result
+
+LISTING = """symbol,name,exchange,assetType,ipoDate,delistingDate,status
+AAPL,Apple Inc,NASDAQ,Stock,1980-12-12,null,Active
+AAP,Advance Auto Parts Inc,NYSE,Stock,2001-11-29,null,Active
+INTC,Intel Corp,NASDAQ,Stock,1978-03-17,null,Active
+MSFT,Microsoft Corporation,NASDAQ,Stock,1986-03-13,null,Active
+"""
+
+
+def index() -> SymbolIndex:
+    return SymbolIndex(
+        [
+            Listing("AAPL", "Apple Inc", "Stock", "NASDAQ"),
+            Listing("AAP", "Advance Auto Parts Inc", "Stock", "NYSE"),
+            Listing("INTC", "Intel Corp", "Stock", "NASDAQ"),
+            Listing("MSFT", "Microsoft Corporation", "Stock", "NASDAQ"),
+        ]
+    )
+
+
+class FakeRemote:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, keywords: str) -> list[dict]:
+        self.calls.append(keywords)
+        await asyncio.sleep(0.01)
+        return [{"symbol": "005930.KS", "name": "Samsung Electronics", "matchScore": "0.8000"}]
+
+
+def test_index_is_loaded_from_listing_file(tmp_path):
+    path = tmp_path / "listing_status.csv"
+    path.write_text(LISTING)
+    assert len(SymbolIndex.from_csv(str(path))) == 4
+
+
+def test_index_matches_symbol_and_name_prefixes():
+    results = index().search("aap")
+    assert [result["symbol"] for result in results] == ["AAP", "AAPL"]
+    assert results[0]["matchScore"] == "1.0000"
+    assert [result["symbol"] for result in index().search("micro")] == ["MSFT"]
+    assert [result["symbol"] for result in index().search("intel corp")] == ["INTC"]
+    assert set(index().search("aapl")[0]) == {
+        "symbol",
+        "name",
+        "type",
+        "region",
+        "marketOpen",
+        "marketClose",
+        "timezone",
+        "currency",
+        "matchScore",
+    }
+
+
+def test_index_matches_misspelled_names():
+    assert [result["symbol"] for result in index().search("microsfot")] == ["MSFT"]
+    assert index().search("samsung") == []
+
+
+def test_remote_matches_are_renamed():
+    match = {"1. symbol": "INTC", "2. name": "Intel Corp", "9. matchScore": "1.0000"}
+    assert remote_result(match) == {"symbol": "INTC", "name": "Intel Corp", "matchScore": "1.0000"}
+
+
+def test_search_falls_back_to_cached_remote_search():
+    remote = FakeRemote()
+    search = SymbolSearch(index(), remote, ttl=60)
+
+    async def run():
+        local = await search.search("  INTC ")
+        first = await asyncio.gather(*(search.search(query) for query in ["Samsung", "samsung ", "SAMSUNG"]))
+        cached = await search.search("samsung")
+        return local, first, cached
+
+    local, first, cached = asyncio.run(run())
+    assert local[0]["symbol"] == "INTC"
+    assert remote.calls == ["samsung"]
+    assert all(results == cached for results in first)
+    assert search.stats() | {"indexed_symbols": 4} == {
+        "indexed_symbols": 4,
+        "local_hits": 1,
+        "hits": 1,
+        "misses": 1,
+        "deduplicated": 2,
+        "in_flight": 0,
+        "entries": 1,
+    }
+
+
+def test_remote_results_expire():
+    remote = FakeRemote()
+    search = SymbolSearch(SymbolIndex([]), remote, ttl=0)
+
+    async def run():
+        await search.search("samsung")
+        await search.search("samsung")
+
+    asyncio.run(run())
+    assert remote.calls == ["samsung", "samsung"]
@@ -0,0 +1,84 @@
+import asyncio
+
+import bson
+import pandas as pd
+import pytest
+from fastapi.exceptions import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+from analytics.chart_cache import ChartCache, chart_key
+from crud import analysis_crud, chart_crud
+from routes import stock_data
+
+
+@pytest.fixture(autouse=True)
+def database(monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(chart_crud, "Chart", db["charts"])
+    monkeypatch.setattr(analysis_crud, "Analysis", db["analyses"])
+    return db
+
+
+def get_chart(key: str, image_format: str | None = None, accept: str | None = None, if_none_match: str | None = None):
+    return asyncio.run(stock_data.get_chart(key, image_format, accept, if_none_match))
+
+
+def put_chart(png: bytes) -> str:
+    key = chart_key("plot", pd.Series([float(len(png))], index=pd.DatetimeIndex(["2023-01-02"]), name="close"))
+    stock_data.chart_cache.put(key, png)
+    return key
+
+
+def test_chart_is_served_as_png_with_etag():
+    key = put_chart(b"\x89PNG chart")
+    assert stock_data.chart_url(key) == f"/stock-data/charts/{key}"
+    response = get_chart(key, accept="image/png,image/*")
+    assert response.status_code == 200
+    assert response.media_type == "image/png"
+    assert response.body == b"\x89PNG chart"
+    assert response.headers["etag"] == f'"{key}"'
+    assert "immutable" in response.headers["cache-control"]
+
+    response = get_chart(key, if_none_match=f'"{key}"')
+    assert response.status_code == 304
+    assert response.body == b""
+
+
+def test_unknown_chart_is_not_found():
+    for key in ["0" * 64, ".."]:
+        with pytest.raises(HTTPException) as error:
+            get_chart(key)
+        assert error.value.status_code == 404
+    with pytest.raises(HTTPException) as error:
+        get_chart(put_chart(b"\x89PNG other chart"), image_format="gif")
+    assert error.value.status_code == 400
+
+
+def test_prepare_ohlc_data_returns_ascending_arrays():
+    data = pd.DataFrame(
+        {column: [2.0, 1.0] for column in ["open", "high", "low", "close", "volume"]},
+        index=pd.DatetimeIndex(["2023-01-03", "2023-01-02"]),
+    )
+    ohlc = stock_data.prepare_ohlc_data(data)
+    assert ohlc["time"] == [1672617600000, 1672704000000]
+    assert ohlc["close"] == [1.0, 2.0]
+    assert ohlc["volume"] == [1.0, 2.0]
+
+
+def test_history_chart_is_served_after_eviction(monkeypatch):
+    key = put_chart(b"\x89PNG history chart")
+    user_id = str(bson.ObjectId())
+    asyncio.run(
+        stock_data.add_to_analysis_history(
+            {"_id": user_id}, {"symbol": "INTC"}, {"plot_url": stock_data.chart_url(key)}
+        )
+    )
+    # Memory-only cache after restart
+    monkeypatch.setattr(stock_data, "chart_cache", ChartCache(max_bytes=1024))
+    assert stock_data.chart_cache.get(key) is None
+    history, _ = asyncio.run(analysis_crud.get_analyses(user_id))
+    history_key = history[0]["plot_url"].rsplit("/", 1)[-1]
+    response = get_chart(history_key, image_format="png")
+    assert response.status_code == 200
+    assert response.body == b"\x89PNG history chart"
+    assert stock_data.chart_cache.get(key).png == b"\x89PNG history chart"
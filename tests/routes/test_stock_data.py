@@ -1,6 +1,23 @@
+import asyncio
+import json
 import os
+
+import httpx
 import pandas as pd
 import numpy as np
+import pytest
+from fastapi.exceptions import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+from pydantic import ValidationError
+
+import stock_api
+from crud import job_crud
+from jobs import JobRunner
+from market_data.client import AlphaVantageClient
+from routes import stock_data
+from schemas.stock import GetPortfolioData, GetStockData, GetStockDataBatch
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data.csv")
 
 
 def calculate_value_at_risk(
@@ -101,3 +118,163 @@ def test_calculate_value_at_risk():
     }
     var = calculate_value_at_risk(**var_parameters)
     assert int(var) == CORRECT_CALCULATE_VAR_VALUE
+
+
+def failing_api(monkeypatch, handler) -> None:
+    """Replaces market data client with client of api answering with handler, without retries."""
+    client = AlphaVantageClient("test", "https://api.test/query", httpx.Limits(), httpx.Timeout(1), retries=0)
+    client.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(stock_api, "market_data", client)
+    monkeypatch.setattr(stock_api.ts, "ts", client)
+
+
+def route_error(coroutine) -> HTTPException:
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(coroutine)
+    return error.value
+
+
+def test_exhausted_api_quota_is_service_unavailable(monkeypatch):
+    failing_api(monkeypatch, lambda request: httpx.Response(429, headers={"Retry-After": "7"}))
+    req_data = GetStockData(
+        symbol="QUOTA",
+        name="Quota Corp",
+        type="Equity",
+        region="United States",
+        market_open="09:30",
+        market_close="16:00",
+        timezone="UTC-04",
+        currency="USD",
+        calculate=[],
+        date_from="2023-08-01",
+        date_to="2023-08-18",
+        plot_type="linear",
+        interval="daily",
+    )
+    error = route_error(stock_data.calculate_stock_data(req_data, token="invalid"))
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "7"
+
+    failing_api(
+        monkeypatch,
+        lambda request: httpx.Response(200, json={"Note": "Our standard API call frequency is 5 calls per minute."}),
+    )
+    error = route_error(stock_data.calculate_stock_data(req_data, token="invalid"))
+    assert error.status_code == 503
+    assert "Retry-After" in error.headers
+
+
+def test_api_outage_is_mapped_to_gateway_errors(monkeypatch):
+    def unreachable(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    failing_api(monkeypatch, unreachable)
+    error = route_error(stock_data.search_stock_data("zzqqxxyy", token="invalid"))
+    assert error.status_code == 503
+
+    failing_api(monkeypatch, lambda request: httpx.Response(500))
+    req_data = GetPortfolioData(
+        portfolio=[{"symbol": "OUTAGE", "value": 1000}, {"symbol": "DOWN", "value": 1000}],
+        var_type="historical",
+        confidence_level=0.99,
+        horizon_days=1,
+        date_from="2023-08-01",
+        date_to="2023-08-18",
+    )
+    error = route_error(stock_data.calculate_portfolio_var(req_data, token="invalid"))
+    assert error.status_code == 502
+
+
+def test_batch_analysis_streams_result_per_item(monkeypatch):
+    calls = []
+    data = pd.read_csv(DATA_PATH, index_col="date", parse_dates=True).sort_index(ascending=False)
+    data = data[["open", "high", "low", "close", "volume"]]
+
+    async def fake_load_prices(symbol, interval, date_from, date_to, function=None):
+        calls.append(symbol)
+        if symbol == "BAD":
+            raise ValueError("Invalid API call.")
+        return data, {"2. Symbol": symbol}
+
+    monkeypatch.setattr(stock_api, "load_prices", fake_load_prices)
+    item = {"symbol": "INTC", "name": "Intel Corp", "interval": "daily", "calculate": [], "plot_type": "linear"}
+    items = [
+        item | {"date_from": "2023-08-01", "date_to": "2023-08-18", "response_mode": "data"},
+        item | {"symbol": "BAD", "date_from": "2023-08-01", "date_to": "2023-08-18", "response_mode": "data"},
+        item | {"date_from": "2023-08-14", "date_to": "2023-08-18", "response_mode": "data"},
+    ]
+
+    async def run(stream_format):
+        return [event async for event in stock_data.analyse_stock_data_batch(items, None, stream_format)]
+
+    events = [json.loads(line) for line in asyncio.run(run("ndjson"))]
+    assert sorted(calls) == ["BAD", "INTC"]
+    assert sorted(event["index"] for event in events) == [0, 1, 2]
+    by_index = {event["index"]: event for event in events}
+    assert by_index[1]["status"] == "failed" and by_index[1]["status_code"] == 400
+    assert by_index[0]["status"] == by_index[2]["status"] == "done"
+    assert len(by_index[0]["result"]["ohlc"]["time"]) > len(by_index[2]["result"]["ohlc"]["time"]) == 5
+
+    messages = asyncio.run(run("sse"))
+    assert messages[-1].startswith("event: end\ndata: ")
+    assert json.loads(messages[-1].split("data: ")[1]) == {"status": "end", "count": 3, "failed": 1}
+    assert all(message.endswith("\n\n") for message in messages)
+
+
+def test_incorrect_dates_are_rejected_by_schema():
+    item = {
+        "symbol": "INTC",
+        "name": "Intel Corp",
+        "type": "Equity",
+        "region": "United States",
+        "market_open": "09:30",
+        "market_close": "16:00",
+        "timezone": "UTC-04",
+        "currency": "USD",
+        "calculate": [],
+        "date_from": "2023-08-01",
+        "date_to": "2023-08-18",
+        "plot_type": "linear",
+    }
+    assert GetStockData(**item).date_to == "2023-08-18"
+    with pytest.raises(ValidationError, match="incorrect date value"):
+        GetStockData(**(item | {"date_to": "18.08.2023"}))
+    with pytest.raises(ValidationError) as error:
+        GetStockDataBatch(items=[item, item | {"date_from": "2023-02-30"}])
+    assert error.value.errors()[0]["loc"] == ("items", 1, "date_from")
+
+
+def test_cancelled_jobs_are_marked_failed(monkeypatch):
+    monkeypatch.setattr(job_crud, "Job", AsyncMongoMockClient()["test"]["jobs"])
+    runner = JobRunner(slots=1)
+    monkeypatch.setattr(stock_data, "job_runner", runner)
+
+    async def endless_analysis(req_data, progress=None):
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(stock_data, "analyse_stock_data", endless_analysis)
+    req_data = GetStockData(
+        symbol="INTC",
+        name="Intel Corp",
+        type="Equity",
+        region="United States",
+        market_open="09:30",
+        market_close="16:00",
+        timezone="UTC-04",
+        currency="USD",
+        calculate=[],
+        date_from="2023-08-01",
+        date_to="2023-08-18",
+        plot_type="linear",
+        interval="daily",
+    )
+
+    async def run():
+        # The first job is running, the second one is queued when runner is shut down
+        responses = [await stock_data.create_stock_data_job(req_data, token="invalid") for _ in range(2)]
+        await asyncio.sleep(0.01)
+        await runner.shutdown()
+        return [await job_crud.get_job(json.loads(response.body)["id"]) for response in responses]
+
+    for job in asyncio.run(run()):
+        assert (job["status"], job["stage"], job["error_status_code"]) == ("failed", "cancelled", 503)
@@ -0,0 +1,28 @@
+import asyncio
+import json
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from crud import user_crud
+from routes import user as user_routes
+
+
+@pytest.fixture(autouse=True)
+def users(monkeypatch):
+    collection = AsyncMongoMockClient()["test"]["users"]
+    monkeypatch.setattr(user_crud, "User", collection)
+    monkeypatch.setattr(user_crud, "identity_cache", user_crud.IdentityCache(ttl=30))
+    return collection
+
+
+def test_get_users_returns_next_cursor_in_body(users):
+    asyncio.run(users.insert_many([{"email": f"user{n}@email.com", "name": "John"} for n in range(3)]))
+    response = asyncio.run(user_routes.get_users(skip=0, limit=2, cursor=None, stream_format="json"))
+    page = json.loads(response.body)
+    assert [user["email"] for user in page["data"]] == ["user0@email.com", "user1@email.com"]
+    response = asyncio.run(user_routes.get_users(skip=0, limit=2, cursor=page["next_cursor"], stream_format="json"))
+    page = json.loads(response.body)
+    assert [user["email"] for user in page["data"]] == ["user2@email.com"]
+    assert page["next_cursor"] is None
+    assert "X-Next-Cursor" not in response.headers
@@ -0,0 +1,33 @@
+from pymongo import monitoring
+
+import database
+from config import settings
+
+ADDRESS = ("localhost", 27017)
+
+
+def test_client_uses_pool_settings_without_connecting():
+    options = database.client.delegate.options.pool_options
+    assert options.max_pool_size == settings.MONGO_MAX_POOL_SIZE
+    assert options.min_pool_size == settings.MONGO_MIN_POOL_SIZE
+    assert (
+        database.client.delegate.options.server_selection_timeout == settings.MONGO_SERVER_SELECTION_TIMEOUT_MS / 1000
+    )
+    assert database.client.delegate._topology._opened is False
+
+
+def test_pool_metrics_count_connections_by_server():
+    metrics = database.PoolMetrics()
+    for connection_id in (1, 2):
+        metrics.connection_created(monitoring.ConnectionCreatedEvent(ADDRESS, connection_id))
+        metrics.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, connection_id))
+    metrics.connection_checked_in(monitoring.ConnectionCheckedInEvent(ADDRESS, 1))
+    metrics.connection_closed(monitoring.ConnectionClosedEvent(ADDRESS, 1, "idle"))
+    metrics.connection_check_out_failed(monitoring.ConnectionCheckOutFailedEvent(ADDRESS, "timeout"))
+    server = metrics.stats()["servers"]["localhost:27017"]
+    assert server["open"] == 1
+    assert server["checked_out"] == 1
+    assert server["max_checked_out"] == 2
+    assert server["check_outs"] == 2
+    assert server["check_out_failures"] == 1
+    assert server["utilization"] == 1 / settings.MONGO_MAX_POOL_SIZE
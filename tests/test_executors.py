@@ -0,0 +1,93 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from analytics.value_at_risk import calculate_value_at_risk
+import executors
+from executors import AnalyticsFarm
+
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "routes", "data.csv")
+
+
+def test_analytics_farm_runs_jobs_on_shared_frames():
+    data = pd.read_csv(DATA_PATH, index_col="date", parse_dates=True)[["open", "high", "low", "close", "volume"]]
+    farm = AnalyticsFarm("test", workers=1, timeout=60)
+
+    async def run():
+        try:
+            return await farm.run(calculate_value_at_risk, "historical", data, 0.99, 1000000, 200, 10)
+        finally:
+            farm.shutdown()
+
+    var = asyncio.run(run())
+    assert var == calculate_value_at_risk("historical", data, 0.99, 1000000, 200, 10)
+    assert farm.stats()["completed"] == 1
+
+
+def test_analytics_farm_restarts_timed_out_worker():
+    farm = AnalyticsFarm("test", workers=1, timeout=60)
+
+    async def run():
+        try:
+            try:
+                await farm.run(time.sleep, 10, job_timeout=0.5)
+            except asyncio.TimeoutError:
+                pass
+            return await farm.run(sum, [1, 2, 3])
+        finally:
+            farm.shutdown()
+
+    assert asyncio.run(run()) == 6
+    assert farm.stats()["timed_out"] == 1
+    assert farm.stats()["restarts"] == 1
+
+
+def test_analytics_farm_keeps_worker_after_failed_submit():
+    farm = AnalyticsFarm("test", workers=1, timeout=60)
+
+    async def run():
+        try:
+            for job in [lambda: 1, functools.partial(time.sleep, threading.Lock())]:
+                with pytest.raises(Exception):
+                    await farm.run(job)
+            # Large result is read in chunks
+            return await asyncio.wait_for(farm.run(bytes, 8 * 1024 * 1024 + 1), 30)
+        finally:
+            farm.shutdown()
+
+    assert len(asyncio.run(run())) == 8 * 1024 * 1024 + 1
+    assert farm.stats()["failed"] == 2
+    assert farm.stats()["restarts"] == 0
+
+
+def test_analytics_farm_retries_failed_worker_restart(monkeypatch):
+    monkeypatch.setattr(executors, "RESTART_RETRY_DELAY", 0)
+    farm = AnalyticsFarm("test", workers=1, timeout=60)
+    start_worker = farm._start_worker
+    attempts = []
+
+    async def failing_start_worker():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("cannot spawn worker")
+        await start_worker()
+
+    async def run():
+        try:
+            await farm.start()
+            farm._start_worker = failing_start_worker
+            with pytest.raises(asyncio.TimeoutError):
+                await farm.run(time.sleep, 10, job_timeout=0.5)
+            return await asyncio.wait_for(farm.run(sum, [1, 2]), 30)
+        finally:
+            farm.shutdown()
+
+    assert asyncio.run(run()) == 3
+    assert len(attempts) == 2
+    assert farm.stats()["failed_restarts"] == 1
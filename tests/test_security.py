@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from fastapi.exceptions import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+from passlib.context import CryptContext
+
+import security
+from config import settings
+from crud import user_crud
+from executors import password_executor
+from routes import auth
+
+
+def context(rounds: int) -> CryptContext:
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+@pytest.fixture(autouse=True)
+def fast_hashes(monkeypatch):
+    monkeypatch.setattr(security, "pwd_context", context(4))
+
+
+def test_passwords_are_hashed_on_password_executor():
+    submitted = password_executor.submitted
+    password_hash = asyncio.run(security.get_password_hash("secret"))
+    assert asyncio.run(security.verify_password("secret", password_hash))
+    assert not asyncio.run(security.verify_password("other", password_hash))
+    assert password_executor.submitted == submitted + 3
+
+
+def test_login_rehashes_password_with_changed_cost(monkeypatch):
+    users = AsyncMongoMockClient()["test"]["users"]
+    monkeypatch.setattr(user_crud, "User", users)
+    asyncio.run(users.insert_one({"email": "john@email.com", "password": context(5).hash("secret")}))
+    assert not asyncio.run(auth.authenticate_user("john@email.com", "wrong"))
+    assert asyncio.run(users.find_one())["password"].startswith("$2b$05$")
+    assert asyncio.run(auth.authenticate_user("john@email.com", "secret"))
+    password_hash = asyncio.run(users.find_one())["password"]
+    assert password_hash.startswith("$2b$04$")
+    assert asyncio.run(security.verify_password("secret", password_hash))
+
+
+def test_hashing_is_rejected_when_queue_is_full(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_QUEUE", 0)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(security.get_password_hash("secret"))
+    assert error.value.status_code == 503
@@ -0,0 +1,103 @@
+import asyncio
+import datetime
+import os
+import shutil
+
+import pandas as pd
+
+import stock_api
+from market_data.cache import SeriesCache
+from market_data.providers import FileProvider
+from market_data.single_flight import SingleFlight
+from market_data.store import PriceStore, to_ohlcv
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "routes", "data.csv")
+
+
+async def fake_load_prices(symbol, interval, date_from, date_to, function=None):
+    if symbol == "WRONG":
+        raise ValueError("Invalid API call.")
+    return pd.DataFrame({"close": [1.0]}), {"2. Symbol": symbol}
+
+
+def test_load_prices_concurrently_reports_errors_per_symbol(monkeypatch):
+    monkeypatch.setattr(stock_api, "load_prices", fake_load_prices)
+    prices, errors = asyncio.run(
+        stock_api.load_prices_concurrently(
+            ["INTC", "WRONG", "IBM", "INTC"], "daily", datetime.date(2023, 1, 1), datetime.date(2023, 2, 1)
+        )
+    )
+    assert sorted(prices) == ["IBM", "INTC"]
+    assert prices["IBM"][1] == {"2. Symbol": "IBM"}
+    assert errors == {"WRONG": "Invalid API call."}
+
+
+def test_load_prices_from_file_provider(monkeypatch, tmp_path):
+    os.makedirs(tmp_path / "daily")
+    shutil.copy(DATA_PATH, tmp_path / "daily" / "INTC.csv")
+    monkeypatch.setattr(stock_api.ts, "ts", FileProvider(str(tmp_path)))
+    monkeypatch.setattr(stock_api.ts, "cache", SeriesCache({"daily": 3600}, max_bytes=10**6))
+    monkeypatch.setattr(stock_api, "price_store", PriceStore(str(tmp_path / "prices")))
+    monkeypatch.setattr(stock_api, "store_flights", SingleFlight())
+    data, meta = asyncio.run(
+        stock_api.load_prices("INTC", "daily", datetime.date(2023, 8, 1), datetime.date(2023, 8, 18))
+    )
+    assert meta["2. Symbol"] == "INTC"
+    assert data.index.max() == pd.Timestamp("2023-08-18")
+    assert data.index.min() >= pd.Timestamp("2023-08-01")
+    assert list(data.columns) == ["open", "high", "low", "close", "volume"]
+
+
+class FakeTimeSeries:
+    def __init__(self):
+        self.calls = []
+        self.days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=4, name="date")[::-1]
+
+    async def get_daily(self, symbol, outputsize="compact"):
+        self.calls.append(outputsize)
+        days = self.days[:2] if outputsize == "compact" else self.days[1:]
+        columns = ["1. open", "2. high", "3. low", "4. close", "5. volume"]
+        return pd.DataFrame({column: [1.0] * len(days) for column in columns}, index=days), {"2. Symbol": symbol}
+
+
+def test_refresh_store_is_seeded_from_price_store(monkeypatch, tmp_path):
+    client = FakeTimeSeries()
+    key = ("get_daily", "INTC", "daily")
+    monkeypatch.setattr(stock_api, "price_store", PriceStore(str(tmp_path)))
+    monkeypatch.setattr(stock_api.ts, "ts", client)
+    monkeypatch.setattr(stock_api.ts, "cache", SeriesCache({"daily": 3600}, max_bytes=10**6))
+    data, meta = asyncio.run(client.get_daily("INTC", outputsize="full"))
+    stock_api.price_store.write(key, to_ohlcv(data), meta)
+    client.calls.clear()
+    asyncio.run(stock_api.refresh_store(key, "get_daily", "INTC", "daily"))
+    assert client.calls == ["compact"]
+    assert stock_api.price_store.read(key).index.tolist() == client.days.tolist()
+    assert stock_api.ts.cache.stats()["refreshes"] == 1
+
+
+def test_batch_loader_loads_each_series_once(monkeypatch):
+    calls = []
+    index = pd.date_range("2023-01-01", "2023-01-31", freq="D")[::-1]
+    data = pd.DataFrame({column: range(len(index)) for column in ["open", "high", "low", "close", "volume"]}, index)
+
+    async def fake_load_prices(symbol, interval, date_from, date_to, function=None):
+        calls.append((symbol, interval, date_from, date_to))
+        await asyncio.sleep(0.01)
+        return data, {"2. Symbol": symbol}
+
+    monkeypatch.setattr(stock_api, "load_prices", fake_load_prices)
+    day = datetime.date
+    loader = stock_api.batch_loader(
+        [("INTC", "daily", day(2023, 1, 10), day(2023, 1, 20)), ("intc", "daily", day(2023, 1, 5), day(2023, 1, 12))]
+    )
+
+    async def run():
+        return await asyncio.gather(
+            loader("INTC", "daily", day(2023, 1, 10), day(2023, 1, 20)),
+            loader("intc", "daily", day(2023, 1, 5), day(2023, 1, 12)),
+        )
+
+    (first, _), (second, _) = asyncio.run(run())
+    assert calls == [("INTC", "daily", day(2023, 1, 5), day(2023, 1, 20))]
+    assert (first.index.min(), first.index.max()) == (pd.Timestamp("2023-01-10"), pd.Timestamp("2023-01-20"))
+    assert (second.index.min(), second.index.max()) == (pd.Timestamp("2023-01-05"), pd.Timestamp("2023-01-12"))